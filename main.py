@@ -1,68 +1,57 @@
 import argparse
 import asyncio
 import random
-import time
 import os
-import json
-import aiofiles
-from src.problem_attempt import attempt_problem
-from src.problem_loader import load_aoc_problems, Problem, load_problems
+from src.pipeline import BenchmarkJob, run_pipeline
+from src.problem_loader import load_aoc_problems, load_problems
+from src.results_index import sync_index
+from src.columnar_store import convert_jsonl_to_columnar
+from src.incremental_stats import refresh_stats
+from src.attempt_stats import print_report
+from src.executor import EXECUTOR_BACKENDS, set_executor_backend, configure_result_cache, configure_execution_concurrency, open_executor, close_executor
+from src.result_cache import ResultCache, DEFAULT_RESULT_CACHE_PATH
+from src.rate_limiter import configure_rate_limit, executor_limit_name, configure_adaptive_limits, adaptive_limiters
+from src.local_executor import configure_compile_cache, configure_host_network
+from src.compile_cache import CompileCache, DEFAULT_CACHE_DIR
+from src.completion_cache import CompletionCache, COMPLETION_CACHE_MODES, DEFAULT_COMPLETION_CACHE_PATH
+from src.model_api import configure_completion_cache, configure_streaming, StreamStats
+from src.simple_agent import AgentStats
+from src.agent_strategies import configure_agent_budget, is_agent_model, parse_budget
+from src.staged_evaluation import configure_staged_evaluation
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Compilation Benchmark")
     parser.add_argument('--max_problems', type=int, default=55, help='Maximum number of problems to process')
     parser.add_argument('--max_concurrent_tasks', type=int, default=20, help='Maximum number of concurrent tasks, reduce this parameter to avoid rate limiting')
+    parser.add_argument('--generation_workers', type=int, default=None, help='Maximum number of model calls in flight, defaults to --max_concurrent_tasks')
+    parser.add_argument('--execution_workers', type=int, default=None, help='Maximum number of programs compiled/run at once, defaults to the number of cores for the local executor and to --max_concurrent_tasks for JDoodle')
     parser.add_argument('-o', '--output_file', type=str, default="results/test_merged.jsonl", help='Output file name')
+    parser.add_argument('--columnar_dir', type=str, default=None, help='If set, the output file is also converted into a Parquet store in this directory at the end of the run')
+    parser.add_argument('--print_stats', action='store_true', help='If set, print the statistics of the output file at the end of the run (updated incrementally from the last run)')
     parser.add_argument('--provider', type=str, choices=['open-router', 'llama-cpp', 'ollama'], default="open-router", help='Provider name')
     parser.add_argument('--rerun_problems', action='store_true', help='If set, will rerun all problems, otherwise will skip problems that are already in the output file')
     parser.add_argument('-t', '--temperature', type=float, default=1.0, help='Temperature factor to use for the LM text generation')
+    parser.add_argument('--executor', type=str, choices=EXECUTOR_BACKENDS, default="jdoodle", help='Where to compile and run the generated code: the JDoodle API or local toolchains, which isolate the network and limit resources but leave the host filesystem readable and writable by the programs')
+    parser.add_argument('--llm_requests_per_second', type=float, default=10.0, help='Requests per second sent to the model provider, 0 for no limit')
+    parser.add_argument('--llm_initial_concurrency', type=int, default=8, help='Starting number of in-flight requests per provider and per model, adapted up to --generation_workers on success and halved on rate limiting')
+    parser.add_argument('--executor_requests_per_second', type=float, default=10.0, help='Executions per second sent to the executor, 0 for no limit')
+    parser.add_argument('--executor_pool_size', type=int, default=100, help='Maximum number of open connections to the JDoodle API')
+    parser.add_argument('--executor_per_host_limit', type=int, default=0, help='Maximum number of connections per host to the JDoodle API, 0 for no limit')
+    parser.add_argument('--executor_keepalive', type=float, default=30.0, help='Seconds an idle JDoodle connection is kept open for reuse')
+    parser.add_argument('--allow_host_network', action='store_true', help='Let the local executor run programs with host networking when network namespaces are unavailable, instead of refusing to run them')
+    parser.add_argument('--compile_cache_dir', type=str, default=DEFAULT_CACHE_DIR, help='Directory of the compile cache used by the local executor')
+    parser.add_argument('--compile_cache_size_mb', type=int, default=2048, help='Size limit of the compile cache, least recently used entries are evicted beyond it')
+    parser.add_argument('--no_compile_cache', action='store_true', help='If set, the local executor recompiles every program')
+    parser.add_argument('--result_cache_path', type=str, default=DEFAULT_RESULT_CACHE_PATH, help='SQLite file memoizing execution results of (program, input) pairs')
+    parser.add_argument('--no_result_cache', action='store_true', help='If set, every program is executed even if the same program and input ran before')
+    parser.add_argument('--completion_cache', type=str, choices=COMPLETION_CACHE_MODES, default="off", help='Record model completions (record), reuse recorded ones and only query the model for the rest (record-missing), or never query the model (replay)')
+    parser.add_argument('--completion_cache_path', type=str, default=DEFAULT_COMPLETION_CACHE_PATH, help='SQLite file of recorded model completions')
+    parser.add_argument('--stream', action='store_true', help='If set, stream completions and stop each one as soon as its first complete code block has arrived')
+    parser.add_argument('--staged_evaluation', action='store_true', help='If set, run programs on the example of the problem first and only on the full input if they print the example output; agents repair example failures with the expected output')
+    parser.add_argument('--agent_budget', type=parse_budget, default=None, help='Budget of every agent problem, e.g. calls=7,tokens=20000,executor_seconds=30, overriding the defaults of the strategies (agent-<strategy>_<model>) to compare them at equal cost')
+    parser.add_argument('--agent_run_budget', type=parse_budget, default=None, help='Budget of all agent problems of the run together, shared out between the problems that are not finished yet')
     return parser.parse_args()
 
-def get_set_from_file(filename: str):
-    result = set()
-    try:
-        with open(filename, "r") as file:
-            for line in file:
-                try:
-                    entry = json.loads(line.strip())
-                    # Extract the required fields, using None if a field is missing
-                    tuple_entry = (
-                        entry.get("model"),
-                        entry.get("problem_id"),
-                        entry.get("programming_language"),
-                    )
-                    result.add(tuple_entry)
-                except json.JSONDecodeError:
-                    # Skip malformed JSON lines
-                    continue
-
-        return result
-
-    except FileNotFoundError:
-        raise FileNotFoundError(f"The file {filename} was not found.")
-
-
-async def process_one_problem(
-    model: str,
-    language: str,
-    problem: Problem,
-    writing_filename: str,
-    provider: str,
-    semaphore: asyncio.Semaphore,
-    **kwargs,
-):
-    async with semaphore:
-        print(f"Processing {model} {language} {problem.problem_id}")
-        time.sleep(0.1)
-        problem_attempt = await attempt_problem(model, language, problem, provider, **kwargs)
-        if problem_attempt.success:
-            async with aiofiles.open(writing_filename, mode="a") as file:
-                json_line = json.dumps(problem_attempt.to_writable_dict()) + "\n"
-                await file.write(json_line)
-                print(f"Success {model} {language} {problem.problem_id}")
-        time.sleep(0.3)
-
-
 async def main():
     # programming_languages = ["python", "cpp", "haskell", "rust", "ocaml", "go"]
     programming_languages = ["python", "cpp", "haskell", "rust", "ocaml", "go"]
@@ -89,34 +78,77 @@ async def main():
     provider = args.provider
     rerun_problems = args.rerun_problems
     temperature = args.temperature
+    generation_workers = args.generation_workers or max_concurrent_tasks
+    execution_workers = args.execution_workers
+    if execution_workers is None:
+        execution_workers = (os.cpu_count() or 1) if args.executor == "local" else max_concurrent_tasks
+
+    set_executor_backend(args.executor)
+    configure_host_network(args.allow_host_network)
+    configure_execution_concurrency(execution_workers)
+    configure_rate_limit(provider, args.llm_requests_per_second)
+    configure_adaptive_limits(args.llm_initial_concurrency, generation_workers)
+    configure_rate_limit(executor_limit_name(args.executor), args.executor_requests_per_second)
+    if not args.no_compile_cache:
+        configure_compile_cache(CompileCache(args.compile_cache_dir, args.compile_cache_size_mb * 1024 * 1024))
+    result_cache = None
+    if not args.no_result_cache:
+        result_cache = ResultCache(args.result_cache_path)
+        configure_result_cache(result_cache)
+    configure_streaming(args.stream)
+    configure_staged_evaluation(args.staged_evaluation)
+    completion_cache = None
+    if args.completion_cache != "off":
+        completion_cache = CompletionCache(args.completion_cache_path, args.completion_cache)
+        configure_completion_cache(completion_cache)
 
     if (not rerun_problems) and os.path.exists(output_file):
-        existing_problems = get_set_from_file(output_file)
+        existing_problems = sync_index(output_file)
     else:
         existing_problems = set()
 
-    semaphore = asyncio.Semaphore(max_concurrent_tasks)
     # Load aoc problems, or other problems
     problems = await load_problems()
     #problems = await load_aoc_problems()
     problems = problems[:max_problems]
 
-    tasks = []
+    jobs = []
     for problem in problems:
         for language in programming_languages:
             for model in models:
                 if (model, problem.problem_id, language) in existing_problems:
                     print(f"Skipping {model} {language} {problem.problem_id}")
                     continue
-                tasks.append(
-                    process_one_problem(
-                        model, language, problem, output_file, provider, semaphore, temperature=temperature,
-                    )
-                )
+                jobs.append(BenchmarkJob(model, language, problem))
 
-    random.shuffle(tasks)
-    print(f"Total tasks: {len(tasks)}")
-    await asyncio.gather(*tasks)
+    random.shuffle(jobs)
+    agent_scheduler = configure_agent_budget(args.agent_budget, args.agent_run_budget, sum(is_agent_model(job.model) for job in jobs))
+    print(f"Total tasks: {len(jobs)}")
+    await open_executor(args.executor_pool_size, args.executor_per_host_limit, args.executor_keepalive)
+    try:
+        stats = await run_pipeline(jobs, output_file, provider, generation_workers, execution_workers, temperature=temperature)
+        print(f"Finished {stats.results} tasks, {stats.rows_written} results written to {output_file}")
+        if args.columnar_dir:
+            rows = convert_jsonl_to_columnar(output_file, args.columnar_dir)
+            print(f"Converted {rows} rows into {args.columnar_dir}")
+        if args.print_stats and os.path.exists(output_file):
+            print_report(refresh_stats(output_file).counts_frame())
+    finally:
+        await close_executor()
+        for limiter in adaptive_limiters():
+            print(limiter.summary())
+        if result_cache is not None:
+            print(f"Result cache: {result_cache.hits} hits, {result_cache.misses} misses")
+            result_cache.close()
+        if StreamStats.streams:
+            print(f"Streaming: {StreamStats.stopped_at_code_block} of {StreamStats.streams} completions stopped at their code block, {StreamStats.characters} characters received")
+        if AgentStats.samples:
+            print(f"Agent: {AgentStats.rounds_stopped_early} rounds stopped early, {AgentStats.generations_cancelled} of {AgentStats.samples} samples not generated, {AgentStats.executions_cancelled} executions cancelled")
+        if agent_scheduler is not None:
+            print(agent_scheduler.summary())
+        if completion_cache is not None:
+            print(f"Completion cache ({completion_cache.mode}): {completion_cache.hits} hits, {completion_cache.misses} misses")
+            completion_cache.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,404 @@
+import math
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple, Type
+
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.problem_attempt_result import ProblemAttemptResult
+from src.problem_loader import Problem
+from src.prompt_manager import get_correction_prompt, get_prompt
+from src.simple_agent import AgentCost, attempt_round, classify_attempts, get_final_result
+from src.staged_evaluation import ExampleFailureResponse, staged_evaluation_enabled
+
+DEFAULT_STRATEGY = "iterative-repair"
+
+# Most model calls the original agent loop (iterative-repair) makes on a problem: 3 fresh samples, then
+# 1 fresh sample and 3 repairs. Every strategy gets this budget by default, so they compare at equal cost
+DEFAULT_CALLS_PER_PROBLEM = 7
+
+Attempt = Tuple[str, ExecuteCodeResponse]
+
+
+@dataclass
+class AgentBudget:
+    """Limits on the model calls, estimated tokens and executor seconds an agent may spend, None for no limit."""
+    calls: Optional[int] = None
+    tokens: Optional[int] = None
+    executor_seconds: Optional[float] = None
+
+    def calls_left(self, spent: AgentCost) -> Optional[int]:
+        """Model calls that can still be made, 0 once any limit is reached, None when calls are unlimited."""
+        if self.tokens is not None and spent.tokens >= self.tokens:
+            return 0
+        if self.executor_seconds is not None and spent.executor_seconds >= self.executor_seconds:
+            return 0
+        if self.calls is None:
+            return None
+        return max(0, self.calls - spent.calls)
+
+    def overridden(self, other: Optional["AgentBudget"]) -> "AgentBudget":
+        """This budget with the limits set in other replacing its own."""
+        if other is None:
+            return self
+        return AgentBudget(*(
+            getattr(self, field.name) if getattr(other, field.name) is None else getattr(other, field.name)
+            for field in fields(self)
+        ))
+
+
+def parse_budget(spec: str) -> AgentBudget:
+    """
+    Parse a budget such as "calls=7,tokens=20000,executor_seconds=30".
+
+    Raises:
+        ValueError: On unknown limits or malformed values
+    """
+    budget = AgentBudget()
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = part.partition("=")
+        if name == "calls":
+            budget.calls = int(value)
+        elif name == "tokens":
+            budget.tokens = int(value)
+        elif name == "executor_seconds":
+            budget.executor_seconds = float(value)
+        else:
+            raise ValueError(f"Unknown budget limit {name!r} in {spec!r}, expected calls, tokens or executor_seconds")
+    return budget
+
+
+class BudgetScheduler:
+    """
+    Shares a run-wide budget between the agent problems of a run.
+
+    Each round asks for the calls it wants and is granted at most an equal share
+    of what is left among the problems that are not finished yet, so early
+    problems cannot starve later ones. Problems that are solved early stop
+    asking, which leaves their share to the others.
+    """
+
+    def __init__(self, budget: AgentBudget, problems: int):
+        self.budget = budget
+        self.spent = AgentCost()
+        self.unfinished = max(1, problems)
+        self.denied = 0
+        self._reserved = 0
+
+    def grant(self, calls: int) -> int:
+        """Reserve up to calls model calls for a round and return the number granted."""
+        left = self.budget.calls_left(self.spent)
+        if left is not None:
+            share = math.ceil((left - self._reserved) / self.unfinished)
+            calls = max(0, min(calls, share))
+        if calls == 0:
+            self.denied += 1
+        self._reserved += calls
+        return calls
+
+    def settle(self, granted: int, cost: AgentCost) -> None:
+        """Release a reservation and charge what the round actually spent."""
+        self._reserved -= granted
+        self.spent.add(cost)
+
+    def finish(self) -> None:
+        """Mark one problem as done."""
+        self.unfinished = max(1, self.unfinished - 1)
+
+    def summary(self) -> str:
+        return (f"Agent budget: {self.spent.calls} calls, ~{self.spent.tokens} tokens, {self.spent.executor_seconds:.1f} executor seconds spent "
+                f"of {self.budget}, {self.denied} rounds denied")
+
+
+_PROBLEM_BUDGET: Optional[AgentBudget] = None
+_SCHEDULER: Optional[BudgetScheduler] = None
+
+
+def configure_agent_budget(problem_budget: Optional[AgentBudget] = None, run_budget: Optional[AgentBudget] = None, problems: int = 0) -> Optional[BudgetScheduler]:
+    """
+    Set the budget of every agent problem, overriding the strategy defaults, and
+    the budget of the whole run shared between the agent problems.
+
+    Returns:
+        The scheduler of the run budget, None without one
+    """
+    global _PROBLEM_BUDGET, _SCHEDULER
+    _PROBLEM_BUDGET = problem_budget
+    _SCHEDULER = BudgetScheduler(run_budget, problems) if run_budget is not None else None
+    return _SCHEDULER
+
+
+class AgentRun:
+    """
+    One agent solving one problem: sends rounds of samples within the problem
+    budget and the run-wide scheduler, and keeps the attempts so far.
+
+    With staged evaluation, samples are run on the example of the problem first
+    and only those that pass it are run on the full input.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        programming_language: str,
+        problem: Problem,
+        provider: str,
+        budget: AgentBudget,
+        scheduler: Optional[BudgetScheduler] = None,
+        **kwargs
+    ):
+        self.name = name
+        self.model = model
+        self.programming_language = programming_language
+        self.problem = problem
+        self.provider = provider
+        self.budget = budget
+        self.scheduler = scheduler
+        self.kwargs = kwargs
+        self.staged = staged_evaluation_enabled()
+        self.cost = AgentCost()
+        self.successful_attempts: List[Attempt] = []
+        self.code_error_attempts: List[Attempt] = []
+
+    def fresh_prompt(self) -> str:
+        return get_prompt(self.programming_language, self.problem)
+
+    def correction_prompt(self, attempt: Attempt) -> str:
+        code, api_response = attempt
+        # Programs that failed the example are shown the output they should have printed
+        expected_output = api_response.expected_output if isinstance(api_response, ExampleFailureResponse) else None
+        return get_correction_prompt(self.programming_language, self.problem, code, api_response, expected_output)
+
+    async def round(
+        self,
+        requests: List[Tuple[str, int]],
+        needed: Optional[int],
+    ) -> List[Tuple[bool, Optional[str], Optional[ExecuteCodeResponse]]]:
+        """
+        Run one round of (prompt, n) requests, trimmed to the calls the budgets
+        still allow; requests listed first are served first.
+
+        Returns:
+            The finished samples, empty once the budget is spent
+        """
+        wanted = sum(n for _, n in requests)
+        allowed = self.budget.calls_left(self.cost)
+        granted = wanted if allowed is None else min(wanted, allowed)
+        if self.scheduler is not None and granted > 0:
+            granted = self.scheduler.grant(granted)
+
+        trimmed = []
+        left = granted
+        for prompt, n in requests:
+            if left <= 0:
+                break
+            trimmed.append((prompt, min(n, left)))
+            left -= min(n, left)
+        if not trimmed:
+            return []
+
+        cost = AgentCost()
+        try:
+            return await attempt_round(
+                self.model,
+                trimmed,
+                self.programming_language,
+                self.problem,
+                self.provider,
+                needed,
+                self.staged,
+                cost,
+                self.successful_attempts,
+                **self.kwargs
+            )
+        finally:
+            self.cost.add(cost)
+            if self.scheduler is not None:
+                self.scheduler.settle(granted, cost)
+
+    async def solve_round(self, requests: List[Tuple[str, int]], min_correct: int) -> Tuple[List[Attempt], List[Attempt]]:
+        """Run a round on the problem input and record its attempts, stopping once min_correct were reached."""
+        results = await self.round(requests, min_correct - len(self.successful_attempts))
+        return self.record(results)
+
+    def record(self, results: List[Tuple[bool, Optional[str], Optional[ExecuteCodeResponse]]]) -> Tuple[List[Attempt], List[Attempt]]:
+        new_successful_attempts, new_code_error_attempts = classify_attempts(results)
+        self.successful_attempts.extend(new_successful_attempts)
+        self.code_error_attempts.extend(new_code_error_attempts)
+        return new_successful_attempts, new_code_error_attempts
+
+    def result(self) -> ProblemAttemptResult:
+        return get_final_result(self.successful_attempts, self.code_error_attempts, self.problem, self.name, self.programming_language)
+
+
+class AgentStrategy(ABC):
+    """
+    How an agent spends its budget on a problem. Subclasses set name and the
+    default budget and implement solve.
+    """
+    name = ""
+    default_budget = AgentBudget(calls=DEFAULT_CALLS_PER_PROBLEM)
+
+    def __init__(self, min_correct: int = 1):
+        self.min_correct = min_correct
+
+    @abstractmethod
+    async def solve(self, run: AgentRun) -> None:
+        """Spend the budget of run on its problem, recording the attempts in run."""
+
+    def solved(self, run: AgentRun) -> bool:
+        return len(run.successful_attempts) >= self.min_correct
+
+
+class BestOfN(AgentStrategy):
+    """Sample n programs of the plain prompt and keep the majority output of those that run."""
+    name = "best-of-n"
+
+    def __init__(self, n: int = DEFAULT_CALLS_PER_PROBLEM, min_correct: int = 1):
+        super().__init__(min_correct)
+        self.n = n
+
+    async def solve(self, run: AgentRun) -> None:
+        await run.solve_round([(run.fresh_prompt(), self.n)], self.min_correct)
+
+
+class IterativeRepair(AgentStrategy):
+    """
+    Sample initial_attempts programs, then each round resample fresh programs
+    and ask for a repair of the first failed ones, until max_attempts samples
+    were made.
+    """
+    name = "iterative-repair"
+
+    def __init__(self, max_attempts: int = 5, initial_attempts: int = 3, min_correct: int = 1):
+        super().__init__(min_correct)
+        self.max_attempts = max_attempts
+        self.initial_attempts = initial_attempts
+
+    async def solve(self, run: AgentRun) -> None:
+        total = 0
+        while total < self.max_attempts and not self.solved(run):
+            # Fresh attempts share one prompt, so they are requested as samples of one call
+            requests = [(run.fresh_prompt(), max(1, self.initial_attempts - len(run.code_error_attempts)))]
+            for attempt in run.code_error_attempts[:self.initial_attempts]:
+                requests.append((run.correction_prompt(attempt), 1))
+            calls_before = run.cost.calls
+            results = await run.round(requests, self.min_correct - len(run.successful_attempts))
+            if not results:
+                break
+            run.record(results)
+            # The budgets may have trimmed the round and an early stop cancels samples, count the calls made
+            total += run.cost.calls - calls_before
+
+
+class RepairTree(AgentStrategy):
+    """
+    Sample initial_attempts programs, then for depth levels ask for branching
+    repairs of each of the beam most recent failures, so repairs build on
+    earlier repairs instead of restarting from the first failures.
+    """
+    name = "repair-tree"
+
+    def __init__(self, initial_attempts: int = 2, branching: int = 2, beam: int = 1, depth: int = 2, min_correct: int = 1):
+        super().__init__(min_correct)
+        self.initial_attempts = initial_attempts
+        self.branching = branching
+        self.beam = beam
+        self.depth = depth
+
+    async def solve(self, run: AgentRun) -> None:
+        _, frontier = await run.solve_round([(run.fresh_prompt(), self.initial_attempts)], self.min_correct)
+        for _ in range(self.depth):
+            if self.solved(run) or not frontier:
+                break
+            requests = [(run.correction_prompt(attempt), self.branching) for attempt in frontier[:self.beam]]
+            _, frontier = await run.solve_round(requests, self.min_correct)
+
+
+class SelfTestFirst(AgentStrategy):
+    """
+    Run every candidate on the example of the problem statement first, whether
+    or not staged evaluation is enabled for the run. Only candidates that
+    reproduce the example output are run on the full input, the latest failures
+    are repaired with the expected example output as feedback. Problems without
+    an example (Advent of Code) go straight to the full input.
+    """
+    name = "self-test-first"
+
+    def __init__(self, initial_attempts: int = 3, max_rounds: int = 3, min_correct: int = 1):
+        super().__init__(min_correct)
+        self.initial_attempts = initial_attempts
+        self.max_rounds = max_rounds
+
+    async def solve(self, run: AgentRun) -> None:
+        run.staged = True
+        failures: List[Attempt] = []
+        for _ in range(self.max_rounds):
+            requests = [(run.fresh_prompt(), max(1, self.initial_attempts - len(failures)))]
+            requests += [(run.correction_prompt(attempt), 1) for attempt in failures[:self.initial_attempts]]
+            results = await run.round(requests, self.min_correct - len(run.successful_attempts))
+            if not results:
+                break
+            _, failures = run.record(results)
+            if self.solved(run):
+                break
+
+
+STRATEGIES: Dict[str, Type[AgentStrategy]] = {
+    strategy.name: strategy for strategy in (BestOfN, IterativeRepair, RepairTree, SelfTestFirst)
+}
+
+
+def is_agent_model(name: str) -> bool:
+    """Whether name selects an agent: agent_<model> or agent-<strategy>_<model>."""
+    prefix = name.split("_", 1)[0]
+    return "_" in name and (prefix == "agent" or prefix.startswith("agent-"))
+
+
+def parse_agent_model(name: str) -> Tuple[str, str]:
+    """
+    Split an agent name of the form agent[-<strategy>]_<model> into the strategy
+    name and the model, which may itself contain underscores.
+
+    Raises:
+        ValueError: If the name is not an agent name or the strategy is unknown
+    """
+    if not is_agent_model(name):
+        raise ValueError(f"Not an agent model name: {name}, expected agent[-<strategy>]_<model>")
+    prefix, model = name.split("_", 1)
+    strategy = prefix[len("agent-"):] if prefix.startswith("agent-") else DEFAULT_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown agent strategy {strategy!r} in {name}, expected one of {sorted(STRATEGIES)}")
+    return strategy, model
+
+
+async def agent_attempt_solution(
+    model: str,
+    programming_language: str,
+    problem: Problem,
+    provider: str,
+    **kwargs
+) -> ProblemAttemptResult:
+    """
+    Attempt to solve a programming problem with the agent strategy named in model.
+
+    Args:
+        model: agent[-<strategy>]_<model>, plain agent_<model> runs iterative repair
+        programming_language: Target programming language
+        problem: The problem to solve
+        provider: Model provider name
+        **kwargs: Additional keyword arguments for API calls
+
+    Returns:
+        ProblemAttemptResult: Object containing the attempt results, with model set to the full agent name
+    """
+    strategy_name, base_model = parse_agent_model(model)
+    strategy = STRATEGIES[strategy_name]()
+    budget = strategy.default_budget.overridden(_PROBLEM_BUDGET)
+    run = AgentRun(model, base_model, programming_language, problem, provider, budget, _SCHEDULER, **kwargs)
+    try:
+        await strategy.solve(run)
+    finally:
+        if _SCHEDULER is not None:
+            _SCHEDULER.finish()
+    return run.result()
@@ -0,0 +1,154 @@
+import json
+import os
+from typing import Any, Dict
+
+import pandas as pd
+
+from src.columnar_store import load_verdicts
+
+KEY_COLUMNS = ["programming_language", "model", "problem_id"]
+VERDICT_COLUMNS = ["compilation_success", "runtime_success", "problem_correct"]
+# Attempts, passes of each verdict, and the attempts that have a compilation and a runtime
+# verdict at all: programs that failed the example under staged evaluation were never run
+# on the full input and have no runtime verdict
+COUNT_COLUMNS = ["attempts", "compiled", "runtime", "correct", "compile_attempts", "runtime_attempts"]
+# Count each rate is taken over
+RATE_DENOMINATORS = {"compiled": "compile_attempts", "runtime": "runtime_attempts", "correct": "attempts"}
+
+
+def load_attempts(path: str) -> pd.DataFrame:
+    """
+    Load one row per attempt with the key and verdict columns only.
+
+    Args:
+        path: A results JSONL file or a columnar store directory
+
+    Returns:
+        DataFrame with programming_language, model, problem_id and the nullable boolean verdicts
+    """
+    if os.path.isdir(path):
+        df = load_verdicts(path, columns=KEY_COLUMNS + VERDICT_COLUMNS)
+    else:
+        columns: Dict[str, list] = {name: [] for name in KEY_COLUMNS + VERDICT_COLUMNS}
+        with open(path, "r") as f:
+            for line in f:
+                data = json.loads(line)
+                for name, values in columns.items():
+                    values.append(data[name])
+        df = pd.DataFrame(columns)
+    for name in KEY_COLUMNS:
+        df[name] = df[name].astype("category")
+    for name in VERDICT_COLUMNS:
+        # A missing verdict stays missing instead of counting as a failure
+        df[name] = df[name].astype("boolean")
+    return df
+
+
+def per_problem_counts(attempts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate attempts into counts per (programming_language, model, problem_id).
+
+    Returns:
+        DataFrame indexed by the key columns with the COUNT_COLUMNS counts
+    """
+    grouped = attempts.groupby(KEY_COLUMNS, observed=True, sort=True)[VERDICT_COLUMNS]
+    passed = grouped.sum()
+    judged = grouped.count()
+    counts = pd.DataFrame({
+        "attempts": grouped.size(),
+        "compiled": passed["compilation_success"],
+        "runtime": passed["runtime_success"],
+        "correct": passed["problem_correct"],
+        "compile_attempts": judged["compilation_success"],
+        "runtime_attempts": judged["runtime_success"],
+    })
+    return counts.astype("int64")
+
+
+def model_rates(counts: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per (programming_language, model) rates in percent, averaging the per-problem
+    success fractions so every problem weighs the same regardless of its attempts.
+    Each fraction is over the attempts that have the verdict, see RATE_DENOMINATORS.
+
+    Returns:
+        DataFrame indexed by (programming_language, model) with problems,
+        compile_pct, runtime_pct and correct_pct
+    """
+    fractions = pd.DataFrame({name: counts[name] / counts[RATE_DENOMINATORS[name]] for name in ("compiled", "runtime", "correct")})
+    grouped = fractions.groupby(level=["programming_language", "model"], observed=True, sort=True)
+    rates = grouped.mean() * 100
+    rates.columns = ["compile_pct", "runtime_pct", "correct_pct"]
+    rates.insert(0, "problems", grouped.size())
+    return rates
+
+
+def problem_summary(counts: pd.DataFrame) -> pd.DataFrame:
+    """Attempts, correct solutions and success percentage per problem over all languages and models."""
+    totals = counts.groupby(level="problem_id", observed=True, sort=True)[["attempts", "correct"]].sum()
+    totals["success_pct"] = totals["correct"] / totals["attempts"] * 100
+    return totals
+
+
+def overall_summary(counts: pd.DataFrame) -> Dict[str, Any]:
+    """Number of languages, models and problems, and the overall success rate in percent."""
+    index = counts.index
+    attempts = int(counts["attempts"].sum())
+    correct = int(counts["correct"].sum())
+    return {
+        "languages": index.get_level_values("programming_language").nunique(),
+        "models": index.get_level_values("model").nunique(),
+        "problems": index.get_level_values("problem_id").nunique(),
+        "attempts": attempts,
+        "correct": correct,
+        "success_pct": (correct / attempts * 100) if attempts > 0 else 0,
+    }
+
+
+def print_model_table(rates: pd.DataFrame) -> None:
+    print("\nDetailed Statistics:")
+    print("-" * 100)
+    print(f"{'Language':<12} {'Model':<35} {'Total':>8} {'Compile %':>12} {'Runtime %':>12} {'Correct %':>12}")
+    print("-" * 100)
+    for lang, lang_rates in rates.groupby(level="programming_language", observed=True, sort=True):
+        for (_, model), row in lang_rates.iterrows():
+            print(f"{lang:<12} {model:<35} {int(row['problems']):>8d} {row['compile_pct']:>11.1f}% {row['runtime_pct']:>11.1f}% {row['correct_pct']:>11.1f}%")
+        print()
+        print("-" * 100)
+        print()
+
+
+def print_summary(summary: Dict[str, Any]) -> None:
+    print("\nSummary Statistics:")
+    print("-" * 100)
+    print(f"{'Metric':<30} {'Value':>8}")
+    print("-" * 100)
+    print(f"{'Total Languages:':<30} {summary['languages']:>8d}")
+    print(f"{'Total Models:':<30} {summary['models']:>8d}")
+    print(f"{'Total Unique Problems:':<30} {summary['problems']:>8d}")
+    print(f"{'Overall Success Rate:':<30} {summary['success_pct']:>7.1f}%")
+
+    print("\nSummary Statistics:")
+    print("-" * 80)
+    print(f"{'Metric':<30} {'Value':<10}")
+    print("-" * 80)
+    print(f"Total Languages:{'':<19} {summary['languages']}")
+    print(f"Total Models:{'':<22} {summary['models']}")
+    print(f"Total Unique Problems:{'':<15} {summary['problems']}")
+    print(f"Overall Success Rate:{'':<16} {summary['success_pct']:.1f}%")
+
+
+def print_problem_table(problems: pd.DataFrame) -> None:
+    print("\nProblem Statistics:")
+    print("-" * 80)
+    print(f"{'Problem ID':<20} {'Attempts':>10} {'Correct':>10} {'Success %':>10}")
+    print("-" * 80)
+    for problem_id, row in problems.iterrows():
+        print(f"{problem_id:<20} {int(row['attempts']):>10d} {int(row['correct']):>10d} {row['success_pct']:>10.1f}%")
+
+
+def print_report(counts: pd.DataFrame) -> None:
+    """Print the per-model, summary and per-problem tables for the given counts."""
+    print_model_table(model_rates(counts))
+    print_summary(overall_summary(counts))
+    print_problem_table(problem_summary(counts))
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import List, Optional
 
 
 def extract_code(text, language) -> Optional[str]:
@@ -21,4 +21,73 @@ def extract_code(text, language) -> Optional[str]:
     if match:
         return match.group(1).strip()
     
-    return None
\ No newline at end of file
+    return None
+
+class IncrementalFenceDetector:
+    """
+    Finds the first complete ```language block of a text that arrives in chunks.
+
+    Each chunk is kept as is and scanned once, together with the few characters
+    before it that may hold the start of a fence split across chunks, so the
+    cost over a whole stream is linear in its length. Once complete is True,
+    code equals extract_code(text, language) and the rest of the stream can be
+    dropped.
+    """
+
+    def __init__(self, language: str):
+        self.opening = f"```{language}\n"
+        self.closing = "```"
+        self._chunks: List[str] = []
+        self._length = 0
+        # End of the text received so far that a fence split across chunks may start in
+        self._overlap = ""
+        self._code_start: Optional[int] = None
+        self._code_end: Optional[int] = None
+
+    @property
+    def complete(self) -> bool:
+        return self._code_end is not None
+
+    @property
+    def text(self) -> str:
+        """Text received so far, up to the closing fence once the block is complete."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    @property
+    def code(self) -> Optional[str]:
+        if not self.complete:
+            return None
+        return self.text[self._code_start:self._code_end].strip()
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Add the next chunk of the text.
+
+        Returns:
+            True once the first code block is complete
+        """
+        if self.complete or not chunk:
+            return self.complete
+        window = self._overlap + chunk
+        window_start = self._length - len(self._overlap)
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+        if self._code_start is None:
+            position = window.find(self.opening)
+            if position < 0:
+                self._overlap = window[-(len(self.opening) - 1):]
+                return False
+            self._code_start = window_start + position + len(self.opening)
+
+        # The overlap may reach back into the opening fence, which is not part of the code
+        position = window.find(self.closing, max(0, self._code_start - window_start))
+        if position < 0:
+            self._overlap = window[-(len(self.closing) - 1):]
+            return False
+        self._code_end = window_start + position
+        self._chunks = [self.text[:self._code_end + len(self.closing)]]
+        self._overlap = ""
+        return True
@@ -0,0 +1,129 @@
+import argparse
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Sub-datasets of a columnar store: light verdict columns and heavy text columns,
+# joined on row_id (the line number of the row in the source JSONL file)
+VERDICTS = "verdicts"
+TEXTS = "texts"
+
+PARTITION_COLUMNS = ["programming_language", "model"]
+VERDICT_COLUMNS = ["problem_id", "compilation_success", "runtime_success", "problem_correct"]
+TEXT_COLUMNS = ["code", "output", "code_errors"]
+
+_PARTITION_SCHEMA = pa.schema([("programming_language", pa.string()), ("model", pa.string())])
+
+VERDICTS_SCHEMA = pa.schema([
+    ("row_id", pa.int64()),
+    ("problem_id", pa.string()),
+    ("compilation_success", pa.bool_()),
+    ("runtime_success", pa.bool_()),
+    ("problem_correct", pa.bool_()),
+    ("programming_language", pa.string()),
+    ("model", pa.string()),
+])
+
+TEXTS_SCHEMA = pa.schema([
+    ("row_id", pa.int64()),
+    ("code", pa.string()),
+    ("output", pa.string()),
+    ("code_errors", pa.string()),
+    ("programming_language", pa.string()),
+    ("model", pa.string()),
+])
+
+
+def _read_batches(jsonl_file: str, batch_rows: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    with open(jsonl_file, "r") as f:
+        for row_id, line in enumerate(f):
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            row["row_id"] = row_id
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _to_table(rows: List[Dict[str, Any]], schema: pa.Schema) -> pa.Table:
+    columns = {name: [row.get(name) for row in rows] for name in schema.names}
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def convert_jsonl_to_columnar(jsonl_file: str, store_dir: str, batch_rows: int = 100_000) -> int:
+    """
+    Convert a results JSONL file into a Parquet store partitioned by language and model.
+
+    The store holds two datasets: `verdicts` with the boolean outcome columns and
+    `texts` with code, output and code_errors. Statistics only need to read the
+    former. Any previous content of store_dir is replaced.
+
+    Args:
+        jsonl_file: Results file written by the benchmark
+        store_dir: Directory of the columnar store
+        batch_rows: Number of rows converted at a time, bounds memory use
+
+    Returns:
+        Number of rows converted
+    """
+    if os.path.exists(store_dir):
+        shutil.rmtree(store_dir)
+    partitioning = ds.partitioning(_PARTITION_SCHEMA, flavor="hive")
+
+    total = 0
+    for batch_number, rows in enumerate(_read_batches(jsonl_file, batch_rows)):
+        for name, schema in ((VERDICTS, VERDICTS_SCHEMA), (TEXTS, TEXTS_SCHEMA)):
+            ds.write_dataset(
+                _to_table(rows, schema),
+                os.path.join(store_dir, name),
+                format="parquet",
+                partitioning=partitioning,
+                basename_template=f"part-{batch_number}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+        total += len(rows)
+    return total
+
+
+def load_verdicts(store_dir: str, columns: Optional[List[str]] = None, filter: Optional[ds.Expression] = None) -> pd.DataFrame:
+    """
+    Load verdict columns from a columnar store.
+
+    Args:
+        store_dir: Directory of the columnar store
+        columns: Columns to read, defaults to all verdict and partition columns
+        filter: Optional pyarrow expression, e.g. ds.field("programming_language") == "rust"
+
+    Returns:
+        DataFrame with one row per attempt
+    """
+    dataset = ds.dataset(os.path.join(store_dir, VERDICTS), format="parquet", partitioning=ds.partitioning(_PARTITION_SCHEMA, flavor="hive"))
+    columns = columns or (PARTITION_COLUMNS + VERDICT_COLUMNS)
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+
+def load_texts(store_dir: str, columns: Optional[List[str]] = None, filter: Optional[ds.Expression] = None) -> pd.DataFrame:
+    """Load the heavy text columns (joined to verdicts on row_id) from a columnar store."""
+    dataset = ds.dataset(os.path.join(store_dir, TEXTS), format="parquet", partitioning=ds.partitioning(_PARTITION_SCHEMA, flavor="hive"))
+    columns = columns or (["row_id"] + PARTITION_COLUMNS + TEXT_COLUMNS)
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a results JSONL file into a columnar Parquet store")
+    parser.add_argument("jsonl_file", type=str, help="Results file to convert")
+    parser.add_argument("store_dir", type=str, help="Output directory of the columnar store")
+    args = parser.parse_args()
+    rows = convert_jsonl_to_columnar(args.jsonl_file, args.store_dir)
+    print(f"Converted {rows} rows from {args.jsonl_file} into {args.store_dir}")
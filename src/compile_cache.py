@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Iterator, Optional, Dict, List, Tuple
+
+DEFAULT_CACHE_DIR = ".cache/compile"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+_META_FILE = "meta.json"
+
+
+def normalize_source(code: str) -> str:
+    """
+    Normalize source code so that whitespace-identical programs hash the same.
+    Line endings and trailing whitespace are dropped, indentation is kept.
+    """
+    lines = [line.rstrip() for line in code.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    return "\n".join(lines).strip("\n") + "\n"
+
+
+def source_digest(code: str, *key_parts: str) -> str:
+    """SHA-256 of the normalized source, namespaced by key_parts (language, version, ...)."""
+    digest = hashlib.sha256()
+    for part in key_parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_source(code).encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class CompileRecord:
+    """Compiler outcome stored alongside the cached artifacts."""
+    returncode: int
+    output: str
+    cpu_time: float
+    max_rss_kb: int
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0
+
+
+class CompileCache:
+    """
+    Content-addressed on-disk cache of compiled artifacts and compiler diagnostics.
+
+    Each entry is a directory named after the source digest holding the artifacts
+    and a meta.json with the compiler outcome. Entries are evicted least recently
+    used first once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(root, exist_ok=True)
+        # Guards the counters, the key locks and the size of the cache
+        self._lock = threading.Lock()
+        # Lock of each key being compiled and the number of threads holding or waiting for it
+        self._key_locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._total_bytes: Optional[int] = None
+
+    @contextmanager
+    def key_lock(self, key: str) -> Iterator[None]:
+        """
+        Hold the lock of key while compiling it, so concurrent duplicates compile once.
+        The lock is dropped once no thread holds or waits for it.
+        """
+        with self._lock:
+            lock, users = self._key_locks.get(key) or (threading.Lock(), 0)
+            self._key_locks[key] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, users = self._key_locks[key]
+                if users == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (lock, users - 1)
+
+    def lookup(self, key: str) -> Optional[Tuple[str, CompileRecord]]:
+        """
+        Look up a compiled entry.
+
+        Returns:
+            Tuple of (entry directory, compiler record), or None on a miss
+        """
+        entry = os.path.join(self.root, key)
+        meta_path = os.path.join(entry, _META_FILE)
+        try:
+            with open(meta_path, "r") as f:
+                record = CompileRecord(**json.load(f))
+            os.utime(meta_path)  # mark as recently used
+        except (OSError, ValueError, TypeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry, record
+
+    def store(self, key: str, record: CompileRecord, workdir: str, artifacts: List[str]) -> None:
+        """Copy the artifacts out of workdir into the cache and evict if over budget."""
+        entry = os.path.join(self.root, key)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        try:
+            if record.success:
+                for name in artifacts:
+                    shutil.copy2(os.path.join(workdir, name), os.path.join(staging, name))
+            with open(os.path.join(staging, _META_FILE), "w") as f:
+                json.dump(asdict(record), f)
+            os.rename(staging, entry)
+        except OSError:
+            # Another process stored the same entry first, or the artifacts are missing
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += _directory_size(entry)
+            self._evict()
+
+    def _evict(self) -> None:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        if self._total_bytes <= self.max_bytes:
+            return
+        for entry, size, _ in sorted(self._entries(), key=lambda e: e[2]):
+            shutil.rmtree(entry, ignore_errors=True)
+            self._total_bytes -= size
+            if self._total_bytes <= self.max_bytes:
+                break
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """All entries as (path, size in bytes, last use time)."""
+        entries = []
+        for name in os.listdir(self.root):
+            entry = os.path.join(self.root, name)
+            try:
+                last_used = os.stat(os.path.join(entry, _META_FILE)).st_mtime
+            except OSError:
+                continue
+            entries.append((entry, _directory_size(entry), last_used))
+        return entries
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+DEFAULT_COMPLETION_CACHE_PATH = ".cache/completions.sqlite"
+
+# off: always query the model; record: query the model and store every completion;
+# replay: only serve stored completions; record-missing: serve stored completions, query and store the rest
+COMPLETION_CACHE_MODES = ["off", "record", "replay", "record-missing"]
+
+T = TypeVar("T")
+
+
+class CompletionCacheMiss(Exception):
+    """Raised in replay mode when no completion was recorded for a call."""
+
+
+@dataclass(frozen=True)
+class CompletionKey:
+    provider: str
+    model: str
+    prompt_hash: str
+    params_hash: str
+    sample_index: int
+
+
+def _params_hash(params: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """
+    SQLite store of raw model completions keyed on (provider, model, prompt hash,
+    sampling parameters hash, sample index).
+
+    The sample index counts the calls made with the same prompt and parameters
+    during this run, so the k-th identical call replays the k-th recorded
+    completion. A run that asks for the same samples as the recorded one is thus
+    replayed completely.
+
+    Queries run on a thread owned by the cache, like those of ResultCache, so a
+    slow disk or a long replay never blocks the event loop.
+    """
+
+    def __init__(self, path: str = DEFAULT_COMPLETION_CACHE_PATH, mode: str = "record-missing"):
+        if mode not in COMPLETION_CACHE_MODES or mode == "off":
+            raise ValueError(f"Invalid completion cache mode {mode}, expected one of {COMPLETION_CACHE_MODES[1:]}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._samples_taken: Counter = Counter()
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="completion-cache")
+        # Created here, used only on self._thread from now on
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                sample_index INTEGER NOT NULL,
+                params TEXT NOT NULL,
+                completion TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (provider, model, prompt_hash, params_hash, sample_index)
+            )
+            """
+        )
+        self._connection.commit()
+
+    @property
+    def reads(self) -> bool:
+        return self.mode in ("replay", "record-missing")
+
+    @property
+    def writes(self) -> bool:
+        return self.mode in ("record", "record-missing")
+
+    def next_key(self, provider: str, model: str, prompt: str, params: Dict[str, Any]) -> CompletionKey:
+        """Key of the next sample of this call, advancing its sample index."""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        base = (provider, model, prompt_hash, _params_hash(params))
+        sample_index = self._samples_taken[base]
+        self._samples_taken[base] += 1
+        return CompletionKey(*base, sample_index)
+
+    async def _run(self, function: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread, function, *args)
+
+    async def lookup(self, key: CompletionKey) -> Optional[str]:
+        """Return the recorded completion for key, if any."""
+        return await self._run(self._lookup, key)
+
+    def _lookup(self, key: CompletionKey) -> Optional[str]:
+        row = self._connection.execute(
+            """
+            SELECT completion FROM completions
+            WHERE provider = ? AND model = ? AND prompt_hash = ? AND params_hash = ? AND sample_index = ?
+            """,
+            (key.provider, key.model, key.prompt_hash, key.params_hash, key.sample_index),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    async def store(self, key: CompletionKey, params: Dict[str, Any], completion: str) -> None:
+        await self._run(self._store, key, params, completion)
+
+    def _store(self, key: CompletionKey, params: Dict[str, Any], completion: str) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key.provider, key.model, key.prompt_hash, key.params_hash, key.sample_index,
+             json.dumps(params, sort_keys=True, default=str), completion, time.time()),
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._thread.submit(self._connection.close).result()
+        self._thread.shutdown()
@@ -0,0 +1,272 @@
+import argparse
+import math
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.attempt_stats import load_attempts, per_problem_counts
+from src.correlation_plots import (
+    HEATMAP_LANGUAGES,
+    METHODS,
+    pairwise_pearson,
+    pairwise_spearman,
+    correlation_matrix,
+    heatmap_columns,
+    plot_heatmap,
+    resolve_languages,
+)
+
+DEFAULT_RESAMPLES = 2000
+# Resamples evaluated together in one batch of matrix products
+DEFAULT_CHUNK_SIZE = 250
+
+
+@dataclass
+class CorrelationIntervals:
+    """Point estimate of a correlation matrix with percentile bootstrap bounds."""
+
+    estimate: pd.DataFrame
+    lower: pd.DataFrame
+    upper: pd.DataFrame
+    # True where the interval excludes zero
+    significant: pd.DataFrame
+    n_resamples: int
+    # Resamples left out of each cell because the correlation was undefined (a constant variable or fewer than two models)
+    dropped: pd.DataFrame
+
+
+@dataclass
+class ProblemRates:
+    """
+    Per-problem success percentages laid out for resampling.
+
+    values has shape (problems, models, 2 * languages): compile rates of every
+    language followed by correct rates, NaN where a model did not attempt a problem.
+    """
+
+    values: np.ndarray
+    problems: List[str]
+    models: List[str]
+    languages: List[str]
+
+    @property
+    def columns(self) -> List[str]:
+        """Variable names in the order of rate_table, averages included."""
+        return (
+            [f"compiles {lang}" for lang in self.languages] + ["avg compiles"]
+            + [f"correct {lang}" for lang in self.languages] + ["avg correct"]
+        )
+
+
+def problem_rates(counts: pd.DataFrame, languages: Optional[Sequence[str]] = None, models: Optional[Sequence[str]] = None) -> ProblemRates:
+    """
+    Arrange per-problem counts as a (problems, models, variables) array of percentages.
+
+    Args:
+        counts: Output of attempt_stats.per_problem_counts
+        languages: Languages to include, defaults to all languages present
+        models: Models to include, defaults to all models present
+    """
+    frame = counts.reset_index()
+    for name in ("programming_language", "model", "problem_id"):
+        frame[name] = frame[name].astype(str)
+    languages = resolve_languages(frame["programming_language"].unique(), languages)
+    frame = frame[frame["programming_language"].isin(languages)]
+    if models:
+        frame = frame[frame["model"].isin(models)]
+
+    problem_index = pd.Index(sorted(frame["problem_id"].unique()))
+    model_index = pd.Index(sorted(frame["model"].unique()))
+    language_index = pd.Index(languages)
+
+    values = np.full((len(problem_index), len(model_index), 2 * len(languages)), np.nan)
+    p = problem_index.get_indexer(frame["problem_id"])
+    m = model_index.get_indexer(frame["model"])
+    lang = language_index.get_indexer(frame["programming_language"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Problems without a compilation verdict are missing, like models that did not run them
+        values[p, m, lang] = frame["compiled"].to_numpy() / frame["compile_attempts"].to_numpy(dtype=float) * 100
+    values[p, m, len(languages) + lang] = frame["correct"].to_numpy() / frame["attempts"].to_numpy(dtype=float) * 100
+    return ProblemRates(values, list(problem_index), list(model_index), list(languages))
+
+
+def _with_averages(rates: np.ndarray, n_languages: int) -> np.ndarray:
+    """Insert the per-model averages over languages after the compile and the correct block."""
+    compiles, correct = rates[..., :n_languages], rates[..., n_languages:]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # models without any language in a resample
+        avg_compiles = np.nanmean(compiles, axis=-1, keepdims=True)
+        avg_correct = np.nanmean(correct, axis=-1, keepdims=True)
+    return np.concatenate([compiles, avg_compiles, correct, avg_correct], axis=-1)
+
+
+def _resample_correlations(
+    values: np.ndarray,
+    n_languages: int,
+    n_resamples: int,
+    method: str,
+    resample_models: bool,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """
+    Correlation matrices of n_resamples bootstrap samples, shape (n_resamples, variables, variables).
+
+    A resample draws problems with replacement as multiplicity weights, recomputes
+    every model's rates from the weighted problems in one matrix product, then
+    optionally draws models with replacement.
+    """
+    rng = np.random.default_rng(seed)
+    n_problems, n_models, n_variables = values.shape
+    present = ~np.isnan(values)
+    flat_values = np.where(present, values, 0.0).reshape(n_problems, -1)
+    flat_present = present.reshape(n_problems, -1).astype(float)
+
+    weights = rng.multinomial(n_problems, np.full(n_problems, 1 / n_problems), size=n_resamples).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = (weights @ flat_values) / (weights @ flat_present)
+    rates = rates.reshape(n_resamples, n_models, n_variables)
+
+    if resample_models:
+        picked = rng.integers(0, n_models, size=(n_resamples, n_models))
+        rates = np.take_along_axis(rates, picked[:, :, None], axis=1)
+
+    rates = _with_averages(rates, n_languages)
+    # Resamples where a variable is constant (e.g. one model drawn every time) give NaN for its pairs
+    return pairwise_spearman(rates) if method == "spearman" else pairwise_pearson(rates)
+
+
+def bootstrap_correlations(
+    rates: ProblemRates,
+    method: str = "pearson",
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = 0.95,
+    resample_models: bool = True,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    seed: Optional[int] = None,
+) -> CorrelationIntervals:
+    """
+    Percentile bootstrap confidence intervals of the correlation matrix.
+
+    Problems (and by default models) are resampled with replacement. Resamples are
+    evaluated in vectorized chunks, spread over a process pool when workers > 1.
+    Resamples where a correlation is undefined, such as a variable that is
+    constant over the drawn models, are left out of that cell's quantiles and
+    counted in dropped.
+
+    Args:
+        rates: Output of problem_rates
+        method: "pearson" or "spearman"
+        n_resamples: Number of bootstrap resamples
+        confidence: Coverage of the intervals
+        resample_models: Also resample models, not only problems
+        workers: Worker processes, defaults to the number of CPUs; 1 runs in this process
+        chunk_size: Resamples per chunk
+        seed: Seed for reproducible intervals
+
+    Returns:
+        CorrelationIntervals with the point estimate, bounds and significance mask
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method {method}, expected one of {METHODS}")
+    n_languages = len(rates.languages)
+    columns = rates.columns
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        point_rates = _with_averages(np.nanmean(rates.values, axis=0), n_languages)
+    estimate = correlation_matrix(pd.DataFrame(point_rates, index=rates.models, columns=columns), method)
+
+    n_chunks = math.ceil(n_resamples / chunk_size)
+    sizes = [chunk_size] * (n_chunks - 1) + [n_resamples - chunk_size * (n_chunks - 1)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    tasks: List[Tuple] = [(rates.values, n_languages, size, method, resample_models, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or n_chunks == 1:
+        chunks = [_resample_correlations(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, n_chunks)) as pool:
+            chunks = list(pool.map(_resample_correlations, *zip(*tasks)))
+    resampled = np.concatenate(chunks, axis=0)
+
+    alpha = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # pairs without enough models in every resample
+        lower, upper = np.nanquantile(resampled, [alpha, 1 - alpha], axis=0)
+
+    def frame(matrix: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(matrix, index=columns, columns=columns)
+
+    significant = (lower > 0) | (upper < 0)
+    dropped = np.isnan(resampled).sum(axis=0)
+    return CorrelationIntervals(estimate, frame(lower), frame(upper), frame(significant), n_resamples, frame(dropped))
+
+
+def subset(intervals: CorrelationIntervals, names: Sequence[str]) -> CorrelationIntervals:
+    """The intervals of some variables only, e.g. the heatmap_columns."""
+    names = list(names)
+
+    def pick(matrix: pd.DataFrame) -> pd.DataFrame:
+        return matrix.loc[names, names]
+
+    return CorrelationIntervals(
+        pick(intervals.estimate), pick(intervals.lower), pick(intervals.upper), pick(intervals.significant), intervals.n_resamples,
+        pick(intervals.dropped),
+    )
+
+
+def markdown_interval_table(intervals: CorrelationIntervals) -> str:
+    """Correlation matrix as a markdown table with the interval in every cell, non-significant cells in italics."""
+    columns = list(intervals.estimate.columns)
+    lines = [
+        "| | " + " | ".join(columns) + " |",
+        "|---|" + "--:|" * len(columns),
+    ]
+    for name in intervals.estimate.index:
+        cells = []
+        for column in columns:
+            cell = f"{intervals.estimate.at[name, column]:.3f} [{intervals.lower.at[name, column]:.2f}, {intervals.upper.at[name, column]:.2f}]"
+            cells.append(cell if intervals.significant.at[name, column] else f"*{cell}*")
+        lines.append(f"| {name} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bootstrap confidence intervals of the compile/correct correlation matrix")
+    parser.add_argument("filename", type=str, help="Results JSONL file or columnar store directory")
+    parser.add_argument("--method", type=str, default="pearson", choices=METHODS, help="Correlation coefficient")
+    parser.add_argument("--languages", type=str, nargs="+", default=None, help="Languages to include, defaults to all in the results")
+    parser.add_argument("--models", type=str, nargs="+", default=None, help="Models to include, defaults to all in the results")
+    parser.add_argument("--resamples", type=int, default=DEFAULT_RESAMPLES, help="Number of bootstrap resamples")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Coverage of the confidence intervals")
+    parser.add_argument("--problems_only", action="store_true", help="Resample problems only, keep the set of models fixed")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to the number of CPUs")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed of the bootstrap")
+    parser.add_argument("--plot", action="store_true", help="Draw the heatmap with non-significant cells left blank")
+    parser.add_argument("--plot_languages", type=str, nargs="+", default=HEATMAP_LANGUAGES, help="Languages shown in the heatmap")
+    parser.add_argument("--plot_file", type=str, default=None, help="Save the heatmap to this file instead of showing it")
+    args = parser.parse_args()
+
+    rates = problem_rates(per_problem_counts(load_attempts(args.filename)), args.languages, args.models)
+    intervals = bootstrap_correlations(
+        rates,
+        method=args.method,
+        n_resamples=args.resamples,
+        confidence=args.confidence,
+        resample_models=not args.problems_only,
+        workers=args.workers,
+        seed=args.seed,
+    )
+    print(markdown_interval_table(intervals))
+    if intervals.dropped.to_numpy().any():
+        print(f"\nResamples without a defined correlation, out of {intervals.n_resamples}, left out of the intervals:")
+        print(intervals.dropped.to_string())
+    if args.plot:
+        shown = subset(intervals, heatmap_columns(intervals.estimate, args.plot_languages))
+        plot_heatmap(shown.estimate, output_file=args.plot_file, significant=shown.significant)
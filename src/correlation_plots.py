@@ -1,220 +1,17 @@
+import argparse
+from typing import Dict, List, Optional, Sequence
+
 import numpy as np
-from scipy.stats import spearmanr
-from collections import defaultdict
-import seaborn as sns
-import matplotlib.pyplot as plt
 import pandas as pd
 
-compile_success_rust = {
-    "anthropic/claude-3-5-haiku": 76.2,
-    "anthropic/claude-3.5-sonnet": 79.0,
-    "deepseek/deepseek-chat": 83.9,
-    "google/gemini-flash-1.5": 55.4,
-    "meta-llama/llama-3.1-70b-instruct": 34.3,
-    "microsoft/phi-4": 17.1,
-    "mistralai/codestral-2501": 68.6,
-    "mistralai/codestral-mamba": 42.9,
-    "openai/gpt-4o-2024-11-20": 73.8,
-    "openai/gpt-4o-mini": 55.4,
-    "openai/o1-mini-2024-09-12": 71.2,
-    "qwen/qvq-72b-preview": 21.3,
-    "qwen/qwen-2.5-coder-32b-instruct": 56.7,
-    "qwen/qwq-32b-preview": 37.7,
-    "x-ai/grok-2-1212": 68.6,
-}
-
-problem_success_rust = {
-    "anthropic/claude-3-5-haiku": 17.4,
-    "anthropic/claude-3.5-sonnet": 33.8,
-    "deepseek/deepseek-chat": 32.6,
-    "google/gemini-flash-1.5": 15.3,
-    "meta-llama/llama-3.1-70b-instruct": 10.0,
-    "microsoft/phi-4": 1.4,
-    "mistralai/codestral-2501": 8.6,
-    "mistralai/codestral-mamba": 2.9,
-    "openai/gpt-4o-2024-11-20": 33.9,
-    "openai/gpt-4o-mini": 14.2,
-    "openai/o1-mini-2024-09-12": 34.0,
-    "qwen/qvq-72b-preview": 3.3,
-    "qwen/qwen-2.5-coder-32b-instruct": 16.0,
-    "qwen/qwq-32b-preview": 11.0,
-    "x-ai/grok-2-1212": 24.3,
-}
-
-compile_success_python = {
-    "anthropic/claude-3-5-haiku": 85.4,
-    "anthropic/claude-3.5-sonnet": 91.7,
-    "deepseek/deepseek-chat": 93.6,
-    "google/gemini-flash-1.5": 91.3,
-    "meta-llama/llama-3.1-70b-instruct": 98.6,
-    "microsoft/phi-4": 100.0,
-    "mistralai/codestral-2501": 100.0,
-    "mistralai/codestral-mamba": 100.0,
-    "openai/gpt-4o-2024-11-20": 98.9,
-    "openai/gpt-4o-mini": 99.6,
-    "openai/o1-mini-2024-09-12": 98.0,
-    "qwen/qvq-72b-preview": 100.0,
-    "qwen/qwen-2.5-coder-32b-instruct": 95.6,
-    "qwen/qwq-32b-preview": 93.2,
-    "x-ai/grok-2-1212": 100.0,
-}
-
-problem_success_python = {
-    "anthropic/claude-3-5-haiku": 31.9,
-    "anthropic/claude-3.5-sonnet": 54.2,
-    "deepseek/deepseek-chat": 41.0,
-    "google/gemini-flash-1.5": 23.4,
-    "meta-llama/llama-3.1-70b-instruct": 17.1,
-    "microsoft/phi-4": 22.9,
-    "mistralai/codestral-2501": 25.7,
-    "mistralai/codestral-mamba": 5.7,
-    "openai/gpt-4o-2024-11-20": 17.2,
-    "openai/gpt-4o-mini": 19.9,
-    "openai/o1-mini-2024-09-12": 72.7,
-    "qwen/qvq-72b-preview": 24.2,
-    "qwen/qwen-2.5-coder-32b-instruct": 30.8,
-    "qwen/qwq-32b-preview": 32.8,
-    "x-ai/grok-2-1212": 35.3,
-}
-
-
-compile_success_ocaml = {
-    "anthropic/claude-3-5-haiku": 45.7,
-    "anthropic/claude-3.5-sonnet": 58.6,
-    "deepseek/deepseek-chat": 52.1,
-    "google/gemini-flash-1.5": 28.6,
-    "meta-llama/llama-3.1-70b-instruct": 21.4,
-    "microsoft/phi-4": 8.6,
-    "mistralai/codestral-2501": 32.1,
-    "mistralai/codestral-mamba": 14.3,
-    "openai/gpt-4o-2024-11-20": 52.9,
-    "openai/gpt-4o-mini": 36.4,
-    "openai/o1-mini-2024-09-12": 55.7,
-    "qwen/qvq-72b-preview": 23.3,
-    "qwen/qwen-2.5-coder-32b-instruct": 27.1,
-    "qwen/qwq-32b-preview": 16.1,
-}
-
-problem_success_ocaml = {
-    "anthropic/claude-3-5-haiku": 11.4,
-    "anthropic/claude-3.5-sonnet": 21.4,
-    "deepseek/deepseek-chat": 12.9,
-    "google/gemini-flash-1.5": 2.9,
-    "meta-llama/llama-3.1-70b-instruct": 5.7,
-    "microsoft/phi-4": 0.0,
-    "mistralai/codestral-2501": 4.3,
-    "mistralai/codestral-mamba": 0.0,
-    "openai/gpt-4o-2024-11-20": 20.0,
-    "openai/gpt-4o-mini": 7.9,
-    "openai/o1-mini-2024-09-12": 37.1,
-    "qwen/qvq-72b-preview": 0.0,
-    "qwen/qwen-2.5-coder-32b-instruct": 6.4,
-    "qwen/qwq-32b-preview": 8.1,
-}
-
-compile_success_haskell = {
-    "anthropic/claude-3-5-haiku": 35.2,
-    "anthropic/claude-3.5-sonnet": 50.3,
-    "deepseek/deepseek-chat": 48.3,
-    "google/gemini-flash-1.5": 16.3,
-    "meta-llama/llama-3.1-70b-instruct": 14.3,
-    "microsoft/phi-4": 11.4,
-    "mistralai/codestral-2501": 33.6,
-    "mistralai/codestral-mamba": 7.1,
-    "openai/gpt-4o-2024-11-20": 54.3,
-    "openai/gpt-4o-mini": 30.5,
-    "openai/o1-mini-2024-09-12": 53.8,
-    "qwen/qvq-72b-preview": 0.0,
-    "qwen/qwen-2.5-coder-32b-instruct": 23.0,
-    "qwen/qwq-32b-preview": 14.6,
-    "x-ai/grok-2-1212": 32.4,
-}
-
-problem_success_haskell = {
-    "anthropic/claude-3-5-haiku": 9.3,
-    "anthropic/claude-3.5-sonnet": 22.3,
-    "deepseek/deepseek-chat": 13.0,
-    "google/gemini-flash-1.5": 6.9,
-    "meta-llama/llama-3.1-70b-instruct": 4.3,
-    "microsoft/phi-4": 5.7,
-    "mistralai/codestral-2501": 8.6,
-    "mistralai/codestral-mamba": 2.9,
-    "openai/gpt-4o-2024-11-20": 24.5,
-    "openai/gpt-4o-mini": 11.0,
-    "openai/o1-mini-2024-09-12": 32.6,
-    "qwen/qvq-72b-preview": 0.0,
-    "qwen/qwen-2.5-coder-32b-instruct": 7.5,
-    "qwen/qwq-32b-preview": 6.6,
-    "x-ai/grok-2-1212": 10.3,
-}
-
-compile_success_cpp = {
-    "anthropic/claude-3-5-haiku": 81.7,
-    "anthropic/claude-3.5-sonnet": 80.7,
-    "deepseek/deepseek-chat": 83.1,
-    "google/gemini-flash-1.5": 74.6,
-    "meta-llama/llama-3.1-70b-instruct": 64.3,
-    "microsoft/phi-4": 47.1,
-    "mistralai/codestral-2501": 79.3,
-    "mistralai/codestral-mamba": 60.0,
-    "openai/gpt-4o-2024-11-20": 82.9,
-    "openai/gpt-4o-mini": 63.2,
-    "openai/o1-mini-2024-09-12": 95.7,
-    "qwen/qwen-2.5-coder-32b-instruct": 77.1,
-    "qwen/qwq-32b-preview": 62.8,
-}
-
-problem_success_cpp = {
-    "anthropic/claude-3-5-haiku": 24.0,
-    "anthropic/claude-3.5-sonnet": 53.1,
-    "deepseek/deepseek-chat": 30.7,
-    "google/gemini-flash-1.5": 25.5,
-    "meta-llama/llama-3.1-70b-instruct": 14.3,
-    "microsoft/phi-4": 14.3,
-    "mistralai/codestral-2501": 21.4,
-    "mistralai/codestral-mamba": 4.3,
-    "openai/gpt-4o-2024-11-20": 36.2,
-    "openai/gpt-4o-mini": 15.4,
-    "openai/o1-mini-2024-09-12": 65.0,
-    "qwen/qwen-2.5-coder-32b-instruct": 29.3,
-    "qwen/qwq-32b-preview": 27.3,
-}
-
-compile_success_go = {
-    "anthropic/claude-3-5-haiku": 95.7,
-    "anthropic/claude-3.5-sonnet": 90.0,
-    "deepseek/deepseek-chat": 93.6,
-    "google/gemini-flash-1.5": 94.3,
-    "meta-llama/llama-3.1-70b-instruct": 98.6,
-    "microsoft/phi-4": 100.0,
-    "mistralai/codestral-2501": 97.1,
-    "mistralai/codestral-mamba": 95.7,
-    "openai/gpt-4o-2024-11-20": 95.0,
-    "openai/gpt-4o-mini": 97.1,
-    "openai/o1-mini-2024-09-12": 98.6,
-    "qwen/qvq-72b-preview": 100.0,
-    "qwen/qwen-2.5-coder-32b-instruct": 95.0,
-    "qwen/qwq-32b-preview": 98.4,
-    "x-ai/grok-2-1212": 97.1,
-}
-
-problem_success_go = {
-    "anthropic/claude-3-5-haiku": 27.1,
-    "anthropic/claude-3.5-sonnet": 42.9,
-    "deepseek/deepseek-chat": 32.1,
-    "google/gemini-flash-1.5": 15.7,
-    "meta-llama/llama-3.1-70b-instruct": 5.7,
-    "microsoft/phi-4": 11.4,
-    "mistralai/codestral-2501": 24.3,
-    "mistralai/codestral-mamba": 5.7,
-    "openai/gpt-4o-2024-11-20": 37.9,
-    "openai/gpt-4o-mini": 20.0,
-    "openai/o1-mini-2024-09-12": 65.7,
-    "qwen/qvq-72b-preview": 7.9,
-    "qwen/qwen-2.5-coder-32b-instruct": 23.6,
-    "qwen/qwq-32b-preview": 14.3,
-    "x-ai/grok-2-1212": 31.4,
-}
+from src.attempt_stats import load_attempts, model_rates, per_problem_counts
+
+# Column order of the README correlation table; languages not listed here follow in sorted order
+LANGUAGE_ORDER = ["cpp", "haskell", "ocaml", "python", "rust", "go"]
+# Languages where most attempts compile, left out of the heatmap
+HEATMAP_LANGUAGES = ["rust", "haskell", "ocaml", "cpp"]
+
+METHODS = ["pearson", "spearman"]
 
 
 def compute_correlation(dict1, dict2):
@@ -276,144 +73,286 @@ def compute_rank_correlation(dict1, dict2):
     array2 = np.array(values2)
 
     # Compute Spearman rank correlation
+    from scipy.stats import spearmanr  # scipy.stats is slow to import and only needed here
+
     correlation, p_value = spearmanr(array1, array2)
 
     return correlation, common_keys
 
 
+# Method of correlation_matrix computing what each pairwise function computes
+_CORRELATION_METHODS = {compute_correlation: "pearson", compute_rank_correlation: "spearman"}
+
+
+def resolve_languages(present: Sequence[str], languages: Optional[Sequence[str]] = None) -> List[str]:
+    """The requested languages, or all present ones in LANGUAGE_ORDER order followed by the rest sorted."""
+    if languages is not None:
+        return list(languages)
+    ordered = [lang for lang in LANGUAGE_ORDER if lang in present]
+    return ordered + sorted(lang for lang in present if lang not in LANGUAGE_ORDER)
+
+
+def rate_table(counts: pd.DataFrame, languages: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Compile and correct rates in percent with one row per model and one column per variable.
+
+    Columns are "compiles <lang>" for each language, "avg compiles", "correct <lang>"
+    and "avg correct". A model that was not run in a language gets NaN there; the
+    averages are over the languages the model has.
+
+    Args:
+        counts: Output of attempt_stats.per_problem_counts
+        languages: Languages to include, defaults to all languages in LANGUAGE_ORDER order
+    """
+    rates = model_rates(counts)
+    languages = resolve_languages(rates.index.get_level_values("programming_language").unique(), languages)
+
+    columns = {}
+    for metric, label in (("compile_pct", "compiles"), ("correct_pct", "correct")):
+        by_language = rates[metric].unstack("programming_language").reindex(columns=languages)
+        by_language.columns = [f"{label} {lang}" for lang in languages]
+        by_language[f"avg {label}"] = by_language.mean(axis=1, skipna=True)
+        columns[label] = by_language
+    table = pd.concat([columns["compiles"], columns["correct"]], axis=1)
+    table.index = table.index.astype(str)
+    return table
+
+
+# Variances below this fraction of the sum of squares are rounding noise of a constant variable
+_RELATIVE_VARIANCE_EPSILON = 1e-12
+
+
+def _pairwise_complete(values: np.ndarray) -> np.ndarray:
+    """
+    pairs[..., j, r, i] is values[..., r, i] where column j is present in row r
+    as well, NaN elsewhere: column i restricted to the rows it shares with j.
+    """
+    present = ~np.isnan(values)
+    both = present[..., None, :, :] & np.moveaxis(present, -1, -2)[..., :, :, None]
+    return np.where(both, values[..., None, :, :], np.nan)
+
+
+def _pearson_of_pairs(pairs: np.ndarray) -> np.ndarray:
+    """
+    Correlation of every column pair laid out by _pairwise_complete, centering
+    each pair's values on their own mean before taking products (two-pass).
+    Pairs with fewer than two rows or a (near) constant side are NaN.
+    """
+    # other[..., j, r, i] = pairs[..., i, r, j]: column j on the rows it shares with i
+    other = pairs.swapaxes(-3, -1)
+    present = ~np.isnan(pairs)
+    n = present.sum(axis=-2)
+    filled = np.where(present, pairs, 0.0)
+    other_filled = np.where(present, other, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centered = np.where(present, filled - filled.sum(axis=-2, keepdims=True) / n[..., None, :], 0.0)
+        other_centered = centered.swapaxes(-3, -1)
+        covariance = (centered * other_centered).sum(axis=-2)
+        variance = (centered ** 2).sum(axis=-2)
+        other_variance = variance.swapaxes(-1, -2)
+        correlation = covariance / np.sqrt(variance * other_variance)
+    scale = (filled ** 2).sum(axis=-2)
+    other_scale = (other_filled ** 2).sum(axis=-2)
+    constant = (variance <= _RELATIVE_VARIANCE_EPSILON * scale) | (other_variance <= _RELATIVE_VARIANCE_EPSILON * other_scale)
+    correlation[(n < 2) | constant] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def pairwise_pearson(values: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation of all column pairs of values, using the rows both columns
+    have (NaN marks a missing value), like compute_correlation for every pair.
+
+    values has shape (..., rows, columns); leading dimensions are batched. Pairs
+    where either column is constant on the shared rows are NaN.
+    """
+    return _pearson_of_pairs(_pairwise_complete(values))
+
+
+def pairwise_spearman(values: np.ndarray) -> np.ndarray:
+    """
+    Spearman correlation of all column pairs of values, ranking each column
+    again within the rows it shares with the other column, like
+    compute_rank_correlation for every pair.
+
+    values has shape (..., rows, columns); leading dimensions are batched.
+    """
+    return _pearson_of_pairs(average_ranks(_pairwise_complete(values), axis=-2))
+
+
+def average_ranks(values: np.ndarray, axis: int = -2) -> np.ndarray:
+    """Ranks along axis starting at 1, ties get their average rank and NaN stays NaN."""
+    values = np.moveaxis(values, axis, -1)
+    missing = np.isnan(values)
+    sortable = np.where(missing, np.inf, values)
+    order = np.argsort(sortable, axis=-1, kind="stable")
+    sorted_values = np.take_along_axis(sortable, order, axis=-1)
+
+    size = values.shape[-1]
+    positions = np.broadcast_to(np.arange(size), values.shape)
+    group_start = np.ones(values.shape, dtype=bool)
+    group_start[..., 1:] = sorted_values[..., 1:] != sorted_values[..., :-1]
+    group_end = np.ones(values.shape, dtype=bool)
+    group_end[..., :-1] = group_start[..., 1:]
+    # First and last position of the tie group of every sorted element
+    starts = np.maximum.accumulate(np.where(group_start, positions, 0), axis=-1)
+    ends = np.flip(np.minimum.accumulate(np.flip(np.where(group_end, positions, size - 1), axis=-1), axis=-1), axis=-1)
+
+    ranks = np.empty(values.shape, dtype=float)
+    np.put_along_axis(ranks, order, (starts + ends) / 2 + 1, axis=-1)
+    ranks[missing] = np.nan
+    return np.moveaxis(ranks, -1, axis)
+
+
+def correlation_matrix(table: pd.DataFrame, method: str = "pearson") -> pd.DataFrame:
+    """
+    Correlation between all columns of a rate table in one vectorized computation.
+
+    Pairs use the models both variables have, like compute_correlation and
+    compute_rank_correlation; for spearman each variable is ranked within those
+    models.
+
+    Args:
+        table: Output of rate_table
+        method: "pearson" or "spearman"
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method {method}, expected one of {METHODS}")
+    values = table.to_numpy(dtype=float)
+    correlation = pairwise_spearman(values) if method == "spearman" else pairwise_pearson(values)
+    return pd.DataFrame(correlation, index=table.columns, columns=table.columns)
+
+
 def print_correlation_table(variables, correlation_func):
     """
     Print a correlation table for a list of variables with dynamic column widths and return a correlation matrix.
 
+    The matrix is computed by correlation_matrix in one vectorized pass, with the
+    method that correlation_func implements.
+
     Args:
         variables: Dictionary of variable names and their values
-        correlation_func: Function that takes two arrays and returns correlation
+        correlation_func: compute_correlation or compute_rank_correlation
 
     Returns:
         pd.DataFrame: Correlation matrix
     """
+    method = _CORRELATION_METHODS.get(correlation_func)
+    if method is None:
+        raise ValueError(f"Unsupported correlation function {correlation_func}, expected compute_correlation or compute_rank_correlation")
+    # One column per variable, one row per key; keys a variable lacks are NaN and left out of its pairs
+    table = pd.DataFrame({name: pd.Series(values, dtype=float) for name, values in variables.items()})
+    corr_matrix = correlation_matrix(table, method)
+    print_correlation_matrix(corr_matrix)
+    return corr_matrix
+
+
+def print_correlation_matrix(corr_matrix: pd.DataFrame) -> None:
+    """
+    Print a correlation matrix with dynamic column widths.
+
+    Args:
+        corr_matrix: Output of correlation_matrix
+    """
     # Calculate maximum width needed for variable names
-    max_name_width = max(len(name) for name in variables.keys())
+    max_name_width = max(len(name) for name in corr_matrix.columns)
     # Add padding for readability
     col_width = max(max_name_width + 2, 10)
 
-    # Print header row with dynamic spacing
-    header = " " * col_width  # Space for row labels
-    for name in variables.keys():
-        header += f"{name:>{col_width}}"
+    header = " " * col_width + "".join(f"{name:>{col_width}}" for name in corr_matrix.columns)
     print(header)
+    print("-" * (col_width + col_width * len(corr_matrix.columns)))
+    for name, row in corr_matrix.iterrows():
+        print(f"{name:<{col_width}}" + "".join(f"{value:>{col_width}.3f}" for value in row))
+
+
+def markdown_table(corr_matrix: pd.DataFrame) -> str:
+    """Correlation matrix as the markdown table used in the README."""
+    lines = [
+        "| | " + " | ".join(corr_matrix.columns) + " |",
+        "|---|" + "--:|" * len(corr_matrix.columns),
+    ]
+    for name, row in corr_matrix.iterrows():
+        lines.append(f"| {name} | " + " | ".join(f"{value:.3f}" for value in row) + " |")
+    return "\n".join(lines)
+
+
+def heatmap_columns(table: pd.DataFrame, languages: Sequence[str] = HEATMAP_LANGUAGES) -> List[str]:
+    """Compile and correct columns of the given languages, in that order."""
+    names = [f"compiles {lang}" for lang in languages] + [f"correct {lang}" for lang in languages]
+    return [name for name in names if name in table.columns]
+
+
+def plot_heatmap(
+    corr_matrix: pd.DataFrame,
+    title: str = "Correlation Compilation and Problem Success",
+    output_file: Optional[str] = None,
+    significant: Optional[pd.DataFrame] = None,
+) -> None:
+    """
+    Draw the correlation heatmap, shown interactively unless output_file is given.
 
-    # Print separator line with dynamic length
-    print("-" * (col_width + col_width * len(variables)))
-
-    # Initialize correlation matrix
-    corr_matrix = pd.DataFrame(index=variables.keys(), columns=variables.keys())
-
-    # Print each row with dynamic column widths
-    for name1, values1 in variables.items():
-        row = f"{name1:<{col_width}}"  # Left-align variable name with dynamic width
-        for name2, values2 in variables.items():
-            correlation, _ = correlation_func(values1, values2)
-            row += f"{correlation:>{col_width}.3f}"  # Right-align with dynamic width
-            corr_matrix.loc[name1, name2] = correlation
-        print(row)
-
-    return corr_matrix.astype(float)
-
-
-comps = {
-    "comp_cpp": compile_success_cpp,
-    "comp_haskell": compile_success_haskell,
-    "comp_ocaml": compile_success_ocaml,
-    "comp_python": compile_success_python,
-    "comp_rust": compile_success_rust,
-    "comp_go": compile_success_go,
-}
-
-probs = {
-    "prob_cpp": problem_success_cpp,
-    "prob_haskell": problem_success_haskell,
-    "prob_ocaml": problem_success_ocaml,
-    "prob_python": problem_success_python,
-    "prob_rust": problem_success_rust,
-    "prob_go": problem_success_go,
-}
-
-
-def compute_avg(comps):
-    avg_comp = defaultdict(lambda: [0, 0])
-    for comp in comps:
-        for key in comps[comp]:
-            avg_comp[key][0] += comps[comp][key]
-            avg_comp[key][1] += 1
-
-    for key in avg_comp:
-        avg_comp[key] = avg_comp[key][0] / avg_comp[key][1]
-
-    return avg_comp
-
-
-avg_comp = compute_avg(comps)
-avg_prob = compute_avg(probs)
-
-variables = {
-    "comp_cpp": compile_success_cpp,
-    "comp_haskell": compile_success_haskell,
-    "comp_ocaml": compile_success_ocaml,
-    "comp_python": compile_success_python,
-    "comp_rust": compile_success_rust,
-    "comp_go": compile_success_go,
-    "avg_comp": avg_comp,
-    "prob_cpp": problem_success_cpp,
-    "prob_haskell": problem_success_haskell,
-    "prob_ocaml": problem_success_ocaml,
-    "prob_python": problem_success_python,
-    "prob_rust": problem_success_rust,
-    "prob_go": problem_success_go,
-    "avg_prob": avg_prob,
-}
-
-
-print_correlation_table(comps, compute_correlation)
-print("----")
-print_correlation_table(probs, compute_correlation)
-
-print_correlation_table(variables, compute_correlation)
-
-print("----")
-print("----")
-print("----")
-print("----")
-corr_matrix = print_correlation_table(variables, compute_rank_correlation)
-rhcc = {
-    "compiles rust": compile_success_rust,
-    "compiles haskell": compile_success_haskell,
-    "compiles ocaml": compile_success_ocaml,
-    "compiles cpp": compile_success_cpp,
-    "correct rust": problem_success_rust,
-    "correct haskell": problem_success_haskell,
-    "correct ocaml": problem_success_ocaml,
-    "correct cpp": problem_success_cpp,
-}
-corr_matrix = print_correlation_table(rhcc, compute_correlation)
-# Find the min corr
-vmin = corr_matrix.min().min()
-vmax = 1
-
-
-# Create the plot
-plt.figure(figsize=(10, 8))
-sns.heatmap(
-    corr_matrix,
-    annot=True,  # Show the correlation values
-    cmap="RdBu",  # Red-Blue diverging colormap
-    vmin=vmin,  # Fix the range from -1 to 1
-    vmax=vmax,
-    center=(vmin + vmax) / 2,
-    square=True,  # Make the plot square-shaped
-    fmt=".2f",
-)  # Round the numbers to 2 decimal places
-
-plt.title("Correlation Compilation and Problem Success")
-plt.tight_layout()
-plt.show()
+    Args:
+        significant: Optional boolean matrix, cells that are False are left blank
+    """
+    # Plotting libraries are slow to import and only needed here
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    vmin = corr_matrix.min().min()
+    vmax = 1
+
+    plt.figure(figsize=(10, 8))
+    sns.heatmap(
+        corr_matrix,
+        annot=True,  # Show the correlation values
+        cmap="RdBu",  # Red-Blue diverging colormap
+        vmin=vmin,
+        vmax=vmax,
+        center=(vmin + vmax) / 2,
+        square=True,  # Make the plot square-shaped
+        fmt=".2f",
+        mask=None if significant is None else ~significant.reindex_like(corr_matrix).to_numpy(dtype=bool),
+    )  # Round the numbers to 2 decimal places
+
+    plt.title(title)
+    plt.tight_layout()
+    if output_file:
+        plt.savefig(output_file)
+    else:
+        plt.show()
+
+
+def load_rate_table(path: str, languages: Optional[Sequence[str]] = None, models: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """rate_table of a results JSONL file or columnar store, optionally restricted to some models."""
+    table = rate_table(per_problem_counts(load_attempts(path)), languages)
+    if models:
+        table = table.loc[[model for model in models if model in table.index]]
+    return table
+
+
+def as_dicts(table: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """Rate table as {variable: {model: rate}}, the input format of compute_correlation."""
+    return {name: column.dropna().to_dict() for name, column in table.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Correlations between compile and correct rates of models across languages")
+    parser.add_argument("filename", type=str, help="Results JSONL file or columnar store directory")
+    parser.add_argument("--method", type=str, default="pearson", choices=METHODS, help="Correlation coefficient")
+    parser.add_argument("--languages", type=str, nargs="+", default=None, help="Languages to include, defaults to all in the results")
+    parser.add_argument("--models", type=str, nargs="+", default=None, help="Models to include, defaults to all in the results")
+    parser.add_argument("--markdown", action="store_true", help="Print the matrix as the README markdown table")
+    parser.add_argument("--plot", action="store_true", help="Draw a heatmap of the compile/correct correlations")
+    parser.add_argument("--plot_languages", type=str, nargs="+", default=HEATMAP_LANGUAGES, help="Languages shown in the heatmap")
+    parser.add_argument("--plot_file", type=str, default=None, help="Save the heatmap to this file instead of showing it")
+    args = parser.parse_args()
+
+    table = load_rate_table(args.filename, args.languages, args.models)
+    corr_matrix = correlation_matrix(table, args.method)
+    if args.markdown:
+        print(markdown_table(corr_matrix))
+    else:
+        print_correlation_matrix(corr_matrix)
+    if args.plot:
+        plot_heatmap(correlation_matrix(table[heatmap_columns(table, args.plot_languages)], args.method), output_file=args.plot_file)
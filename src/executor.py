@@ -0,0 +1,159 @@
+import asyncio
+from typing import Optional
+
+from src import jdoodle_executor, local_executor
+from src.jdoodle_executor import ExecuteCodeResponse, JDoodleClient
+from src.result_cache import ResultCache
+from src.rate_limiter import executor_limit_name, pace
+
+EXECUTOR_BACKENDS = ["jdoodle", "local"]
+
+# Backend used by execute_code, selected once per run
+_BACKEND = "jdoodle"
+
+# Shared JDoodle client opened by open_executor, None falls back to one-off sessions
+_JDOODLE_CLIENT: Optional[JDoodleClient] = None
+
+# Maximum number of executions in flight across the whole run, None for no limit
+_EXECUTION_CONCURRENCY: Optional[int] = None
+_EXECUTION_SLOTS: Optional[asyncio.Semaphore] = None
+
+# Memo of previous executions, None disables it
+_RESULT_CACHE: Optional[ResultCache] = None
+
+
+def set_executor_backend(backend: str) -> None:
+    """
+    Select the backend used by execute_code.
+
+    Args:
+        backend: "jdoodle" (remote API) or "local" (sandboxed toolchains on this host)
+
+    Raises:
+        ValueError: If the backend is unknown or not usable
+    """
+    if backend not in EXECUTOR_BACKENDS:
+        raise ValueError(f"Unsupported executor backend: {backend}")
+    if backend == "jdoodle":
+        jdoodle_executor.check_credentials()
+
+    global _BACKEND
+    _BACKEND = backend
+
+
+def get_executor_backend() -> str:
+    return _BACKEND
+
+
+async def open_executor(
+    pool_size: int = jdoodle_executor.DEFAULT_POOL_SIZE,
+    per_host_limit: int = 0,
+    keepalive_timeout: float = jdoodle_executor.DEFAULT_KEEPALIVE_TIMEOUT,
+) -> None:
+    """
+    Open the long-lived resources of the selected backend, once per run.
+
+    Args:
+        pool_size: Maximum number of simultaneous connections to the JDoodle API
+        per_host_limit: Maximum connections per host, 0 for no per-host limit
+        keepalive_timeout: Seconds an idle connection is kept open for reuse
+
+    Raises:
+        SandboxUnavailableError: For the local backend, if it cannot isolate the network and host networking was not allowed
+    """
+    global _JDOODLE_CLIENT
+    if _BACKEND == "local":
+        local_executor.check_sandbox()
+    if _BACKEND == "jdoodle" and _JDOODLE_CLIENT is None:
+        _JDOODLE_CLIENT = JDoodleClient(pool_size, per_host_limit, keepalive_timeout)
+        await _JDOODLE_CLIENT.start()
+
+
+async def close_executor() -> None:
+    """Close the resources opened by open_executor."""
+    global _JDOODLE_CLIENT
+    if _JDOODLE_CLIENT is not None:
+        await _JDOODLE_CLIENT.close()
+        _JDOODLE_CLIENT = None
+
+
+def configure_execution_concurrency(max_concurrent: Optional[int]) -> None:
+    """
+    Limit how many programs are compiled/run at once, independently of how many
+    model calls are in flight. Applies to pipeline stages and agents alike.
+    """
+    global _EXECUTION_CONCURRENCY, _EXECUTION_SLOTS
+    _EXECUTION_CONCURRENCY = max_concurrent
+    _EXECUTION_SLOTS = None
+
+
+def _execution_slots() -> Optional[asyncio.Semaphore]:
+    # Created on first use so that it belongs to the running event loop
+    global _EXECUTION_SLOTS
+    if _EXECUTION_SLOTS is None and _EXECUTION_CONCURRENCY is not None:
+        _EXECUTION_SLOTS = asyncio.Semaphore(_EXECUTION_CONCURRENCY)
+    return _EXECUTION_SLOTS
+
+
+def configure_result_cache(cache: Optional[ResultCache]) -> None:
+    """Set the execution result cache consulted by execute_code, or None to disable it."""
+    global _RESULT_CACHE
+    _RESULT_CACHE = cache
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    return _RESULT_CACHE
+
+
+async def execute_code(
+    code: str,
+    programming_language: str,
+    input_data: str = "",
+    version_index: Optional[str] = None,
+    compile_only: bool = False
+) -> ExecuteCodeResponse:
+    """
+    Asynchronously executes code with the selected backend. Programs that were
+    already run on the same input are answered from the result cache.
+
+    Args:
+        code: The source code to execute
+        programming_language: The programming language (e.g., 'python', 'rust')
+        input_data: The input to provide via standard input
+        version_index: Version of the language to use
+        compile_only: If True, only compile the code without executing
+
+    Returns:
+        ExecuteCodeResponse containing execution details or error information
+    """
+    cache_key = (_BACKEND, programming_language, version_index, compile_only, code, input_data)
+    if _RESULT_CACHE is not None:
+        cached = await _RESULT_CACHE.lookup(*cache_key)
+        if cached is not None:
+            return cached
+
+    slots = _execution_slots()
+    if slots is None:
+        response = await _execute_with_backend(code, programming_language, input_data, version_index, compile_only)
+    else:
+        async with slots:
+            response = await _execute_with_backend(code, programming_language, input_data, version_index, compile_only)
+
+    if _RESULT_CACHE is not None:
+        await _RESULT_CACHE.store(*cache_key, response)
+    return response
+
+
+async def _execute_with_backend(
+    code: str,
+    programming_language: str,
+    input_data: str,
+    version_index: Optional[str],
+    compile_only: bool
+) -> ExecuteCodeResponse:
+    await pace(executor_limit_name(_BACKEND))
+    if _BACKEND == "local":
+        return await local_executor.execute_code_locally(code, programming_language, input_data, version_index, compile_only)
+    elif _JDOODLE_CLIENT is not None:
+        return await _JDOODLE_CLIENT.execute_code(code, programming_language, input_data, version_index, compile_only)
+    return await jdoodle_executor.execute_code(code, programming_language, input_data, version_index, compile_only)
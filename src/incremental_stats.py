@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.attempt_stats import COUNT_COLUMNS, KEY_COLUMNS, print_report
+
+# State file next to a results JSONL file, e.g. results/merged.jsonl.stats.json
+STATE_SUFFIX = ".stats.json"
+
+StatsKey = Tuple[str, str, str]
+
+
+class IncrementalStats:
+    """
+    Running attempt counts per (programming_language, model, problem_id), kept
+    in a state file together with the offset of the results file they cover.
+
+    update_from_file only parses rows appended since the last update, so
+    refreshing the statistics after a batch costs O(new rows). The counts
+    produce the same tables as model_stats.py via counts_frame().
+    """
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.results_file: Optional[str] = None
+        self.offset = 0
+        self.counts: Dict[StatsKey, List[int]] = {}
+        if os.path.exists(state_file):
+            self._load()
+
+    def _load(self) -> None:
+        with open(self.state_file, "r") as f:
+            state = json.load(f)
+        self.results_file = state["results_file"]
+        self.offset = state["offset"]
+        self.counts = {tuple(entry[:3]): entry[3:] for entry in state["counts"]}
+        if any(len(counts) != len(COUNT_COLUMNS) for counts in self.counts.values()):
+            # Written before the counts gained columns, rebuild from the start of the results file
+            self.reset()
+
+    def save(self) -> None:
+        state = {
+            "results_file": self.results_file,
+            "offset": self.offset,
+            "counts": [list(key) + counts for key, counts in self.counts.items()],
+        }
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def reset(self) -> None:
+        self.offset = 0
+        self.counts = {}
+
+    def observe(self, row: Dict[str, Any]) -> None:
+        """Add one result row to the running counts."""
+        key = (row["programming_language"], row["model"], row["problem_id"])
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * len(COUNT_COLUMNS)
+        counts[0] += 1
+        # Missing verdicts count towards neither the passes nor the attempts of their rate
+        if row["compilation_success"] is not None:
+            counts[1] += bool(row["compilation_success"])
+            counts[4] += 1
+        if row["runtime_success"] is not None:
+            counts[2] += bool(row["runtime_success"])
+            counts[5] += 1
+        if row["problem_correct"]:
+            counts[3] += 1
+
+    def _covers(self, results_file: str) -> bool:
+        """Whether the saved offset still lines up with the results file."""
+        if self.results_file != os.path.abspath(results_file):
+            return False
+        if self.offset == 0:
+            return True
+        if self.offset > os.path.getsize(results_file):
+            return False
+        with open(results_file, "rb") as f:
+            f.seek(self.offset - 1)
+            return f.read(1) == b"\n"
+
+    def update_from_file(self, results_file: str) -> int:
+        """
+        Consume the rows appended to results_file since the last update.
+
+        Starts over if the file is not the one the state was built from, or was
+        truncated or rewritten.
+
+        Returns:
+            Number of new rows
+        """
+        if not self._covers(results_file):
+            self.reset()
+            self.results_file = os.path.abspath(results_file)
+
+        new_rows = 0
+        with open(results_file, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # row still being written
+                self.offset += len(line)
+                try:
+                    row = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                self.observe(row)
+                new_rows += 1
+        return new_rows
+
+    def counts_frame(self) -> pd.DataFrame:
+        """Counts in the layout of attempt_stats.per_problem_counts."""
+        index = pd.MultiIndex.from_tuples(list(self.counts.keys()), names=KEY_COLUMNS)
+        frame = pd.DataFrame(list(self.counts.values()), index=index, columns=COUNT_COLUMNS, dtype="int64")
+        return frame.sort_index()
+
+
+def state_path(results_file: str) -> str:
+    return results_file + STATE_SUFFIX
+
+
+def refresh_stats(results_file: str, state_file: Optional[str] = None) -> IncrementalStats:
+    """Bring the saved statistics of results_file up to date and persist them."""
+    stats = IncrementalStats(state_file or state_path(results_file))
+    stats.update_from_file(results_file)
+    stats.save()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally maintained statistics of a results file")
+    parser.add_argument("results_file", type=str, help="Results JSONL file")
+    parser.add_argument("--state_file", type=str, default=None, help="State file, defaults to <results_file>.stats.json")
+    parser.add_argument("--follow", action="store_true", help="Keep tailing the results file and reprint when new rows arrive")
+    parser.add_argument("--interval", type=float, default=5.0, help="Polling interval in seconds with --follow")
+    args = parser.parse_args()
+
+    stats = refresh_stats(args.results_file, args.state_file)
+    if stats.counts:
+        print_report(stats.counts_frame())
+    while args.follow:
+        time.sleep(args.interval)
+        if stats.update_from_file(args.results_file) > 0:
+            stats.save()
+            print_report(stats.counts_frame())
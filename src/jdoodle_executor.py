@@ -8,8 +8,11 @@ import json
 CLIENT_ID = os.getenv("JDOODLE_CLIENT_ID")
 CLIENT_SECRET = os.getenv("JDOODLE_CLIENT_SECRET")
 
-if not CLIENT_ID or not CLIENT_SECRET:
-    raise ValueError("JDoodle credentials are required. Set JDOODLE_CLIENT_ID and JDOODLE_CLIENT_SECRET environment variables.")
+
+def check_credentials() -> None:
+    """Raise if the JDoodle credentials are not configured."""
+    if not CLIENT_ID or not CLIENT_SECRET:
+        raise ValueError("JDoodle credentials are required. Set JDOODLE_CLIENT_ID and JDOODLE_CLIENT_SECRET environment variables.")
 
 
 @dataclass
@@ -70,12 +73,19 @@ def _get_language_name(language: str) -> str:
     }
     return version_mapping.get(language, language)
 
+EXECUTE_URL = "https://api.jdoodle.com/v1/execute"
+
+DEFAULT_POOL_SIZE = 100
+DEFAULT_KEEPALIVE_TIMEOUT = 30.0
+
+
 async def execute_code(
     code: str,
     programming_language: str,
     input_data: str = "",
     version_index: Optional[str] = None,
-    compile_only: bool = False
+    compile_only: bool = False,
+    session: Optional[aiohttp.ClientSession] = None,
 ) -> ExecuteCodeResponse:
     """
     Asynchronously executes code using the JDoodle API.
@@ -86,10 +96,13 @@ async def execute_code(
         input_data: The input to provide via standard input
         version_index: Version of the language to use
         compile_only: If True, only compile the code without executing
+        session: Session to send the request with, a one-off session is opened if None
         
     Returns:
         ExecuteCodeResponse containing execution details or error information
     """
+    check_credentials()
+
     if not version_index:
         version_index = _get_version_index(programming_language)
         
@@ -106,23 +119,87 @@ async def execute_code(
         "compileOnly": compile_only
     }
     
-    EXECUTE_URL = "https://api.jdoodle.com/v1/execute"
-    
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                EXECUTE_URL,
-                headers=headers,
-                json=payload
-            ) as response:
-                response_text = await response.text()
-                if response.status != 200:
-                    return ExecuteCodeResponse.error(f"HTTP {response.status}: {response_text}")
-                
-                result = json.loads(response_text)
-                return ExecuteCodeResponse.from_api_response(result)
+        if session is None:
+            async with aiohttp.ClientSession() as one_off_session:
+                return await _post_execute(one_off_session, headers, payload)
+        return await _post_execute(session, headers, payload)
                 
     except aiohttp.ClientError as http_err:
         return ExecuteCodeResponse.error(f"HTTP error occurred: {str(http_err)}")
     except Exception as err:
         return ExecuteCodeResponse.error(f"An unexpected error occurred: {str(err)}")
+
+
+async def _post_execute(session: aiohttp.ClientSession, headers: dict, payload: dict) -> ExecuteCodeResponse:
+    async with session.post(
+        EXECUTE_URL,
+        headers=headers,
+        json=payload
+    ) as response:
+        response_text = await response.text()
+        if response.status != 200:
+            return ExecuteCodeResponse.error(f"HTTP {response.status}: {response_text}")
+
+        result = json.loads(response_text)
+        return ExecuteCodeResponse.from_api_response(result)
+
+
+class JDoodleClient:
+    """
+    JDoodle API client holding one long-lived aiohttp session, so requests reuse
+    pooled keep-alive connections instead of paying a TCP + TLS handshake each.
+    Create it once per run and close it at the end (or use it as an async context manager).
+    """
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        per_host_limit: int = 0,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+    ):
+        """
+        Args:
+            pool_size: Maximum number of simultaneous connections
+            per_host_limit: Maximum connections per host, 0 for no per-host limit
+            keepalive_timeout: Seconds an idle connection is kept open for reuse
+        """
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> None:
+        if self._session is not None:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.per_host_limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "JDoodleClient":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def execute_code(
+        self,
+        code: str,
+        programming_language: str,
+        input_data: str = "",
+        version_index: Optional[str] = None,
+        compile_only: bool = False
+    ) -> ExecuteCodeResponse:
+        """Same as the module level execute_code, over the shared session."""
+        await self.start()
+        return await execute_code(code, programming_language, input_data, version_index, compile_only, session=self._session)
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import cProfile
+import itertools
+import os
+import pstats
+import tempfile
+import time
+from typing import List, Sequence
+
+from src.compile_cache import CompileCache
+from src.executor import EXECUTOR_BACKENDS, close_executor, configure_execution_concurrency, open_executor, set_executor_backend
+from src.local_executor import configure_compile_cache, configure_host_network
+from src.mock_llm_server import DEFAULT_HOST, DEFAULT_PORT, add_mock_arguments, base_urls, mock_config_from_args, start_mock_server
+from src.model_api import ProviderConfig, StreamStats, configure_streaming
+from src.pipeline import BenchmarkJob, run_pipeline
+from src.problem_loader import Problem, load_problems
+from src.rate_limiter import adaptive_limiters, configure_adaptive_limits, configure_rate_limit, executor_limit_name
+from src.simple_agent import AgentStats
+from src.staged_evaluation import configure_staged_evaluation
+
+# Environment variable of each provider's base URL, see model_api.ProviderConfig
+_BASE_URL_VARIABLES = {
+    "open-router": "OPEN_ROUTER_BASE_URL",
+    "llama-cpp": "LLAMA_CPP_BASE_URL",
+    "ollama": "OLLAMA_URL",
+}
+
+
+def build_jobs(problems: Sequence[Problem], languages: Sequence[str], models: Sequence[str], count: int) -> List[BenchmarkJob]:
+    """count jobs cycling through every (problem, language, model) combination."""
+    combinations = itertools.cycle(itertools.product(problems, languages, models))
+    return [BenchmarkJob(model, language, problem) for problem, language, model in itertools.islice(combinations, count)]
+
+
+async def run_load_test(args: argparse.Namespace) -> None:
+    runner = None
+    if not args.external_server:
+        runner = await start_mock_server(mock_config_from_args(args), args.host, args.port)
+    ProviderConfig.override_base_url(args.provider, base_urls(args.host, args.port)[_BASE_URL_VARIABLES[args.provider]], api_key="sk-mock")
+
+    set_executor_backend(args.executor)
+    configure_host_network(args.allow_host_network)
+    configure_execution_concurrency(args.execution_workers)
+    configure_streaming(args.stream)
+    configure_staged_evaluation(args.staged_evaluation)
+    configure_rate_limit(args.provider, None)
+    configure_rate_limit(executor_limit_name(args.executor), None)
+    configure_adaptive_limits(args.generation_workers, args.generation_workers)
+    if args.compile_cache_dir:
+        configure_compile_cache(CompileCache(args.compile_cache_dir))
+
+    problems = await load_problems()
+    jobs = build_jobs(problems, args.languages, args.models, args.attempts)
+    output_file = args.output_file or os.path.join(tempfile.mkdtemp(prefix="load_test_"), "results.jsonl")
+    print(f"Running {len(jobs)} attempts against the mock server, writing to {output_file}")
+
+    profiler = cProfile.Profile() if args.profile else None
+    await open_executor()
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            profiler.enable()
+        stats = await run_pipeline(jobs, output_file, args.provider, args.generation_workers, args.execution_workers, temperature=1.0)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+        await close_executor()
+        if runner is not None:
+            print(runner.app["stats"].summary())
+            await runner.cleanup()
+
+    print(f"Finished {stats.results} attempts in {elapsed:.1f}s, {stats.results / elapsed * 60:.0f} attempts per minute")
+    for limiter in adaptive_limiters():
+        print(limiter.summary())
+    if StreamStats.streams:
+        print(f"Streaming: {StreamStats.stopped_at_code_block} of {StreamStats.streams} completions stopped at their code block, {StreamStats.characters} characters received")
+    if AgentStats.samples:
+        print(f"Agent: {AgentStats.rounds_stopped_early} rounds stopped early, {AgentStats.generations_cancelled} of {AgentStats.samples} samples not generated, {AgentStats.executions_cancelled} executions cancelled")
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        pstats.Stats(args.profile).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure harness throughput end to end against the local mock LLM server")
+    add_mock_arguments(parser)
+    parser.add_argument("--external_server", action="store_true", help="Use a mock server that is already running at --host/--port instead of starting one")
+    parser.add_argument("--provider", type=str, choices=list(_BASE_URL_VARIABLES), default="open-router", help="Protocol the harness speaks to the mock server")
+    parser.add_argument("--attempts", type=int, default=1000, help="Number of attempts to run")
+    parser.add_argument("--languages", type=str, nargs="+", default=["python"], help="Languages of the attempts")
+    parser.add_argument("--models", type=str, nargs="+", default=["mock/model"], help="Model names sent to the mock server, agent[-<strategy>]_<model> runs an agent")
+    parser.add_argument("--executor", type=str, choices=EXECUTOR_BACKENDS, default="local", help="Executor backend, the JDoodle API costs credits; local programs can access the host filesystem")
+    parser.add_argument("--generation_workers", type=int, default=64, help="Maximum number of model calls in flight")
+    parser.add_argument("--execution_workers", type=int, default=os.cpu_count() or 1, help="Maximum number of programs compiled/run at once")
+    parser.add_argument("--allow_host_network", action="store_true", help="Let the local executor run programs with host networking when network namespaces are unavailable, instead of refusing to run them")
+    parser.add_argument("--compile_cache_dir", type=str, default=None, help="Compile cache directory of the local executor, none by default")
+    parser.add_argument("-o", "--output_file", type=str, default=None, help="Results file, a temporary file by default")
+    parser.add_argument("--stream", action="store_true", help="Stream completions and stop at the first complete code block")
+    parser.add_argument("--staged_evaluation", action="store_true", help="Run programs on the example of the problem before the full input")
+    parser.add_argument("--profile", type=str, default=None, help="Write cProfile statistics of the run to this file and print the top entries")
+    parser.set_defaults(host=DEFAULT_HOST, port=DEFAULT_PORT)
+    asyncio.run(run_load_test(parser.parse_args()))
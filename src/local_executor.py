@@ -0,0 +1,421 @@
+"""
+Compile and run generated programs with local toolchains.
+
+Each program runs in a private temporary working directory, in its own network
+namespace (no network access) and under CPU, memory, output size and wall clock
+limits. This is not a filesystem sandbox: programs run as the invoking user and
+can read and write everything on the host that user can. Run the benchmark as
+an unprivileged user, or in a container or VM, when that matters.
+"""
+import asyncio
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional, Tuple, Dict, List
+
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.compile_cache import CompileCache, CompileRecord, source_digest
+
+# Output larger than this is truncated (and the program is stopped by RLIMIT_FSIZE)
+MAX_OUTPUT_BYTES = 16 * 1024 * 1024
+
+# Environment variables the toolchains need to find their caches and installs
+_TOOLCHAIN_ENV_VARS = ["PATH", "LANG", "GOROOT", "GOPATH", "GOCACHE", "CARGO_HOME", "RUSTUP_HOME", "OPAMROOT", "OCAMLPATH", "CAML_LD_LIBRARY_PATH"]
+
+
+@dataclass(frozen=True)
+class SandboxLimits:
+    """Resource limits applied to a sandboxed process."""
+    wall_time: float  # seconds
+    cpu_time: int  # seconds
+    memory: int  # bytes of data segment
+    output: int = MAX_OUTPUT_BYTES
+
+
+COMPILE_LIMITS = SandboxLimits(wall_time=120.0, cpu_time=120, memory=4 * 1024 ** 3)
+RUN_LIMITS = SandboxLimits(wall_time=20.0, cpu_time=15, memory=1024 ** 3)
+
+# Compile cache shared by all local executions, None disables caching
+_COMPILE_CACHE: Optional[CompileCache] = None
+
+
+@dataclass(frozen=True)
+class Toolchain:
+    """How to build and run a single-file program for a language."""
+    source_file: str
+    compile_command: Optional[Tuple[str, ...]]
+    run_command: Tuple[str, ...]
+    artifacts: Tuple[str, ...] = ("main",)  # files produced by the compiler that the run needs
+
+
+TOOLCHAINS: Dict[str, Toolchain] = {
+    "python": Toolchain("main.py", ("python3", "-m", "py_compile", "main.py"), ("python3", "main.py"), artifacts=()),
+    "cpp": Toolchain("main.cpp", ("g++", "-std=c++17", "-O2", "-o", "main", "main.cpp"), ("./main",)),
+    "rust": Toolchain("main.rs", ("rustc", "--edition", "2021", "-O", "-o", "main", "main.rs"), ("./main",)),
+    "go": Toolchain("main.go", ("go", "build", "-o", "main", "main.go"), ("./main",)),
+    "haskell": Toolchain("main.hs", ("ghc", "-O2", "-o", "main", "main.hs"), ("./main",)),
+    "ocaml": Toolchain("main.ml", ("ocamlfind", "ocamlopt", "-package", "str,unix", "-linkpkg", "-o", "main", "main.ml"), ("./main",)),
+}
+
+
+@dataclass
+class SandboxOutcome:
+    """Result of a single sandboxed process."""
+    returncode: int
+    output: str
+    cpu_time: float
+    max_rss_kb: int
+    timed_out: bool
+
+    @property
+    def success(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def describe_failure(self, limits: SandboxLimits) -> str:
+        """Human readable reason for a failed process, appended to its output."""
+        if self.timed_out:
+            return f"Timed out after {limits.wall_time:g} seconds"
+        if self.returncode < 0:
+            try:
+                name = signal.Signals(-self.returncode).name
+            except ValueError:
+                name = str(-self.returncode)
+            return f"Terminated by signal {name}"
+        return f"Exited with code {self.returncode}"
+
+
+class SandboxUnavailableError(RuntimeError):
+    """Raised when generated programs would run with host networking without that being allowed."""
+
+
+# Set by configure_host_network: run programs with host networking where network namespaces are unavailable
+_ALLOW_HOST_NETWORK = False
+
+
+def configure_host_network(allowed: bool) -> None:
+    """Allow, or refuse (the default), running programs without network isolation."""
+    global _ALLOW_HOST_NETWORK
+    _ALLOW_HOST_NETWORK = allowed
+
+
+@lru_cache(maxsize=1)
+def _probe_network_isolation() -> Tuple[Tuple[str, ...], str]:
+    """
+    Command prefix that runs a process in a fresh network namespace, or an
+    empty prefix and the reason if unprivileged namespaces are not available.
+    """
+    prefix = ("unshare", "--net", "--map-root-user")
+    if shutil.which("unshare") is None:
+        return (), "unshare is not installed"
+    try:
+        probe = subprocess.run(prefix + ("true",), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+    except (OSError, subprocess.SubprocessError) as err:
+        return (), f"unshare failed: {err}"
+    if probe.returncode != 0:
+        return (), "unprivileged network namespaces are not available"
+    return prefix, ""
+
+
+@lru_cache(maxsize=1)
+def _warn_host_network(reason: str) -> None:
+    print("=" * 80)
+    print(f"WARNING: {reason}.")
+    print("Generated programs run WITH HOST NETWORKING because host networking was explicitly allowed.")
+    print("=" * 80)
+
+
+def _network_isolation_prefix() -> Tuple[str, ...]:
+    """
+    Prefix isolating the network of a sandboxed process.
+
+    Raises:
+        SandboxUnavailableError: If isolation is unavailable and host networking was not allowed
+    """
+    prefix, reason = _probe_network_isolation()
+    if prefix:
+        return prefix
+    if not _ALLOW_HOST_NETWORK:
+        raise SandboxUnavailableError(
+            f"Refusing to run generated programs with host networking: {reason}. "
+            "Install util-linux unshare, enable unprivileged user namespaces, or pass --allow_host_network"
+        )
+    _warn_host_network(reason)
+    return ()
+
+
+def check_sandbox() -> None:
+    """
+    Fail early if the local sandbox cannot isolate the network.
+
+    Raises:
+        SandboxUnavailableError: If isolation is unavailable and host networking was not allowed
+    """
+    _network_isolation_prefix()
+
+
+# Applies the rlimits given as arguments and execs the command after "--", for hosts without prlimit(1)
+_LIMITS_WRAPPER = """
+import os, resource, sys
+cpu, memory, output = (int(value) for value in sys.argv[1:4])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+resource.setrlimit(resource.RLIMIT_DATA, (memory, memory))
+resource.setrlimit(resource.RLIMIT_FSIZE, (output, output))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+os.execvp(sys.argv[5], sys.argv[5:])
+"""
+
+
+@lru_cache(maxsize=None)
+def _limits_prefix(limits: SandboxLimits) -> Tuple[str, ...]:
+    """
+    Command prefix that applies limits to the process it execs.
+
+    The limits are set by a separate program rather than a preexec_fn, which is
+    not safe in the worker threads local executions run on.
+    """
+    if shutil.which("prlimit") is not None:
+        return (
+            "prlimit",
+            f"--cpu={limits.cpu_time}:{limits.cpu_time + 1}",
+            f"--data={limits.memory}:{limits.memory}",
+            f"--fsize={limits.output}:{limits.output}",
+            "--core=0:0",
+            "--",
+        )
+    return (sys.executable, "-c", _LIMITS_WRAPPER, str(limits.cpu_time), str(limits.memory), str(limits.output), "--")
+
+
+def _sandbox_env(home: str) -> Dict[str, str]:
+    env = {name: os.environ[name] for name in _TOOLCHAIN_ENV_VARS if name in os.environ}
+    env["HOME"] = home
+    env["TMPDIR"] = home
+    return env
+
+
+def _kill_process_group(pid: int, timed_out: threading.Event) -> None:
+    timed_out.set()
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def run_sandboxed(
+    command: Tuple[str, ...],
+    workdir: str,
+    limits: SandboxLimits,
+    input_data: str = "",
+    home: Optional[str] = None,
+) -> SandboxOutcome:
+    """
+    Run a command inside workdir with rlimits, no network and a wall clock timeout.
+    The rest of the filesystem stays accessible, see the module docstring.
+
+    Stdin and the combined stdout/stderr go through files in workdir so that the
+    child can be reaped with wait4 and its own resource usage recorded.
+
+    Args:
+        command: The command to run, relative to workdir
+        workdir: Private directory the process runs in
+        limits: Resource limits for the process
+        input_data: Data provided via standard input
+        home: HOME for the process, defaults to workdir
+
+    Returns:
+        SandboxOutcome with exit status, output and resource usage
+    """
+    stdin_path = os.path.join(workdir, ".stdin")
+    output_path = os.path.join(workdir, ".output")
+    with open(stdin_path, "w") as f:
+        f.write(input_data)
+
+    with open(stdin_path, "rb") as stdin, open(output_path, "wb") as stdout:
+        process = subprocess.Popen(
+            _network_isolation_prefix() + _limits_prefix(limits) + tuple(command),
+            cwd=workdir,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=subprocess.STDOUT,
+            env=_sandbox_env(home or workdir),
+            start_new_session=True,
+        )
+
+    timed_out = threading.Event()
+    timer = threading.Timer(limits.wall_time, _kill_process_group, (process.pid, timed_out))
+    timer.start()
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    finally:
+        timer.cancel()
+
+    returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+    process.returncode = returncode
+
+    with open(output_path, "rb") as f:
+        output = f.read(limits.output).decode("utf-8", errors="replace")
+
+    # ru_maxrss also covers the pages the child inherited before exec, so memory
+    # is an upper bound that includes the launcher
+    return SandboxOutcome(
+        returncode=returncode,
+        output=output,
+        cpu_time=usage.ru_utime + usage.ru_stime,
+        max_rss_kb=usage.ru_maxrss,
+        timed_out=timed_out.is_set(),
+    )
+
+
+def _response_from_outcome(outcome: SandboxOutcome, limits: SandboxLimits, is_compiled: bool, is_execution_success: Optional[bool]) -> ExecuteCodeResponse:
+    output = outcome.output
+    if not outcome.success:
+        output = output.rstrip("\n") + "\n" + outcome.describe_failure(limits)
+    return ExecuteCodeResponse(
+        status="success",
+        output=output,
+        memory=str(outcome.max_rss_kb),
+        cpuTime=f"{outcome.cpu_time:.2f}",
+        isCompiled=is_compiled,
+        isExecutionSuccess=is_execution_success,
+    )
+
+
+def configure_compile_cache(cache: Optional[CompileCache]) -> None:
+    """Set the compile cache used by local executions, or None to disable it."""
+    global _COMPILE_CACHE
+    _COMPILE_CACHE = cache
+
+
+def get_compile_cache() -> Optional[CompileCache]:
+    return _COMPILE_CACHE
+
+
+def compile_in_sandbox(toolchain: Toolchain, workdir: str) -> SandboxOutcome:
+    """Compile the source already written to workdir."""
+    # Compilers need the real HOME to find their toolchains and build caches
+    return run_sandboxed(toolchain.compile_command, workdir, COMPILE_LIMITS, home=os.path.expanduser("~"))
+
+
+def _compile_with_cache(
+    cache: CompileCache,
+    toolchain: Toolchain,
+    code: str,
+    workdir: str,
+    programming_language: str,
+    version_index: Optional[str],
+) -> SandboxOutcome:
+    """
+    Compile the source in workdir, reusing the artifacts of a previous compilation
+    of the same normalized source when the cache has them.
+    """
+    key = source_digest(code, programming_language, version_index or "", " ".join(toolchain.compile_command))
+    with cache.key_lock(key):
+        cached = cache.lookup(key)
+        if cached is None:
+            outcome = compile_in_sandbox(toolchain, workdir)
+            # Timeouts depend on host load, so they are not worth remembering
+            if not outcome.timed_out:
+                record = CompileRecord(outcome.returncode, outcome.output, outcome.cpu_time, outcome.max_rss_kb)
+                cache.store(key, record, workdir, list(toolchain.artifacts))
+            return outcome
+
+    entry, record = cached
+    if record.success:
+        try:
+            for name in toolchain.artifacts:
+                shutil.copy2(os.path.join(entry, name), os.path.join(workdir, name))
+        except OSError:
+            # The entry was evicted while we were reading it
+            return compile_in_sandbox(toolchain, workdir)
+    return SandboxOutcome(
+        returncode=record.returncode,
+        output=record.output,
+        cpu_time=record.cpu_time,
+        max_rss_kb=record.max_rss_kb,
+        timed_out=False,
+    )
+
+
+def _compile_and_run(
+    toolchain: Toolchain,
+    code: str,
+    input_data: str,
+    compile_only: bool,
+    programming_language: str,
+    version_index: Optional[str],
+) -> ExecuteCodeResponse:
+    with tempfile.TemporaryDirectory(prefix="compilation-benchmark-") as workdir:
+        with open(os.path.join(workdir, toolchain.source_file), "w") as f:
+            f.write(code)
+
+        compile_outcome = None
+        if toolchain.compile_command is not None:
+            if _COMPILE_CACHE is not None:
+                compile_outcome = _compile_with_cache(_COMPILE_CACHE, toolchain, code, workdir, programming_language, version_index)
+            else:
+                compile_outcome = compile_in_sandbox(toolchain, workdir)
+
+        if compile_outcome is not None and not compile_outcome.success:
+            return _response_from_outcome(compile_outcome, COMPILE_LIMITS, is_compiled=False, is_execution_success=False)
+        if compile_only:
+            if compile_outcome is None:
+                return ExecuteCodeResponse(status="success", output="", isCompiled=True)
+            return _response_from_outcome(compile_outcome, COMPILE_LIMITS, is_compiled=True, is_execution_success=None)
+
+        run_outcome = run_sandboxed(toolchain.run_command, workdir, RUN_LIMITS, input_data)
+        return _response_from_outcome(run_outcome, RUN_LIMITS, is_compiled=True, is_execution_success=run_outcome.success)
+
+
+def supported_languages() -> List[str]:
+    return sorted(TOOLCHAINS)
+
+
+@lru_cache(maxsize=None)
+def _missing_tools(toolchain: Toolchain) -> List[str]:
+    """Executables of the toolchain that are not on PATH."""
+    commands = [toolchain.run_command]
+    if toolchain.compile_command is not None:
+        commands.append(toolchain.compile_command)
+    return [command[0] for command in commands if not command[0].startswith("./") and shutil.which(command[0]) is None]
+
+
+async def execute_code_locally(
+    code: str,
+    programming_language: str,
+    input_data: str = "",
+    version_index: Optional[str] = None,
+    compile_only: bool = False
+) -> ExecuteCodeResponse:
+    """
+    Asynchronously compiles and runs code on this host inside a throwaway sandbox.
+
+    Mirrors jdoodle_executor.execute_code: the response carries output, cpuTime,
+    memory, isCompiled and isExecutionSuccess in the same format.
+
+    Args:
+        code: The source code to execute
+        programming_language: The programming language (e.g., 'python', 'rust')
+        input_data: The input to provide via standard input
+        version_index: Ignored, the toolchain installed on the host is used
+        compile_only: If True, only compile the code without executing
+
+    Returns:
+        ExecuteCodeResponse containing execution details or error information
+    """
+    toolchain = TOOLCHAINS.get(programming_language)
+    if toolchain is None:
+        return ExecuteCodeResponse.error(f"Unsupported language for local execution: {programming_language}")
+    missing = _missing_tools(toolchain)
+    if missing:
+        return ExecuteCodeResponse.error(f"Toolchain for {programming_language} is not installed: {', '.join(missing)}")
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(None, _compile_and_run, toolchain, code, input_data, compile_only, programming_language, version_index)
+    except Exception as err:
+        return ExecuteCodeResponse.error(f"Local execution failed: {str(err)}")
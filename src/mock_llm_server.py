@@ -0,0 +1,373 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8089
+
+# Characters per streamed chunk, about four tokens
+_STREAM_PIECE_CHARS = 16
+
+_FENCE_LANGUAGE = re.compile(r"```(\w+)")
+_CORRECTION_LANGUAGE = re.compile(r"code in (\w+)")
+
+# Returned when there is neither a recorded response nor an example solution
+_PLACEHOLDER = {
+    "python": 'print("")',
+    "cpp": "#include <iostream>\nint main() { std::cout << std::endl; return 0; }",
+    "rust": 'fn main() {\n    println!("");\n}',
+    "go": 'package main\n\nimport "fmt"\n\nfunc main() {\n\tfmt.Println("")\n}',
+    "haskell": 'main :: IO ()\nmain = putStrLn ""',
+    "ocaml": 'let () = print_endline ""',
+}
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Parse a latency distribution in seconds.
+
+    Accepted forms: "fixed:0.5", "uniform:0.2,2.0", "normal:1.0,0.3",
+    "lognormal:0.0,0.5" (mu and sigma of the underlying normal) and "exponential:1.0" (mean).
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",")] if params else []
+    distributions = {
+        "fixed": (1, lambda mean: mean),
+        "uniform": (2, random.uniform),
+        "normal": (2, random.gauss),
+        "lognormal": (2, random.lognormvariate),
+        "exponential": (1, lambda mean: random.expovariate(1 / mean) if mean > 0 else 0.0),
+    }
+    if kind not in distributions or len(values) != distributions[kind][0]:
+        raise ValueError(f"Invalid latency distribution '{spec}', expected e.g. fixed:0.5, uniform:0.2,2, normal:1,0.3, lognormal:0,0.5 or exponential:1")
+    sample = distributions[kind][1]
+    return lambda: max(0.0, sample(*values))
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server."""
+
+    latency: Callable[[], float] = field(default=lambda: 0.0)
+    # Fraction of requests answered with a 500 error
+    error_rate: float = 0.0
+    # Fraction of requests answered with a 429 and a Retry-After header
+    rate_limit_rate: float = 0.0
+    retry_after: float = 1.0
+    # JSONL file of recorded responses, see ResponseSource
+    replay_file: Optional[str] = None
+    problems_dir: str = "problems/misc_problems"
+    seed: Optional[int] = None
+    # Characters of explanation appended after the code block, like chatty models do
+    chatter: int = 0
+    # Streaming speed, 0 streams as fast as possible
+    tokens_per_second: float = 0.0
+
+
+class ResponseSource:
+    """
+    Chooses the completion text for a prompt.
+
+    Recorded responses are JSONL rows with a "response" and optionally the
+    "prompt" it answered; a recorded prompt is answered with its response, any
+    other prompt with a random recorded one. Without recordings, a prompt that
+    contains the statement of a problem with an example_solution.py gets that
+    solution in a fenced block of the prompt's language. Everything else gets a
+    placeholder program.
+    """
+
+    def __init__(self, replay_file: Optional[str] = None, problems_dir: str = "problems/misc_problems", seed: Optional[int] = None, chatter: int = 0):
+        self._random = random.Random(seed)
+        self._chatter = ("\nThis solution reads the input from stdin and prints the result. " * (chatter // 64 + 1))[:chatter]
+        self._by_prompt: Dict[str, str] = {}
+        self._recorded: List[str] = []
+        if replay_file:
+            with open(replay_file, "r") as f:
+                for line in f:
+                    row = json.loads(line)
+                    self._recorded.append(row["response"])
+                    if row.get("prompt") is not None:
+                        self._by_prompt[prompt_hash(row["prompt"])] = row["response"]
+
+        self._solutions: List[Tuple[str, str]] = []
+        for solution_file in sorted(Path(problems_dir).glob("*/example_solution.py")):
+            statement_file = solution_file.parent / "problem_statement.txt"
+            if statement_file.exists():
+                self._solutions.append((statement_file.read_text().strip(), solution_file.read_text()))
+
+    def respond(self, prompt: str) -> str:
+        recorded = self._by_prompt.get(prompt_hash(prompt))
+        if recorded is not None:
+            return recorded
+        if self._recorded:
+            return self._random.choice(self._recorded)
+
+        language = _prompt_language(prompt)
+        code = None
+        if language == "python":
+            code = next((solution for statement, solution in self._solutions if statement in prompt), None)
+        if code is None:
+            code = _PLACEHOLDER.get(language, _PLACEHOLDER["python"])
+        return f"Here is the solution:\n\n```{language}\n{code.strip()}\n```\n{self._chatter}"
+
+
+def _prompt_language(prompt: str) -> str:
+    match = _FENCE_LANGUAGE.search(prompt) or _CORRECTION_LANGUAGE.search(prompt)
+    return match.group(1).lower() if match else "python"
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    completions: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    # Streams the client closed before the end
+    streams_closed_early: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.requests / elapsed * 60 if elapsed > 0 else 0.0
+        return (
+            f"Mock LLM server: {self.requests} requests ({rate:.0f}/min), {self.completions} completions, "
+            f"{self.errors} injected errors, {self.rate_limited} injected rate limits, "
+            f"{self.streams_closed_early} streams closed early by the client"
+        )
+
+
+def _usage(prompt: str, completions: List[str]) -> Dict[str, int]:
+    # Rough token counts, four characters per token
+    prompt_tokens = len(prompt) // 4
+    completion_tokens = sum(len(text) for text in completions) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+def create_app(config: MockConfig) -> web.Application:
+    """aiohttp application serving the OpenAI chat/completions and Ollama generate endpoints."""
+    source = ResponseSource(config.replay_file, config.problems_dir, config.seed, config.chatter)
+    stats = MockStats()
+    fault_random = random.Random(config.seed)
+
+    async def simulate(request_count: int = 1) -> Optional[web.Response]:
+        """Wait for the sampled latency and return an injected failure, if any."""
+        stats.requests += 1
+        await asyncio.sleep(config.latency())
+        draw = fault_random.random()
+        if draw < config.rate_limit_rate:
+            stats.rate_limited += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit exceeded (injected)", "code": 429}},
+                status=429,
+                headers={"Retry-After": f"{config.retry_after:g}"},
+            )
+        if draw < config.rate_limit_rate + config.error_rate:
+            stats.errors += 1
+            return web.json_response({"error": {"message": "Internal server error (injected)", "code": 500}}, status=500)
+        stats.completions += request_count
+        return None
+
+    async def stream(request: web.Request, texts: List[str], event: Callable[[int, str, bool], dict], sse: bool = True) -> web.StreamResponse:
+        """
+        Send texts piece by piece, interleaving the choices, as server-sent events
+        (OpenAI) or newline-delimited JSON (Ollama).
+        """
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream" if sse else "application/x-ndjson"})
+        await response.prepare(request)
+        pieces = [[text[i:i + _STREAM_PIECE_CHARS] for i in range(0, len(text), _STREAM_PIECE_CHARS)] for text in texts]
+        delay = (_STREAM_PIECE_CHARS / 4) / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+        try:
+            for step in range(max(len(p) for p in pieces) + 1):
+                for index, choice_pieces in enumerate(pieces):
+                    if step < len(choice_pieces):
+                        data = event(index, choice_pieces[step], False)
+                    elif step == len(choice_pieces):
+                        data = event(index, "", True)
+                    else:
+                        continue
+                    await response.write((f"data: {json.dumps(data)}\n\n" if sse else json.dumps(data) + "\n").encode("utf-8"))
+                await asyncio.sleep(delay)
+            if sse:
+                await response.write(b"data: [DONE]\n\n")
+            await response.write_eof()
+        except ConnectionResetError:
+            stats.streams_closed_early += 1
+        except asyncio.CancelledError:
+            stats.streams_closed_early += 1
+            raise
+        return response
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+        n = int(body.get("n") or 1)
+        failure = await simulate(n)
+        if failure is not None:
+            return failure
+        texts = [source.respond(prompt) for _ in range(n)]
+        if body.get("stream"):
+            completion_id, created = f"chatcmpl-{uuid.uuid4().hex}", int(time.time())
+            return await stream(request, texts, lambda index, piece, last: {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": body.get("model", "mock"),
+                "choices": [{"index": index, "delta": {} if last else {"content": piece}, "finish_reason": "stop" if last else None}],
+            })
+        return web.json_response({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [
+                {"index": i, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+                for i, text in enumerate(texts)
+            ],
+            "usage": _usage(prompt, texts),
+        })
+
+    async def completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        if isinstance(prompt, list):
+            prompt = "\n".join(prompt)
+        failure = await simulate()
+        if failure is not None:
+            return failure
+        text = source.respond(prompt)
+        if body.get("stream"):
+            completion_id, created = f"cmpl-{uuid.uuid4().hex}", int(time.time())
+            return await stream(request, [text], lambda index, piece, last: {
+                "id": completion_id,
+                "object": "text_completion",
+                "created": created,
+                "model": body.get("model", "mock"),
+                "content": piece,
+                "choices": [{"index": index, "text": piece, "finish_reason": "stop" if last else None}],
+            })
+        # llama.cpp returns the text as "content"; OpenAI clients read choices[0].text
+        return web.json_response({
+            "id": f"cmpl-{uuid.uuid4().hex}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "content": text,
+            "choices": [{"index": 0, "text": text, "finish_reason": "stop"}],
+            "usage": _usage(prompt, [text]),
+        })
+
+    async def ollama_generate(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        failure = await simulate()
+        if failure is not None:
+            return failure
+        if body.get("stream", True):
+            return await stream(request, [source.respond(prompt)], lambda index, piece, last: {
+                "model": body.get("model", "mock"),
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "response": piece,
+                "done": last,
+            }, sse=False)
+        return web.json_response({
+            "model": body.get("model", "mock"),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": source.respond(prompt),
+            "done": True,
+        })
+
+    async def stats_handler(request: web.Request) -> web.Response:
+        return web.json_response({
+            "requests": stats.requests,
+            "completions": stats.completions,
+            "errors": stats.errors,
+            "rate_limited": stats.rate_limited,
+        })
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app["stats"] = stats
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1/completions", completions)
+    app.router.add_post("/api/generate", ollama_generate)
+    app.router.add_get("/stats", stats_handler)
+    return app
+
+
+async def start_mock_server(config: MockConfig, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> web.AppRunner:
+    """
+    Start the mock server in the running event loop.
+
+    Returns:
+        The runner; call its cleanup() to stop the server. runner.app["stats"] holds the counters.
+    """
+    runner = web.AppRunner(create_app(config), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def base_urls(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Dict[str, str]:
+    """Environment overrides pointing every provider of model_api at the mock server."""
+    root = f"http://{host}:{port}"
+    return {
+        "OPEN_ROUTER_BASE_URL": f"{root}/v1",
+        "LLAMA_CPP_BASE_URL": f"{root}/v1",
+        "OLLAMA_URL": f"{root}/api/generate",
+    }
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--host", type=str, default=DEFAULT_HOST, help="Address the mock server listens on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port the mock server listens on")
+    parser.add_argument("--latency", type=str, default="fixed:0", help="Response latency distribution in seconds, e.g. fixed:0.5, uniform:0.2,2, lognormal:0,0.5, exponential:1")
+    parser.add_argument("--error_rate", type=float, default=0.0, help="Fraction of requests answered with a 500 error")
+    parser.add_argument("--rate_limit_rate", type=float, default=0.0, help="Fraction of requests answered with a 429 rate limit")
+    parser.add_argument("--retry_after", type=float, default=1.0, help="Retry-After seconds sent with injected rate limits")
+    parser.add_argument("--replay_file", type=str, default=None, help="JSONL file of recorded responses ({\"prompt\": ..., \"response\": ...}) to replay")
+    parser.add_argument("--problems_dir", type=str, default="problems/misc_problems", help="Problems with example_solution.py files answered when nothing is recorded")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed of the injected failures and replay choices")
+    parser.add_argument("--chatter", type=int, default=0, help="Characters of explanation appended after the code block of generated responses")
+    parser.add_argument("--tokens_per_second", type=float, default=0.0, help="Streaming speed of responses, 0 for as fast as possible")
+
+
+def mock_config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        latency=parse_latency(args.latency),
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        replay_file=args.replay_file,
+        problems_dir=args.problems_dir,
+        seed=args.seed,
+        chatter=args.chatter,
+        tokens_per_second=args.tokens_per_second,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for OpenAI-compatible and Ollama model servers")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"Mock LLM server on http://{args.host}:{args.port}, point the harness at it with:")
+    for name, url in base_urls(args.host, args.port).items():
+        print(f"  export {name}={url}")
+    app = create_app(mock_config_from_args(args))
+    try:
+        web.run_app(app, host=args.host, port=args.port, access_log=None, print=None)
+    finally:
+        print(app["stats"].summary())
@@ -1,8 +1,18 @@
 import os
+import json
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, List, Optional, Set, Tuple, TypeVar
 import httpx
+import openai
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 from functools import lru_cache
+from src.rate_limiter import pace, get_adaptive_limiter, backoff_delay
+from src.completion_cache import CompletionCache, CompletionCacheMiss
+from src.code_extractor import IncrementalFenceDetector
 
 # Load environment variables
 load_dotenv()
@@ -11,25 +21,60 @@ OPEN_ROUTER_KEY = os.getenv("OPEN_ROUTER_KEY")
 # Track the first provider used
 _INITIALIZED_PROVIDER = None
 
+# Record/replay store of completions, see configure_completion_cache
+_COMPLETION_CACHE: Optional[CompletionCache] = None
+
+# (provider, model) pairs that answered a request for n > 1 choices with a single one
+_SINGLE_CHOICE_MODELS: Set[Tuple[str, str]] = set()
+
+# Stream completions and stop reading at the first complete code block, see configure_streaming
+_STREAMING = False
+
+
+class StreamStats:
+    """Counters of streamed completions, printed at the end of a run."""
+    # Completions received through a stream, a retried completion counts once
+    streams = 0
+    # Completions whose stream was closed right after the first complete code block
+    stopped_at_code_block = 0
+    # Characters received until then
+    characters = 0
+
+
+T = TypeVar("T")
+
 class ProviderConfig:
+    # Base URLs can be overridden, e.g. to point the harness at src/mock_llm_server.py
     OPEN_ROUTER = {
-        "base_url": "https://openrouter.ai/api/v1",
+        "base_url": os.getenv("OPEN_ROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
         "api_key": OPEN_ROUTER_KEY
     }
     
     LLAMA_CPP = {
-        "base_url": "http://localhost:8080/v1",
+        "base_url": os.getenv("LLAMA_CPP_BASE_URL", "http://localhost:8080/v1"),
         "api_key": "sk-no-key-required"
     }
     
     OLLAMA = {
-        "base_url": "http://localhost:11434/api/generate"
+        "base_url": os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
     }
     
     @staticmethod
     def is_valid_provider(provider: str) -> bool:
         return provider in ["open-router", "llama-cpp", "ollama"]
 
+    @staticmethod
+    def override_base_url(provider: str, base_url: str, api_key: Optional[str] = None) -> None:
+        """Send the requests of a provider to another server; must happen before its first call."""
+        config = {
+            "open-router": ProviderConfig.OPEN_ROUTER,
+            "llama-cpp": ProviderConfig.LLAMA_CPP,
+            "ollama": ProviderConfig.OLLAMA,
+        }[provider]
+        config["base_url"] = base_url
+        if api_key is not None and "api_key" in config:
+            config["api_key"] = api_key
+
 
 async def generate_ollama_response(prompt: str, model: str, **kwargs) -> str:
     """
@@ -85,26 +130,297 @@ def get_client(provider: str) -> AsyncOpenAI:
     return AsyncOpenAI(
         base_url=config["base_url"],
         api_key=config["api_key"],
+        max_retries=0,  # retries are handled by make_completion_call
     )
 
+def configure_streaming(enabled: bool) -> None:
+    """
+    Stream completions that expect a code block and close the stream as soon as
+    the first complete block of the language has arrived. Everything after it
+    would be discarded by extract_code anyway.
+    """
+    global _STREAMING
+    _STREAMING = enabled
+
+
+def configure_completion_cache(cache: Optional[CompletionCache]) -> None:
+    """Record and/or replay completions through cache, None to always query the models."""
+    global _COMPLETION_CACHE
+    _COMPLETION_CACHE = cache
+
+
+# Retries of transient failures (rate limits, timeouts, 5xx) per completion call
+MAX_RETRIES = 5
+
+_TRANSIENT_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+def _parse_retry_after(headers) -> Optional[float]:
+    """
+    Seconds to wait according to Retry-After style headers, or None if absent.
+    Understands retry-after-ms, Retry-After (seconds or HTTP date) and
+    x-ratelimit-reset (epoch seconds or milliseconds, as sent by OpenRouter).
+    """
+    if headers is None:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is not None:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    value = headers.get("x-ratelimit-reset")
+    if value is not None:
+        try:
+            reset = float(value)
+        except ValueError:
+            return None
+        if reset > 1e12:  # milliseconds since the epoch
+            reset /= 1000.0
+        return max(0.0, reset - time.time())
+    return None
+
+
+def _classify_error(err: Exception) -> Tuple[bool, bool, Optional[float]]:
+    """
+    Decide how to handle a failed completion call.
+
+    Returns:
+        Tuple of (transient, rate_limited, retry_after seconds)
+    """
+    response = None
+    status = None
+    if isinstance(err, openai.APIStatusError):
+        response, status = err.response, err.status_code
+    elif isinstance(err, httpx.HTTPStatusError):
+        response, status = err.response, err.response.status_code
+    elif isinstance(err, (openai.APIConnectionError, httpx.TransportError)):
+        return True, False, None  # includes timeouts
+
+    if status is None:
+        return False, False, None
+    retry_after = _parse_retry_after(response.headers if response is not None else None)
+    return status in _TRANSIENT_STATUS_CODES, status == 429, retry_after
+
+
 async def make_completion_call(
     prompt: str,
     provider: str,
     model: str,
+    code_language: Optional[str] = None,
     **kwargs
 ) -> str:
     """
     Asynchronously makes a completion call to a specified provider's model.
+
+    Calls go through adaptive concurrency limiters for the provider and for the
+    model, and transient failures are retried with jittered exponential backoff
+    (or after the delay the provider asked for). With a completion cache
+    configured, completions are recorded and/or replayed from it.
     Args:
         prompt (str): The input prompt to generate a completion for.
         provider (str): The name of the provider to use for the completion.
         model (str): The model identifier to use for the completion.
+        code_language (str, optional): Language of the expected code block; in
+            streaming mode the completion ends right after the first such block.
         **kwargs: Additional keyword arguments to pass to the completion request.
     Returns:
         str: The generated completion text.
     Raises:
+        CompletionCacheMiss: In replay mode, if the completion was never recorded.
         Exception: If the completion call fails or the response is invalid.
     """
+    cache = _COMPLETION_CACHE
+    if cache is None:
+        return await _make_completion_call_with_retries(prompt, provider, model, code_language, **kwargs)
+
+    key = cache.next_key(provider, model, prompt, kwargs)
+    if cache.reads:
+        content = await cache.lookup(key)
+        if content is not None:
+            return content
+        if not cache.writes:
+            raise CompletionCacheMiss(f"No recorded completion for {provider} {model} (sample {key.sample_index})")
+    content = await _make_completion_call_with_retries(prompt, provider, model, code_language, **kwargs)
+    if content is not None:
+        await cache.store(key, kwargs, content)
+    return content
+
+
+async def make_completion_calls(
+    prompt: str,
+    provider: str,
+    model: str,
+    n: int,
+    code_language: Optional[str] = None,
+    on_completion: Optional[Callable[[str], None]] = None,
+    **kwargs
+) -> List[str]:
+    """
+    Request n completions of the same prompt.
+
+    OpenRouter is asked for all n choices in one request (OpenAI `n`), so the
+    prompt is sent and processed once. Missing choices, from models that ignore
+    `n`, are topped up with single calls and such models get single calls from
+    then on. llama.cpp and Ollama have no `n`; they get n parallel single calls,
+    which their parallel slots serve concurrently.
+
+    With a completion cache configured, every choice is recorded and replayed
+    under its own sample index, exactly like n calls of make_completion_call.
+
+    Args:
+        on_completion: Called with each completion as soon as it is available, in
+            streaming mode as soon as its code block is complete, so the caller
+            can start executing it while the other choices are still generated.
+
+    Returns:
+        List of n completion texts, in the order they became available
+    """
+    def deliver(content: str) -> None:
+        if on_completion is not None:
+            on_completion(content)
+
+    if n <= 1:
+        content = await make_completion_call(prompt, provider, model, code_language, **kwargs)
+        deliver(content)
+        return [content]
+
+    cache = _COMPLETION_CACHE
+    if cache is None:
+        return await _make_completion_calls_uncached(prompt, provider, model, n, code_language, deliver, **kwargs)
+
+    keys = [cache.next_key(provider, model, prompt, kwargs) for _ in range(n)]
+    contents: List[str] = []
+    missing = []
+    for key in keys:
+        content = await cache.lookup(key) if cache.reads else None
+        if content is None:
+            missing.append(key)
+        else:
+            contents.append(content)
+            deliver(content)
+    if missing and not cache.writes:
+        raise CompletionCacheMiss(f"No recorded completion for {provider} {model} (sample {missing[0].sample_index})")
+
+    stores: List[asyncio.Future] = []
+
+    def record(content: str) -> None:
+        # Samples are interchangeable, so they take the free sample indices in arrival order
+        key = missing[len(contents) - (n - len(missing))]
+        contents.append(content)
+        if content is not None:
+            stores.append(asyncio.ensure_future(cache.store(key, kwargs, content)))
+        deliver(content)
+
+    if missing:
+        try:
+            await _make_completion_calls_uncached(prompt, provider, model, len(missing), code_language, record, **kwargs)
+        finally:
+            # Completions delivered before a failure stay recorded
+            await asyncio.gather(*stores)
+    return contents
+
+
+async def _make_completion_calls_uncached(
+    prompt: str,
+    provider: str,
+    model: str,
+    n: int,
+    code_language: Optional[str] = None,
+    on_completion: Optional[Callable[[str], None]] = None,
+    **kwargs
+) -> List[str]:
+    contents: List[str] = []
+
+    def deliver(content: str) -> None:
+        if len(contents) < n:
+            contents.append(content)
+            if on_completion is not None:
+                on_completion(content)
+
+    async def single_call() -> None:
+        deliver(await _make_completion_call_with_retries(prompt, provider, model, code_language, **kwargs))
+
+    if provider != "open-router" or (provider, model) in _SINGLE_CHOICE_MODELS:
+        await asyncio.gather(*(single_call() for _ in range(n)))
+        return contents
+
+    if _STREAMING and code_language:
+        # A retry after a broken stream only asks for the choices not delivered yet
+        await _call_with_retries(
+            provider, model, lambda: _stream_multi_completion(prompt, provider, model, n - len(contents), code_language, deliver, **kwargs)
+        )
+        received = len(contents)
+    else:
+        choices = await _call_with_retries(
+            provider, model, lambda: _make_multi_completion_call_once(prompt, provider, model, n, **kwargs)
+        )
+        for content in choices:
+            deliver(content)
+        received = len(choices)
+    if received < n:
+        if received <= 1:
+            _SINGLE_CHOICE_MODELS.add((provider, model))
+        await asyncio.gather(*(single_call() for _ in range(n - len(contents))))
+    return contents
+
+
+async def _make_completion_call_with_retries(
+    prompt: str,
+    provider: str,
+    model: str,
+    code_language: Optional[str] = None,
+    **kwargs
+) -> str:
+    if _STREAMING and code_language:
+        return await _call_with_retries(provider, model, lambda: _stream_completion(prompt, provider, model, code_language, **kwargs))
+    return await _call_with_retries(provider, model, lambda: _make_completion_call_once(prompt, provider, model, **kwargs))
+
+
+async def _call_with_retries(provider: str, model: str, request: Callable[[], Awaitable[T]]) -> T:
+    """Run request under the provider and model limiters, retrying transient failures."""
+    limiters = [get_adaptive_limiter(provider), get_adaptive_limiter(f"{provider}:{model}")]
+
+    for attempt in range(MAX_RETRIES + 1):
+        await pace(provider)
+        # Only the limiters acquired so far are released, also when an acquire is cancelled
+        acquired = []
+        outcome = {"success": False, "cancelled": True}
+        try:
+            for limiter in limiters:
+                await limiter.acquire()
+                acquired.append(limiter)
+            response = await request()
+            outcome = {"success": True}
+            return response
+        except Exception as err:
+            transient, rate_limited, retry_after = _classify_error(err)
+            outcome = {"success": False, "rate_limited": rate_limited, "retry_after": retry_after}
+            if not transient or attempt == MAX_RETRIES:
+                raise
+            delay = retry_after + random.uniform(0, 1) if retry_after is not None else backoff_delay(attempt)
+            print(f"Retrying {provider} {model} in {delay:.1f}s after: {err}")
+        finally:
+            for limiter in acquired:
+                limiter.release(**outcome)
+        await asyncio.sleep(delay)
+
+
+async def _make_completion_call_once(
+    prompt: str,
+    provider: str,
+    model: str,
+    **kwargs
+) -> str:
     if provider == "ollama":
         return await generate_ollama_response(prompt, model, **kwargs)
     
@@ -123,4 +439,141 @@ async def make_completion_call(
             messages=[{"role": "user", "content": prompt}],
             **kwargs
         )
-        return completion.choices[0].message.content
\ No newline at end of file
+        return completion.choices[0].message.content
+
+
+async def _make_multi_completion_call_once(
+    prompt: str,
+    provider: str,
+    model: str,
+    n: int,
+    **kwargs
+) -> List[str]:
+    client = get_client(provider)
+    completion = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        n=n,
+        **kwargs
+    )
+    return [choice.message.content for choice in completion.choices]
+
+
+
+async def _stream_completion(
+    prompt: str,
+    provider: str,
+    model: str,
+    code_language: str,
+    **kwargs
+) -> str:
+    """
+    Stream a completion and close the stream once the first ```code_language block is complete.
+
+    Returns:
+        The text received, ending with the closing fence if a block was found
+    """
+    detector = IncrementalFenceDetector(code_language)
+
+    if provider == "ollama":
+        payload = {"model": model, "prompt": prompt, "stream": True, **kwargs}
+        async with httpx.AsyncClient(timeout=1200.0) as client:
+            async with client.stream("POST", ProviderConfig.OLLAMA["base_url"], json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if detector.feed(data.get("response", "")) or data.get("done"):
+                        break
+    else:
+        client = get_client(provider)
+        if provider == "llama-cpp":
+            stream = await client.completions.create(model=model, prompt=prompt, stream=True, **kwargs)
+        else:  # provider == "open-router"
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+                **kwargs
+            )
+        try:
+            async for chunk in stream:
+                if detector.feed(_chunk_text(chunk)):
+                    break
+        finally:
+            await stream.close()
+
+    StreamStats.streams += 1
+    if detector.complete:
+        StreamStats.stopped_at_code_block += 1
+    StreamStats.characters += len(detector.text)
+    return detector.text
+
+
+async def _stream_multi_completion(
+    prompt: str,
+    provider: str,
+    model: str,
+    n: int,
+    code_language: str,
+    deliver: Callable[[str], None],
+    **kwargs
+) -> None:
+    """
+    Stream n interleaved choices, hand each one to deliver as soon as its code
+    block is complete (or it finished without one), and close the stream once
+    every choice has been delivered.
+
+    Models that ignore `n` deliver fewer than n choices.
+    """
+    client = get_client(provider)
+    detectors = [IncrementalFenceDetector(code_language) for _ in range(n)]
+    delivered = [False] * n
+
+    def deliver_choice(index: int) -> None:
+        delivered[index] = True
+        detector = detectors[index]
+        StreamStats.streams += 1
+        StreamStats.stopped_at_code_block += detector.complete
+        StreamStats.characters += len(detector.text)
+        deliver(detector.text)
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        n=n,
+        stream=True,
+        **kwargs
+    )
+    seen: Set[int] = set()
+    try:
+        async for chunk in stream:
+            for choice in chunk.choices:
+                if choice.index >= n or delivered[choice.index]:
+                    continue
+                seen.add(choice.index)
+                if detectors[choice.index].feed(choice.delta.content or "") or choice.finish_reason is not None:
+                    deliver_choice(choice.index)
+            if all(delivered):
+                break
+    finally:
+        await stream.close()
+    # Choices cut off by the end of the stream
+    for index in sorted(seen):
+        if not delivered[index]:
+            deliver_choice(index)
+
+
+def _chunk_text(chunk) -> str:
+    """Text of a streamed chat or completions chunk (llama.cpp sends it as content)."""
+    content = getattr(chunk, "content", None)
+    if content:
+        return content
+    if not chunk.choices:
+        return ""
+    choice = chunk.choices[0]
+    delta = getattr(choice, "delta", None)
+    if delta is not None:
+        return delta.content or ""
+    return getattr(choice, "text", None) or ""
@@ -0,0 +1,117 @@
+import warnings
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammaln
+
+from src.attempt_stats import RATE_DENOMINATORS
+
+GROUP_LEVELS = ["programming_language", "model"]
+
+
+def pass_at_k(n: np.ndarray, c: np.ndarray, ks: Sequence[int]) -> np.ndarray:
+    """
+    Unbiased pass@k estimator, 1 - C(n - c, k) / C(n, k), for many problems and k at once.
+
+    Computed in log space so large sample counts do not overflow. Problems with
+    fewer than k samples have no estimate and get NaN.
+
+    Args:
+        n: Number of samples per problem
+        c: Number of passing samples per problem
+        ks: Values of k to evaluate
+
+    Returns:
+        Array of shape (len(n), len(ks))
+    """
+    n = np.asarray(n, dtype=float)[:, None]
+    c = np.asarray(c, dtype=float)[:, None]
+    k = np.asarray(ks, dtype=float)[None, :]
+    failures = n - c
+    with np.errstate(invalid="ignore"):
+        log_ratio = gammaln(failures + 1) - gammaln(failures - k + 1) - gammaln(n + 1) + gammaln(n - k + 1)
+        estimate = 1.0 - np.exp(log_ratio)
+    # Fewer failures than k: every draw of k samples contains a pass
+    estimate = np.where(failures < k, 1.0, estimate)
+    estimate = np.where(c == 0, 0.0, estimate)
+    return np.where(n < k, np.nan, estimate)
+
+
+def pass_at_k_table(counts: pd.DataFrame, ks: Sequence[int], column: str = "correct") -> pd.DataFrame:
+    """
+    Mean pass@k over problems per (programming_language, model).
+
+    Args:
+        counts: Output of attempt_stats.per_problem_counts
+        ks: Values of k to evaluate
+        column: Count of passing samples, "correct" for pass@k or "compiled" for compile@k
+
+    Returns:
+        DataFrame indexed by (programming_language, model) with one column per k
+    """
+    estimates = pass_at_k(counts[RATE_DENOMINATORS[column]].to_numpy(), counts[column].to_numpy(), ks)
+    per_problem = pd.DataFrame(estimates, index=counts.index, columns=[f"{_metric_name(column)}@{k}" for k in ks])
+    return per_problem.groupby(level=GROUP_LEVELS, observed=True, sort=True).mean()
+
+
+def bootstrap_pass_at_k(
+    counts: pd.DataFrame,
+    ks: Sequence[int],
+    column: str = "correct",
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Percentile bootstrap confidence intervals of mean pass@k, resampling problems.
+
+    All resamples of a (programming_language, model) group are evaluated at once
+    as a (n_resamples, problems) index matrix over the per-problem estimates.
+
+    Returns:
+        DataFrame indexed by (programming_language, model, k) with estimate, lower
+        and upper, and the confidence in its attrs
+    """
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    estimates = pass_at_k(counts[RATE_DENOMINATORS[column]].to_numpy(), counts[column].to_numpy(), ks)
+    grouped = counts.groupby(level=GROUP_LEVELS, observed=True, sort=True)
+    group_codes = grouped.ngroup().to_numpy()
+    group_keys = grouped.size().index
+
+    rows = []
+    for code, (lang, model) in enumerate(group_keys):
+        group = estimates[group_codes == code]
+        resampled = group[rng.integers(0, len(group), size=(n_resamples, len(group)))]
+        with warnings.catch_warnings():
+            # Groups where no problem has k samples yield all-NaN slices
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            point = np.nanmean(group, axis=0)
+            means = np.nanmean(resampled, axis=1)
+            lower, upper = np.nanquantile(means, [alpha, 1 - alpha], axis=0)
+        for i, k in enumerate(ks):
+            rows.append((lang, model, k, point[i], lower[i], upper[i]))
+
+    intervals = pd.DataFrame(rows, columns=GROUP_LEVELS + ["k", "estimate", "lower", "upper"]).set_index(GROUP_LEVELS + ["k"])
+    intervals.attrs["confidence"] = confidence
+    return intervals
+
+
+def print_pass_at_k_table(intervals: pd.DataFrame, column: str = "correct") -> None:
+    """Print a bootstrap table from bootstrap_pass_at_k, values in percent."""
+    metric = _metric_name(column)
+    confidence = intervals.attrs.get("confidence")
+    interval_label = "CI" if confidence is None else f"{confidence * 100:g}% CI"
+    print(f"\n{metric}@k Statistics:")
+    print("-" * 100)
+    print(f"{'Language':<12} {'Model':<35} {'k':>4} {metric + ' %':>12} {interval_label:>20}")
+    print("-" * 100)
+    for (lang, model, k), row in intervals.iterrows():
+        interval = f"[{row['lower'] * 100:.1f}, {row['upper'] * 100:.1f}]"
+        print(f"{lang:<12} {model:<35} {k:>4d} {row['estimate'] * 100:>11.1f}% {interval:>20}")
+
+
+def _metric_name(column: str) -> str:
+    return {"correct": "pass", "compiled": "compile", "runtime": "run"}.get(column, column)
+
@@ -0,0 +1,181 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable
+
+from src.code_extractor import extract_code
+from src.problem_attempt import generate_zero_shot_completion, evaluate_code
+from src.problem_attempt_result import ProblemAttemptResult
+from src.problem_loader import Problem
+from src.results_writer import ResultWriter
+from src.agent_strategies import agent_attempt_solution, is_agent_model
+
+# Marks the end of the stream flowing through a stage queue
+_DONE = object()
+
+
+@dataclass
+class BenchmarkJob:
+    """One (model, language, problem) combination to attempt."""
+    model: str
+    programming_language: str
+    problem: Problem
+
+
+@dataclass
+class GeneratedCompletion:
+    """Output of the generation stage for zero-shot models."""
+    job: BenchmarkJob
+    content: str
+
+
+@dataclass
+class ExtractedCode:
+    """Output of the extraction stage."""
+    job: BenchmarkJob
+    code: str
+
+
+@dataclass
+class PipelineStats:
+    jobs: int = 0
+    results: int = 0
+    rows_written: int = 0
+
+
+async def _run_stage(inbox: asyncio.Queue, handler: Callable[[Any], Awaitable[None]], workers: int) -> None:
+    """Run `workers` consumers of inbox until each receives _DONE."""
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            await handler(item)
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+async def _close_after(stage: Awaitable[None], outbox: asyncio.Queue, consumers: int) -> None:
+    """Once stage has drained, tell every consumer of outbox that no more items follow."""
+    await stage
+    for _ in range(consumers):
+        await outbox.put(_DONE)
+
+
+async def _run_stages(*stages: Awaitable[None]) -> None:
+    """Run stages concurrently; the first one to fail cancels the others and its error is raised."""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # Without this a failed stage leaves the others running, or blocked on queues it no longer serves
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_pipeline(
+    jobs: Iterable[BenchmarkJob],
+    output_file: str,
+    provider: str,
+    generation_workers: int,
+    execution_workers: int,
+    **kwargs,
+) -> PipelineStats:
+    """
+    Stream jobs through generation -> extraction -> execution -> writing stages.
+
+    Stages are connected by bounded queues, so only a handful of jobs are in
+    memory at any time and a slow stage applies backpressure upstream instead
+    of letting work pile up. Generation and execution have their own worker
+    pools, so a worker waiting on a slow model response never holds execution
+    capacity. Agent models run their whole generate/execute loop in the
+    generation stage and hand a finished result to the writer; their
+    executions share the executor's concurrency limit.
+
+    Args:
+        jobs: The jobs to run, consumed lazily
+        output_file: JSONL file successful attempts are appended to by a single ResultWriter
+        provider: Model provider name
+        generation_workers: Number of model calls in flight (and agent loops running)
+        execution_workers: Number of programs being compiled/run at once
+        **kwargs: Extra arguments passed on to the attempt functions
+
+    Returns:
+        PipelineStats with the number of jobs, results and rows written
+
+    Raises:
+        Exception: The first error raised by a stage, once the other stages are cancelled
+    """
+    stats = PipelineStats()
+    job_queue: asyncio.Queue = asyncio.Queue(maxsize=generation_workers)
+    completion_queue: asyncio.Queue = asyncio.Queue(maxsize=execution_workers)
+    code_queue: asyncio.Queue = asyncio.Queue(maxsize=execution_workers)
+    result_queue: asyncio.Queue = asyncio.Queue(maxsize=generation_workers + execution_workers)
+
+    async def feed():
+        for job in jobs:
+            stats.jobs += 1
+            await job_queue.put(job)
+        for _ in range(generation_workers):
+            await job_queue.put(_DONE)
+
+    async def generate(job: BenchmarkJob):
+        print(f"Processing {job.model} {job.programming_language} {job.problem.problem_id}")
+        try:
+            if is_agent_model(job.model):
+                result = await agent_attempt_solution(
+                    model=job.model,
+                    programming_language=job.programming_language,
+                    problem=job.problem,
+                    provider=provider,
+                    **kwargs,
+                )
+                await result_queue.put(result)
+                return
+            content = await generate_zero_shot_completion(job.model, job.problem, job.programming_language, provider)
+        except Exception as e:
+            print(f"Exception, model {job.model}, programming_language {job.programming_language}")
+            print(f"Exception: {e}")
+            await result_queue.put(ProblemAttemptResult.from_exception(
+                error_message=str(e),
+                problem_id=job.problem.problem_id,
+                model=job.model,
+                programming_language=job.programming_language,
+            ))
+            return
+        await completion_queue.put(GeneratedCompletion(job, content))
+
+    async def extract(completion: GeneratedCompletion):
+        job = completion.job
+        code = extract_code(completion.content or "", job.programming_language)
+        if code is None:
+            await result_queue.put(ProblemAttemptResult.from_exception(
+                error_message="No code could be extracted from the completion",
+                problem_id=job.problem.problem_id,
+                model=job.model,
+                programming_language=job.programming_language,
+            ))
+            return
+        await code_queue.put(ExtractedCode(job, code))
+
+    async def execute(extracted: ExtractedCode):
+        job = extracted.job
+        result = await evaluate_code(job.model, job.problem, job.programming_language, extracted.code)
+        await result_queue.put(result)
+
+    async def write(result: ProblemAttemptResult):
+        stats.results += 1
+        if result.success:
+            await writer.write(result.to_writable_dict())
+            print(f"Success {result.model} {result.programming_language} {result.problem_id}")
+
+    async with ResultWriter(output_file) as writer:
+        await _run_stages(
+            feed(),
+            _close_after(_run_stage(job_queue, generate, generation_workers), completion_queue, 1),
+            _close_after(_run_stage(completion_queue, extract, 1), code_queue, execution_workers),
+            _close_after(_run_stage(code_queue, execute, execution_workers), result_queue, 1),
+            _run_stage(result_queue, write, 1),
+        )
+    stats.rows_written = writer.rows_written
+    return stats
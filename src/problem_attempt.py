@@ -1,10 +1,11 @@
 from src.model_api import make_completion_call
 from src.prompt_manager import get_prompt
-from src.jdoodle_executor import execute_code
+from src.executor import execute_code
 from src.code_extractor import extract_code
-from src.simple_agent import agent_attempt_solution
+from src.agent_strategies import agent_attempt_solution, is_agent_model
 from src.problem_attempt_result import ProblemAttemptResult
 from src.problem_loader import Problem
+from src.staged_evaluation import build_result, run_example, staged_evaluation_enabled
 
 
 async def attempt_problem(
@@ -20,7 +21,7 @@ async def attempt_problem(
         provider: OpenRouter or Llama.cpp
     """
 
-    if model.startswith("agent"):
+    if is_agent_model(model):
         return await agent_attempt_solution(
             model=model,
             programming_language=programming_language,
@@ -54,20 +55,67 @@ async def attempt_zero_shot_solution(
     """
 
     try:
-        prompt = get_prompt(programming_language, problem)
-        content = await make_completion_call(prompt, provider, model=model)
+        content = await generate_zero_shot_completion(model, problem, programming_language, provider)
+    except Exception as e:
+        return _exception_result(e, model, problem, programming_language)
+    return await evaluate_completion(model, problem, programming_language, content)
+
+
+async def generate_zero_shot_completion(
+    model: str, problem: Problem, programming_language: str, provider: str, **kwargs
+) -> str:
+    """
+    Generation step of a zero-shot attempt: prompt the model for a solution.
+
+    Returns:
+        The raw completion text
+    """
+    prompt = get_prompt(programming_language, problem)
+    return await make_completion_call(prompt, provider, model=model, code_language=programming_language, **kwargs)
+
+
+async def evaluate_completion(
+    model: str, problem: Problem, programming_language: str, content: str
+) -> ProblemAttemptResult:
+    """
+    Extract the code from a completion, execute it on the problem input and grade it.
 
+    Returns:
+        A ProblemAttemptResult instance representing the result of the attempt
+    """
+    try:
         code = extract_code(content, programming_language)
-        if code is None:
-            return ProblemAttemptResult.from_exception(
-                error_message="No code could be extracted from the completion",
-                problem_id=problem.problem_id,
-                model=model,
-                programming_language=programming_language,
-            )
+    except Exception as e:
+        return _exception_result(e, model, problem, programming_language)
+    if code is None:
+        return ProblemAttemptResult.from_exception(
+            error_message="No code could be extracted from the completion",
+            problem_id=problem.problem_id,
+            model=model,
+            programming_language=programming_language,
+        )
+    return await evaluate_code(model, problem, programming_language, code)
+
+
+async def evaluate_code(
+    model: str, problem: Problem, programming_language: str, code: str
+) -> ProblemAttemptResult:
+    """
+    Execute extracted code on the problem input and grade the output.
+
+    With staged evaluation, the code is run on the example first and a program
+    that fails it is not run on the full input; its result is incorrect and
+    has no runtime verdict.
 
-        problem_input = problem.input
-        api_response = await execute_code(code, programming_language, problem_input)
+    Returns:
+        A ProblemAttemptResult instance representing the result of the attempt
+    """
+    try:
+        api_response = None
+        if staged_evaluation_enabled():
+            api_response = await run_example(code, programming_language, problem)
+        if api_response is None:
+            api_response = await execute_code(code, programming_language, problem.input)
         if api_response.status == "failed":
             return ProblemAttemptResult.from_exception(
                 error_message=api_response.error_message or "",
@@ -77,21 +125,20 @@ async def attempt_zero_shot_solution(
                 code=code,
             )
         else:
-            return ProblemAttemptResult.build_from_api_response(
-                problem=problem,
-                model=model,
-                programming_language=programming_language,
-                api_response=api_response,
-                code=code,
-            )
+            return build_result(problem, model, programming_language, api_response, code)
 
     except Exception as e:
-        print(f"Exception, model {model}, programming_language {programming_language}")
-        print(f"Exception: {e}")
-        return ProblemAttemptResult.from_exception(
-            error_message=str(e),
-            problem_id=problem.problem_id,
-            model=model,
-            programming_language=programming_language,
-        )
+        return _exception_result(e, model, problem, programming_language)
 
+
+def _exception_result(
+    e: Exception, model: str, problem: Problem, programming_language: str
+) -> ProblemAttemptResult:
+    print(f"Exception, model {model}, programming_language {programming_language}")
+    print(f"Exception: {e}")
+    return ProblemAttemptResult.from_exception(
+        error_message=str(e),
+        problem_id=problem.problem_id,
+        model=model,
+        programming_language=programming_language,
+    )
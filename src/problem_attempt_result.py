@@ -9,7 +9,8 @@ class ProblemAttemptResult:
     programming_language: str
     model: str
     compilation_success: bool
-    runtime_success: bool
+    # None when the program was never run on the full input (it failed the example under staged evaluation)
+    runtime_success: Optional[bool]
     problem_correct: bool
     success: bool
     output: Optional[str]
@@ -83,6 +84,47 @@ class ProblemAttemptResult:
             code=code,
         )
 
+    @classmethod
+    def from_example_failure(
+        cls,
+        problem: Problem,
+        model: str,
+        programming_language: str,
+        api_response: ExecuteCodeResponse,
+        code: Optional[str] = None,
+    ) -> "ProblemAttemptResult":
+        """
+        Creates a ProblemAttemptResult for a program that failed the example and was never run on the full input.
+
+        Compilation does not depend on the input, so the example run's compilation
+        verdict is kept. The runtime verdict is left empty rather than filled from
+        the example run; statistics leave it out of the runtime rate.
+
+        Args:
+            problem: The problem attempted
+            model: The model used
+            programming_language: The programming language used
+            api_response: The response of the run on the example input
+            code: Optional code that was executed
+
+        Returns:
+            A ProblemAttemptResult that is not correct and has no runtime verdict
+        """
+        example_output = clean_output(api_response.output or "")
+        return cls(
+            problem_id=problem.problem_id,
+            programming_language=programming_language,
+            model=model,
+            compilation_success=bool(api_response.isCompiled) or api_response.compilationStatus == 0,
+            runtime_success=None,
+            problem_correct=False,
+            success=True,
+            output=None,
+            code_errors=example_output or None,
+            attempt_error="Failed the example, not run on the full input",
+            code=code,
+        )
+
     @classmethod
     def from_exception(
         cls,
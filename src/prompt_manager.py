@@ -62,7 +62,7 @@ The code produced the following output:
 And the following error:
 
 {error}
-
+{example_feedback}
 Please correct the code and try again.
 Your response should only contain a single code block containing the whole corrected code.
 Do not write only the changes, write the whole code block.
@@ -125,16 +125,35 @@ def get_prompt_aoc(programming_language: str, problem: Problem) -> str:
     return language_prompt + "\n" + problem_statement
 
 
-def get_correction_prompt(programming_language: str, problem:  Problem, code: str, api_response: ExecuteCodeResponse) -> str:
+example_feedback_prompt = """
+The code was run on the example input:
+
+{example_input}
+
+The expected output was:
+
+{expected_output}
+"""
+
+def get_correction_prompt(programming_language: str, problem:  Problem, code: str, api_response: ExecuteCodeResponse, expected_output: Optional[str] = None) -> str:
     output = api_response.output or ""
     error = api_response.error_message or ""
 
     problem_statement = problem.problem_statement
 
+    # Set when the code was run on the example input, so the model can compare outputs
+    example_feedback = ""
+    if expected_output is not None:
+        example_feedback = example_feedback_prompt.format(
+            example_input=problem.example_input,
+            expected_output=expected_output
+        )
+
     return correction_prompt.format(
         problem_statement=problem_statement,
         programming_language=programming_language,
         code=code,
         output=output,
-        error=error
+        error=error,
+        example_feedback=example_feedback
     )
\ No newline at end of file
@@ -0,0 +1,189 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows `rate` acquisitions per second on average with
+    bursts of up to `burst`. Waiting callers sleep on the event loop instead of
+    blocking it, and are served in the order they arrived.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Reserve a token now (possibly going into debt) so later callers queue behind us
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+# Token buckets by name, e.g. the provider name or "executor:jdoodle"
+_BUCKETS: Dict[str, TokenBucket] = {}
+
+
+def configure_rate_limit(name: str, rate: Optional[float], burst: int = 1) -> None:
+    """
+    Set the requests per second allowed for name. A rate of None or <= 0 removes the limit.
+    """
+    if rate is None or rate <= 0:
+        _BUCKETS.pop(name, None)
+    else:
+        _BUCKETS[name] = TokenBucket(rate, burst)
+
+
+def executor_limit_name(backend: str) -> str:
+    return f"executor:{backend}"
+
+
+async def pace(name: str) -> None:
+    """Wait until the bucket for name allows another request (no-op if unlimited)."""
+    bucket = _BUCKETS.get(name)
+    if bucket is not None:
+        await bucket.acquire()
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter for one provider or model.
+
+    The number of requests allowed in flight grows by roughly one per window of
+    successful requests and is halved when the upstream signals rate limiting.
+    A Retry-After hint pauses new requests until it has elapsed. Request counts
+    and the recent request rate are tracked for reporting.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        rate_window: float = 60.0,
+    ):
+        self.name = name
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(min_concurrency, max_concurrency)
+        self.limit = float(min(max(initial_concurrency, min_concurrency), self.max_concurrency))
+        self.rate_window = rate_window
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._recent_requests: Deque[float] = deque()
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self) -> None:
+        """Wait for a free slot (and for any Retry-After pause to end), then take it."""
+        while True:
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            if self.in_flight < int(self.limit):
+                break
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        self._record_request()
+
+    def release(self, success: bool, rate_limited: bool = False, retry_after: Optional[float] = None, cancelled: bool = False) -> None:
+        """
+        Give back a slot and adapt the limit to the outcome of the request.
+
+        Args:
+            success: Whether the request succeeded
+            rate_limited: Whether the upstream rejected the request for exceeding its rate limits
+            retry_after: Seconds the upstream asked us to wait before the next request
+            cancelled: The request was abandoned by us, the limit is left unchanged
+        """
+        self.in_flight -= 1
+        now = time.monotonic()
+        if cancelled:
+            pass
+        elif success:
+            self.successes += 1
+            self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+        elif rate_limited:
+            self.rate_limited += 1
+            # Requests already in flight when we got throttled fail together, halve only once for them
+            if now - self._last_decrease > 1.0:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._last_decrease = now
+        else:
+            self.errors += 1
+        if retry_after is not None and retry_after > 0:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        # Every waiter re-checks the limit, so a wake-up is never lost to a cancelled waiter
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    def _record_request(self) -> None:
+        now = time.monotonic()
+        self.requests += 1
+        self._recent_requests.append(now)
+        while self._recent_requests and self._recent_requests[0] < now - self.rate_window:
+            self._recent_requests.popleft()
+
+    def request_rate(self) -> float:
+        """Requests per second over the last rate_window seconds."""
+        now = time.monotonic()
+        while self._recent_requests and self._recent_requests[0] < now - self.rate_window:
+            self._recent_requests.popleft()
+        return len(self._recent_requests) / self.rate_window
+
+    def summary(self) -> str:
+        return (
+            f"{self.name}: {self.requests} requests, {self.rate_limited} rate limited, "
+            f"{self.errors} errors, concurrency {int(self.limit)}, {self.request_rate():.2f} req/s"
+        )
+
+
+# Adaptive limiters by name ("<provider>" and "<provider>:<model>") and the settings new ones start with
+_ADAPTIVE_LIMITERS: Dict[str, AdaptiveLimiter] = {}
+_ADAPTIVE_SETTINGS = {"initial_concurrency": 8, "max_concurrency": 64}
+
+
+def configure_adaptive_limits(initial_concurrency: int, max_concurrency: int) -> None:
+    """Set the starting and maximum concurrency of adaptive limiters created from now on."""
+    _ADAPTIVE_SETTINGS["initial_concurrency"] = initial_concurrency
+    _ADAPTIVE_SETTINGS["max_concurrency"] = max_concurrency
+
+
+def get_adaptive_limiter(name: str) -> AdaptiveLimiter:
+    limiter = _ADAPTIVE_LIMITERS.get(name)
+    if limiter is None:
+        limiter = AdaptiveLimiter(name, **_ADAPTIVE_SETTINGS)
+        _ADAPTIVE_LIMITERS[name] = limiter
+    return limiter
+
+
+def adaptive_limiters() -> List[AdaptiveLimiter]:
+    return [_ADAPTIVE_LIMITERS[name] for name in sorted(_ADAPTIVE_LIMITERS)]
+
+
+def backoff_delay(attempt: int, base: float = 1.0, maximum: float = 60.0) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
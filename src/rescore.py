@@ -0,0 +1,174 @@
+import argparse
+import asyncio
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from src.incremental_stats import state_path
+from src.problem_attempt_result import clean_output, compare_outputs
+from src.problem_loader import load_aoc_problems, load_problems
+from src.results_index import index_path
+
+DEFAULT_CHUNK_LINES = 5000
+
+# Expected outputs by problem_id, set in every worker process by _init_worker
+_EXPECTED: Dict[str, str] = {}
+
+# (programming_language, model, old problem_correct, new problem_correct) -> rows
+Transitions = Counter
+
+
+def _init_worker(expected: Dict[str, str]) -> None:
+    global _EXPECTED
+    _EXPECTED = expected
+
+
+def _rescore_chunk(lines: List[bytes]) -> Tuple[List[bytes], Transitions, int]:
+    """
+    Re-grade a chunk of result rows with the current clean_output and compare_outputs.
+
+    Unchanged rows are passed through byte for byte; rows of unknown problems
+    and unparseable lines are kept as they are.
+
+    Returns:
+        Tuple of (output lines, verdict transitions, rows of unknown problems)
+    """
+    out_lines = []
+    transitions: Transitions = Counter()
+    unknown = 0
+    for line in lines:
+        try:
+            row = json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            out_lines.append(line)
+            continue
+        expected = _EXPECTED.get(row.get("problem_id"))
+        if expected is None:
+            unknown += 1
+            out_lines.append(line)
+            continue
+
+        old_correct = bool(row.get("problem_correct"))
+        output = row.get("output")
+        if row.get("runtime_success") and output is not None:
+            output = clean_output(output)
+            new_correct = compare_outputs(output, expected)
+        else:
+            new_correct = False
+        transitions[(row.get("programming_language"), row.get("model"), old_correct, new_correct)] += 1
+
+        if new_correct == old_correct and output == row.get("output"):
+            out_lines.append(line)
+            continue
+        row["problem_correct"] = new_correct
+        row["output"] = output
+        out_lines.append(json.dumps(row).encode("utf-8") + b"\n")
+    return out_lines, transitions, unknown
+
+
+def _read_chunks(results_file: str, chunk_lines: int) -> Iterator[List[bytes]]:
+    chunk = []
+    with open(results_file, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def load_expected_outputs() -> Dict[str, str]:
+    """Expected outputs of all misc and Advent of Code problems by problem_id."""
+    problems = await load_problems() + await load_aoc_problems()
+    return {problem.problem_id: problem.output for problem in problems}
+
+
+def rescore_file(
+    results_file: str,
+    output_file: str,
+    expected: Dict[str, str],
+    workers: Optional[int] = None,
+    chunk_lines: int = DEFAULT_CHUNK_LINES,
+) -> Tuple[Transitions, int]:
+    """
+    Stream results_file through a process pool and write the re-graded rows, in
+    order, to output_file.
+
+    At most two chunks per worker are in flight, so memory stays constant
+    whatever the size of the file.
+
+    Returns:
+        Tuple of (verdict transitions, rows of unknown problems)
+    """
+    workers = workers or os.cpu_count() or 1
+    transitions: Transitions = Counter()
+    unknown = 0
+    pending: Deque[Future] = deque()
+
+    def drain_one(out) -> None:
+        nonlocal unknown
+        lines, chunk_transitions, chunk_unknown = pending.popleft().result()
+        out.writelines(lines)
+        transitions.update(chunk_transitions)
+        unknown += chunk_unknown
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(expected,)) as pool, open(output_file, "wb") as out:
+        for chunk in _read_chunks(results_file, chunk_lines):
+            pending.append(pool.submit(_rescore_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                drain_one(out)
+        while pending:
+            drain_one(out)
+    return transitions, unknown
+
+
+def print_diff_summary(transitions: Transitions, unknown: int) -> None:
+    """Print verdict changes per (language, model) and overall."""
+    per_model: Dict[Tuple[str, str], Counter] = {}
+    for (lang, model, old, new), rows in transitions.items():
+        counts = per_model.setdefault((lang, model), Counter())
+        counts["rows"] += rows
+        counts["correct_before"] += rows if old else 0
+        counts["correct_after"] += rows if new else 0
+        if old != new:
+            counts["now_correct" if new else "now_wrong"] += rows
+
+    print("\nRescoring Changes:")
+    print("-" * 100)
+    print(f"{'Language':<12} {'Model':<35} {'Rows':>8} {'Before':>8} {'After':>8} {'Fixed':>8} {'Broken':>8}")
+    print("-" * 100)
+    totals: Counter = Counter()
+    for (lang, model), counts in sorted(per_model.items(), key=lambda item: (str(item[0][0]), str(item[0][1]))):
+        totals.update(counts)
+        print(f"{str(lang):<12} {str(model):<35} {counts['rows']:>8d} {counts['correct_before']:>8d} {counts['correct_after']:>8d} {counts['now_correct']:>8d} {counts['now_wrong']:>8d}")
+    print("-" * 100)
+    print(f"{'Total':<48} {totals['rows']:>8d} {totals['correct_before']:>8d} {totals['correct_after']:>8d} {totals['now_correct']:>8d} {totals['now_wrong']:>8d}")
+    if unknown:
+        print(f"{unknown} rows of problems without an expected output were left unchanged")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-grade stored outputs of a results file with the current grader")
+    parser.add_argument("results_file", type=str, help="Results JSONL file")
+    parser.add_argument("-o", "--output_file", type=str, default=None, help="Re-graded results file, defaults to <results_file>.rescored.jsonl")
+    parser.add_argument("--in_place", action="store_true", help="Replace the results file with the re-graded one")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes, defaults to the number of CPUs")
+    parser.add_argument("--chunk_lines", type=int, default=DEFAULT_CHUNK_LINES, help="Rows sent to a worker at a time")
+    args = parser.parse_args()
+
+    output_file = args.output_file or (args.results_file + ".tmp" if args.in_place else args.results_file + ".rescored.jsonl")
+    transitions, unknown = rescore_file(args.results_file, output_file, asyncio.run(load_expected_outputs()), args.workers, args.chunk_lines)
+    if args.in_place:
+        os.replace(output_file, args.results_file)
+        # Byte offsets of rewritten rows moved, the sidecar files are rebuilt on next use
+        for sidecar in (index_path(args.results_file), state_path(args.results_file)):
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+        output_file = args.results_file
+    print_diff_summary(transitions, unknown)
+    print(f"Re-graded results written to {output_file}")
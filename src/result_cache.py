@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Any, Callable, Optional, TypeVar
+
+from src.compile_cache import source_digest
+from src.jdoodle_executor import ExecuteCodeResponse
+
+DEFAULT_RESULT_CACHE_PATH = ".cache/results.sqlite"
+
+T = TypeVar("T")
+
+
+def is_cacheable(response: ExecuteCodeResponse) -> bool:
+    """
+    Only deterministic verdicts are memoized: successful runs and compile errors.
+    Transport failures, timeouts and crashes may not repeat, so they are re-run.
+    """
+    if response.status != "success":
+        return False
+    return bool(response.isExecutionSuccess) or response.isCompiled is False
+
+
+class ResultCache:
+    """
+    SQLite memo of execution responses keyed on (backend, language, version,
+    normalized source hash, stdin hash). The stored response keeps the cpuTime
+    and memory measured on the original run.
+
+    Queries and the hashing of (possibly large) inputs run on a thread owned by
+    the cache, so they never block the event loop. Being the only thread using
+    the connection, it also serializes the sqlite calls.
+    """
+
+    def __init__(self, path: str = DEFAULT_RESULT_CACHE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="result-cache")
+        # Created here, used only on self._thread from now on
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                backend TEXT NOT NULL,
+                programming_language TEXT NOT NULL,
+                version_index TEXT NOT NULL,
+                compile_only INTEGER NOT NULL,
+                source_hash TEXT NOT NULL,
+                stdin_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (backend, programming_language, version_index, compile_only, source_hash, stdin_hash)
+            )
+            """
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _key(backend: str, programming_language: str, version_index: Optional[str], compile_only: bool, code: str, input_data: str) -> tuple:
+        source_hash = source_digest(code)
+        stdin_hash = hashlib.sha256(input_data.encode("utf-8")).hexdigest()
+        return backend, programming_language, version_index or "", int(compile_only), source_hash, stdin_hash
+
+    async def _run(self, function: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._thread, function, *args)
+
+    async def lookup(
+        self,
+        backend: str,
+        programming_language: str,
+        version_index: Optional[str],
+        compile_only: bool,
+        code: str,
+        input_data: str,
+    ) -> Optional[ExecuteCodeResponse]:
+        """Return the memoized response for this program and input, if any."""
+        return await self._run(self._lookup, backend, programming_language, version_index, compile_only, code, input_data)
+
+    def _lookup(
+        self,
+        backend: str,
+        programming_language: str,
+        version_index: Optional[str],
+        compile_only: bool,
+        code: str,
+        input_data: str,
+    ) -> Optional[ExecuteCodeResponse]:
+        row = self._connection.execute(
+            """
+            SELECT response FROM results
+            WHERE backend = ? AND programming_language = ? AND version_index = ?
+              AND compile_only = ? AND source_hash = ? AND stdin_hash = ?
+            """,
+            self._key(backend, programming_language, version_index, compile_only, code, input_data),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return ExecuteCodeResponse(**json.loads(row[0]))
+
+    async def store(
+        self,
+        backend: str,
+        programming_language: str,
+        version_index: Optional[str],
+        compile_only: bool,
+        code: str,
+        input_data: str,
+        response: ExecuteCodeResponse,
+    ) -> None:
+        """Memoize a response if its verdict is deterministic."""
+        if not is_cacheable(response):
+            return
+        await self._run(self._store, backend, programming_language, version_index, compile_only, code, input_data, response)
+
+    def _store(
+        self,
+        backend: str,
+        programming_language: str,
+        version_index: Optional[str],
+        compile_only: bool,
+        code: str,
+        input_data: str,
+        response: ExecuteCodeResponse,
+    ) -> None:
+        key = self._key(backend, programming_language, version_index, compile_only, code, input_data)
+        self._connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            key + (json.dumps(asdict(response)), time.time()),
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        self._thread.submit(self._connection.close).result()
+        self._thread.shutdown()
@@ -0,0 +1,106 @@
+import json
+import os
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# Sidecar file next to a results JSONL file, e.g. results/merged.jsonl.keys
+INDEX_SUFFIX = ".keys"
+
+ResultKey = Tuple[str, str, str]
+
+
+def index_path(results_file: str) -> str:
+    return results_file + INDEX_SUFFIX
+
+
+def result_key(row: Dict[str, Any]) -> ResultKey:
+    """The (model, problem_id, programming_language) key a resumed run skips on."""
+    return row.get("model"), row.get("problem_id"), row.get("programming_language")
+
+
+def format_index_lines(entries: Iterable[Tuple[int, ResultKey]]) -> str:
+    """
+    Index lines for rows of the results file. Each line holds the byte offset
+    where the row ends in the results file and its key as a JSON list.
+    """
+    return "".join(f"{end}\t{json.dumps(list(key))}\n" for end, key in entries)
+
+
+def _read_index(index_file: str) -> Tuple[Set[ResultKey], int, bool]:
+    """Keys in the index, the offset of the results file it covers and whether every line was intact."""
+    keys = set()
+    covered = 0
+    with open(index_file, "r") as f:
+        for line in f:
+            end, sep, key = line.rstrip("\n").partition("\t")
+            if not sep or not line.endswith("\n"):
+                return keys, covered, False
+            try:
+                keys.add(tuple(json.loads(key)))
+                covered = int(end)
+            except ValueError:
+                return keys, covered, False
+    return keys, covered, True
+
+
+def _index_matches(results_file: str, covered: int) -> bool:
+    """The index is usable if it ends on a line boundary inside the results file."""
+    if covered == 0:
+        return True
+    if covered > os.path.getsize(results_file):
+        return False
+    with open(results_file, "rb") as f:
+        f.seek(covered - 1)
+        return f.read(1) == b"\n"
+
+
+def sync_index(results_file: str) -> Set[ResultKey]:
+    """
+    Bring the sidecar index up to date with the results file and return all keys.
+
+    Only rows appended after the last indexed offset are parsed, so the cost of a
+    resume does not depend on how much code and output the results file holds.
+    The index is rebuilt from scratch if it does not match the results file
+    (e.g. the file was truncated or replaced).
+
+    Args:
+        results_file: Path to the JSONL results file
+
+    Returns:
+        Set of (model, problem_id, programming_language) tuples in the results file
+    """
+    index_file = index_path(results_file)
+    if not os.path.exists(results_file):
+        if os.path.exists(index_file):
+            os.remove(index_file)
+        return set()
+
+    keys: Set[ResultKey] = set()
+    covered = 0
+    if os.path.exists(index_file):
+        keys, covered, intact = _read_index(index_file)
+        if not intact or not _index_matches(results_file, covered):
+            keys, covered = set(), 0
+
+    new_entries: List[Tuple[int, ResultKey]] = []
+    with open(results_file, "rb") as f:
+        f.seek(covered)
+        offset = covered
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # row still being written
+            offset += len(line)
+            try:
+                key = result_key(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
+                # Skip malformed JSON lines
+                continue
+            keys.add(key)
+            new_entries.append((offset, key))
+
+    if covered == 0:
+        with open(index_file, "w") as f:
+            f.write(format_index_lines(new_entries))
+    elif new_entries:
+        with open(index_file, "a") as f:
+            f.write(format_index_lines(new_entries))
+    return keys
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.results_index import ResultKey, format_index_lines, index_path, result_key, sync_index
+
+# Marks the end of the stream of rows sent to the writer
+_CLOSE = object()
+
+
+class ResultWriter:
+    """
+    Single writer task appending JSONL rows to a results file.
+
+    Rows are queued by any number of producers and written in batches: a batch
+    is flushed when it reaches batch_size rows or when flush_interval seconds
+    have passed since its first row. Each batch goes to the file in one
+    O_APPEND write, so lines are never interleaved with other writers, and the
+    file is fsynced every checkpoint_rows rows and on close. The sidecar key
+    index used by resumed runs is kept up to date after every batch.
+
+    If writing fails, the writer task stops and the error is raised by the
+    pending and all later calls to write() and close(), so producers never
+    block on a queue nobody reads any more.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        checkpoint_rows: int = 1000,
+        queue_size: int = 1024,
+    ):
+        self.filename = filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint_rows = checkpoint_rows
+        self.queue_size = queue_size
+        self.rows_written = 0
+        self._rows_since_checkpoint = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._fd: Optional[int] = None
+        self._index_fd: Optional[int] = None
+        self._error: Optional[BaseException] = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        # Index rows written before this run, so our offsets extend a complete index
+        sync_index(self.filename)
+        self._index_fd = os.open(index_path(self.filename), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def write(self, row: Dict[str, Any]) -> None:
+        """Queue a row for writing; waits if the writer is falling behind."""
+        await self._put(row)
+
+    async def close(self) -> None:
+        """Flush everything queued so far, fsync and close the file."""
+        if self._task is None:
+            return
+        try:
+            await self._put(_CLOSE)
+            await self._task
+            self._raise_error()
+            os.fsync(self._fd)
+        finally:
+            self._task.cancel()
+            self._task = None
+            os.close(self._fd)
+            os.close(self._index_fd)
+            self._fd = None
+            self._index_fd = None
+
+    async def __aenter__(self) -> "ResultWriter":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _put(self, item: Any) -> None:
+        """Queue item, or raise the error of the writer task if it failed before or while we waited."""
+        self._raise_error()
+        if not self._queue.full():
+            self._queue.put_nowait(item)
+            return
+        put = asyncio.ensure_future(self._queue.put(item))
+        try:
+            await asyncio.wait([put, self._task], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            put.cancel()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self) -> None:
+        try:
+            await self._write_rows()
+        except Exception as err:
+            self._error = err
+
+    async def _write_rows(self) -> None:
+        batch: List[Tuple[str, ResultKey]] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                row = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                row = None
+
+            if row is _CLOSE:
+                self._flush(batch)
+                return
+            if row is not None:
+                batch.append((json.dumps(row) + "\n", result_key(row)))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if len(batch) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+                deadline = None
+
+    def _flush(self, batch: List[Tuple[str, ResultKey]]) -> None:
+        if not batch:
+            return
+        encoded = [line.encode("utf-8") for line, _ in batch]
+        data = b"".join(encoded)
+        # A single write on an O_APPEND descriptor keeps whole lines together
+        _write_all(self._fd, data)
+
+        end = os.lseek(self._fd, 0, os.SEEK_CUR)
+        entries = []
+        offset = end - len(data)
+        for line, (_, key) in zip(encoded, batch):
+            offset += len(line)
+            entries.append((offset, key))
+        _write_all(self._index_fd, format_index_lines(entries).encode("utf-8"))
+        self.rows_written += len(batch)
+        self._rows_since_checkpoint += len(batch)
+        if self._rows_since_checkpoint >= self.checkpoint_rows:
+            os.fsync(self._fd)
+            self._rows_since_checkpoint = 0
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    # os.write is one syscall; loop only in the rare case the kernel accepts a partial write
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
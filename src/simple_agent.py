@@ -1,120 +1,215 @@
-from typing import Optional, Any, Dict, Tuple, List
+from typing import Optional, Any, Dict, Tuple, List, Sequence
 import asyncio
-from src.jdoodle_executor import ExecuteCodeResponse, execute_code
+import time
+from collections import Counter
+from dataclasses import dataclass
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.executor import execute_code
 from src.code_extractor import extract_code
 from src.problem_attempt_result import ProblemAttemptResult
-from src.prompt_manager import get_correction_prompt, get_prompt
-from src.model_api import make_completion_call
+from src.model_api import make_completion_calls
 from src.problem_loader import Problem
+from src.staged_evaluation import ExampleFailureResponse, build_result, has_example, passes_example
 
-# Default configuration values
-DEFAULT_MAX_ATTEMPTS = 5
-DEFAULT_MIN_CORRECT = 1
-DEFAULT_INITIAL_ATTEMPTS = 3
+# Rough size of a token, used to estimate the tokens of prompts and completions
+CHARS_PER_TOKEN = 4
 
-async def agent_attempt_solution(
+class AgentStats:
+    """Agent samples requested over the run, and those cut short once a round was decided."""
+    samples = 0
+    rounds_stopped_early = 0
+    generations_cancelled = 0
+    executions_cancelled = 0
+
+@dataclass
+class AgentCost:
+    """Model calls, estimated tokens and executor wall-clock seconds spent by an agent."""
+    calls: int = 0
+    tokens: int = 0
+    executor_seconds: float = 0.0
+
+    def add(self, other: "AgentCost") -> None:
+        self.calls += other.calls
+        self.tokens += other.tokens
+        self.executor_seconds += other.executor_seconds
+
+async def attempt_round(
     model: str,
+    requests: List[Tuple[str, int]],
     programming_language: str,
     problem: Problem,
     provider: str,
-    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
-    min_correct: int = DEFAULT_MIN_CORRECT,
-    initial_attempts: int = DEFAULT_INITIAL_ATTEMPTS,
+    needed: Optional[int],
+    staged: bool = False,
+    cost: Optional[AgentCost] = None,
+    prior_successes: Sequence[Tuple[str, ExecuteCodeResponse]] = (),
     **kwargs
-) -> ProblemAttemptResult:
+) -> List[Tuple[bool, Optional[str], Optional[ExecuteCodeResponse]]]:
     """
-    Attempt to solve a programming problem using an LLM API.
-    
+    Generate and execute the samples of one agent round, handling each result as it arrives.
+
+    Every (prompt, n) request is sent as one call of n samples, and each sample is
+    handed to the executor as soon as its completion arrives, so compiling one
+    sample overlaps with generating the others.
+
+    The round is decided once `needed` samples ran successfully and the majority
+    vote of get_final_result can no longer change: the leading output has more
+    votes than the runner-up would have if every pending sample voted for it.
+    Outstanding generation and execution are then cancelled and counted in
+    AgentStats. With needed None every sample is run.
+
     Args:
-        client: The API client instance
-        model: The model identifier string
-        programming_language: Target programming language
-        problem: Dictionary containing problem details
-        max_attempts: Maximum number of retry attempts
-        min_correct: Minimum number of successful evaluations needed
-        initial_attempts: Number of initial attempts to generate code
-        **kwargs: Additional keyword arguments for API calls
+        staged: Run each sample on the example of the problem first and only on the full input if it passes
+        cost: Accumulates the calls, estimated tokens and executor seconds of the round;
+            samples cancelled before their completion arrived are not charged
+        prior_successes: Successful attempts of earlier rounds, which vote as well
     
     Returns:
-        ProblemAttemptResult: Object containing the attempt results
+        Tuples containing success status, generated code, and API response of the finished samples
     """
-    if model.startswith("agent") and "_" in model:
-        _, model = model.split("_")
+    cost = cost if cost is not None else AgentCost()
+    finished: asyncio.Queue = asyncio.Queue()
+    unfinished = set()
+    generations = {}
 
-    total = 0
-    successful_attempts = []
-    code_error_attempts = []
-    
-    while total < max_attempts:
-        tasks = []
-        for i in range(max(1, initial_attempts - len(code_error_attempts))):
-            prompt = get_prompt(programming_language, problem)
-            tasks.append(_single_attempt(
-                model,
-                prompt,
-                programming_language,
-                problem,
-                provider,
-                **kwargs
-            ))
-
-        for i in range(min(len(code_error_attempts), initial_attempts)):
-            code, api_response = code_error_attempts[i]
-            prompt = get_correction_prompt(programming_language, problem, code, api_response)
-            tasks.append(_single_attempt(
-                model,
-                prompt,
-                programming_language,
-                problem,
-                provider,
-                **kwargs
-            ))
-
-        results = await asyncio.gather(*tasks)
-        new_successful_attempts, new_code_error_attempts = _classify_attempts(results)
-        successful_attempts.extend(new_successful_attempts)
-        code_error_attempts.extend(new_code_error_attempts)
-
-        total += len(results)
-
-        if len(successful_attempts) >= min_correct:
-            break
-    
-    return _get_final_result(successful_attempts, code_error_attempts, problem, "agent_"+model, programming_language)
+    def track(future: asyncio.Future) -> None:
+        unfinished.add(future)
+        future.add_done_callback(finished.put_nowait)
 
-async def _single_attempt(
-    model: str,
-    prompt: str,
+    def charge(prompt: str, samples: int) -> None:
+        cost.calls += samples
+        cost.tokens += samples * len(prompt) // CHARS_PER_TOKEN
+
+    def generate(prompt: str, n: int) -> None:
+        delivered = []
+
+        def evaluate(content: str) -> None:
+            delivered.append(content)
+            charge(prompt, 1)
+            cost.tokens += len(content or "") // CHARS_PER_TOKEN
+            track(asyncio.ensure_future(_evaluate_content(content, programming_language, problem, staged, cost)))
+
+        task = asyncio.ensure_future(
+            make_completion_calls(prompt, provider, model, n, code_language=programming_language, on_completion=evaluate, **kwargs)
+        )
+        generations[task] = (prompt, n, delivered)
+        track(task)
+
+    for prompt, n in requests:
+        AgentStats.samples += n
+        generate(prompt, n)
+
+    def decided() -> bool:
+        if needed is None or successes < needed:
+            return False
+        pending = len(unfinished - generations.keys())
+        pending += sum(n - len(delivered) for _, n, delivered in generations.values())
+        leader, runner_up = (sorted(votes.values(), reverse=True) + [0, 0])[:2]
+        return leader > runner_up + pending
+
+    results = []
+    successes = 0
+    votes = Counter(vote_output(api_response) for _, api_response in prior_successes)
+    while unfinished and not decided():
+        future = await finished.get()
+        unfinished.discard(future)
+        if future in generations:
+            prompt, n, delivered = generations.pop(future)
+            error = future.exception()
+            if error is not None:
+                # Samples delivered before the failure are still executed, the others were asked for all the same
+                print(f"Error during code generation and evaluation: {error}")
+                charge(prompt, n - len(delivered))
+                results.extend([(False, None, ExecuteCodeResponse.error(str(error)))] * (n - len(delivered)))
+            continue
+        result = future.result()
+        results.append(result)
+        if is_successful(result):
+            successes += 1
+            votes[vote_output(result[2])] += 1
+
+    if unfinished:
+        AgentStats.rounds_stopped_early += 1
+        for future in unfinished:
+            if future in generations:
+                _, n, delivered = generations[future]
+                AgentStats.generations_cancelled += n - len(delivered)
+            else:
+                AgentStats.executions_cancelled += 1
+            future.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+    return results
+
+async def _evaluate_content(
+    content: str,
     programming_language: str,
     problem: Problem,
-    provider: str,
-    **kwargs
+    staged: bool = False,
+    cost: Optional[AgentCost] = None,
 ) -> Tuple[bool, Optional[str], Optional[ExecuteCodeResponse]]:
     """
-    Make a single attempt at generating and executing code for the problem.
+    Extract the code from a completion and execute it on the problem input.
+
+    Staged, the code is run on the example first; a program that fails it is
+    not run on the full input and is returned with an ExampleFailureResponse.
     
     Returns:
         Tuple containing success status, generated code, and API response
     """
     try:
-        content = await make_completion_call(prompt, provider, model, **kwargs)
         code = extract_code(content, programming_language)
         
         if code is None:
             return False, None, None
 
+        if staged and has_example(problem):
+            attempt = await run_sample(code, programming_language, problem.example_input, cost)
+            success, _, api_response = attempt
+            if not success:
+                return attempt
+            if not passes_example(problem, api_response):
+                return True, code, ExampleFailureResponse.from_response(api_response, problem.example_output)
+
+        return await run_sample(code, programming_language, problem.input, cost)
+    except Exception as e:
+        print(f"Error during code generation and evaluation: {e}")
+        return False, None, ExecuteCodeResponse.error(str(e))
+
+async def run_sample(
+    code: str,
+    programming_language: str,
+    input_data: str,
+    cost: Optional[AgentCost] = None,
+) -> Tuple[bool, Optional[str], Optional[ExecuteCodeResponse]]:
+    """
+    Execute extracted code on input_data, adding the time spent to cost.
+    
+    Returns:
+        Tuple containing success status, generated code, and API response
+    """
+    start = time.perf_counter()
+    try:
         api_response = await execute_code(
             code,
             programming_language,
-            problem.input,
+            input_data,
         )
-        
         return True, code, api_response
     except Exception as e:
         print(f"Error during code generation and evaluation: {e}")
         return False, None, ExecuteCodeResponse.error(str(e))
+    finally:
+        if cost is not None:
+            cost.executor_seconds += time.perf_counter() - start
+
+def is_successful(attempt: Tuple[bool, Optional[str], Optional[ExecuteCodeResponse]]) -> bool:
+    """Whether the attempt produced code that compiled and ran without errors on the full input."""
+    success, _, api_response = attempt
+    if not success or isinstance(api_response, ExampleFailureResponse):
+        return False
+    return bool(api_response.isCompiled and api_response.isExecutionSuccess)
 
-def _classify_attempts(
+def classify_attempts(
     attempts: List[Tuple[bool, Optional[str], ExecuteCodeResponse]]
 ) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[Tuple[str, Dict[str, Any]]]]:
     """
@@ -125,18 +220,23 @@ def _classify_attempts(
     """
     successful_attempts = []
     code_error_attempts = []
-    for success, code, api_response in attempts:
+    for attempt in attempts:
+        success, code, api_response = attempt
         if not success:
             continue
-        compilation_success = api_response.isCompiled
-        runtime_success = api_response.isExecutionSuccess
-        if compilation_success and runtime_success:
+        if is_successful(attempt):
             successful_attempts.append((code, api_response))
         else:
             code_error_attempts.append((code, api_response))
     return successful_attempts, code_error_attempts
 
-def _get_final_result(
+def vote_output(api_response: ExecuteCodeResponse) -> str:
+    """The output a successful attempt votes for in get_final_result."""
+    output = api_response.output
+    output = "" if output is None else output
+    return output.strip()
+
+def get_final_result(
     successful_attempts: List[Tuple[str, ExecuteCodeResponse]],
     code_error_attempts: List[Tuple[str, ExecuteCodeResponse]],
     problem: Problem,
@@ -151,26 +251,15 @@ def _get_final_result(
     """
     if len(successful_attempts) < 1 and len(code_error_attempts) > 0:
         code, api_response = code_error_attempts[0]
-        return ProblemAttemptResult.build_from_api_response(
-            api_response=api_response,
-            problem=problem,
-            model=model,
-            programming_language=programming_language,
-            code=code
-        )
+        return build_result(problem, model, programming_language, api_response, code)
     elif len(successful_attempts) > 0:
         votes_by_output = {}
         for code, api_response in successful_attempts:
-            output = api_response.output
-            output = "" if output is None else output
-            output = output.strip()
+            output = vote_output(api_response)
             votes_by_output[output] = votes_by_output.get(output, 0) + 1
         best_output = max(votes_by_output, key=lambda k: votes_by_output.get(k, 0))
         for code, api_response in successful_attempts:
-            output = api_response.output
-            output = "" if output is None else output
-            output = output.strip()
-            if output == best_output:
+            if vote_output(api_response) == best_output:
                 return ProblemAttemptResult.build_from_api_response(
                     api_response=api_response,
                     problem=problem,
@@ -0,0 +1,72 @@
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+from src.executor import execute_code
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.problem_attempt_result import ProblemAttemptResult, clean_output, compare_outputs
+from src.problem_loader import Problem
+
+# When set, programs are run on the example of the problem first and only run on the full input if they solve it
+_STAGED_EVALUATION = False
+
+
+def configure_staged_evaluation(enabled: bool) -> None:
+    global _STAGED_EVALUATION
+    _STAGED_EVALUATION = enabled
+
+
+def staged_evaluation_enabled() -> bool:
+    return _STAGED_EVALUATION
+
+
+@dataclass
+class ExampleFailureResponse(ExecuteCodeResponse):
+    """Response of a program that failed the example and was never run on the full input."""
+    expected_output: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, response: ExecuteCodeResponse, expected_output: str) -> "ExampleFailureResponse":
+        return cls(**asdict(response), expected_output=expected_output)
+
+
+def has_example(problem: Problem) -> bool:
+    """Whether the problem ships an example input and output (Advent of Code problems do not)."""
+    return bool(problem.example_input) and bool(problem.example_output)
+
+
+def passes_example(problem: Problem, response: ExecuteCodeResponse) -> bool:
+    """Whether a run on the example input compiled, ran and printed the example output."""
+    if not response.isCompiled or not response.isExecutionSuccess:
+        return False
+    return compare_outputs(clean_output(response.output or ""), problem.example_output)
+
+
+async def run_example(code: str, programming_language: str, problem: Problem) -> Optional[ExampleFailureResponse]:
+    """
+    Run code on the example of the problem.
+
+    Returns:
+        The response of the example run if the program failed it, None if it
+        passed or the problem has no example
+    """
+    if not has_example(problem):
+        return None
+    response = await execute_code(code, programming_language, problem.example_input)
+    if passes_example(problem, response):
+        return None
+    return ExampleFailureResponse.from_response(response, problem.example_output)
+
+
+def build_result(
+    problem: Problem, model: str, programming_language: str, api_response: ExecuteCodeResponse, code: Optional[str] = None
+) -> ProblemAttemptResult:
+    """Grade a response, leaving the runtime verdict empty if it is the run of a program that failed the example."""
+    if isinstance(api_response, ExampleFailureResponse):
+        return ProblemAttemptResult.from_example_failure(problem, model, programming_language, api_response, code)
+    return ProblemAttemptResult.build_from_api_response(
+        problem=problem,
+        model=model,
+        programming_language=programming_language,
+        api_response=api_response,
+        code=code,
+    )
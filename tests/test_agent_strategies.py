@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import src.simple_agent as simple_agent
+from src.agent_strategies import (
+    AgentBudget,
+    AgentStrategy,
+    BudgetScheduler,
+    agent_attempt_solution,
+    configure_agent_budget,
+    is_agent_model,
+    parse_agent_model,
+    parse_budget,
+)
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.problem_loader import Problem
+from src.simple_agent import AgentCost
+
+PROBLEM = Problem("1", "Print the answer", "input\n", "42\n")
+
+
+@pytest.fixture
+def fake_agent(monkeypatch):
+    """Every completion is a python program, executions fail unless the program prints 42."""
+    calls = []
+
+    async def make_completion_calls(prompt, provider, model, n, code_language=None, on_completion=None, **kwargs):
+        calls.append(n)
+        contents = ["```python\nprint(1)\n```"] * n
+        for content in contents:
+            on_completion(content)
+        return contents
+
+    async def execute_code(code, programming_language, input_data=""):
+        if "42" in code:
+            return ExecuteCodeResponse(status="success", output="42\n", isCompiled=True, isExecutionSuccess=True)
+        return ExecuteCodeResponse(status="success", output="Traceback", isCompiled=True, isExecutionSuccess=False, error_message="boom")
+
+    monkeypatch.setattr(simple_agent, "make_completion_calls", make_completion_calls)
+    monkeypatch.setattr(simple_agent, "execute_code", execute_code)
+    configure_agent_budget()
+    yield calls
+    configure_agent_budget()
+
+
+def test_parse_agent_model():
+    assert parse_agent_model("agent_openai/gpt-4o") == ("iterative-repair", "openai/gpt-4o")
+    assert parse_agent_model("agent-best-of-n_org/model_v2") == ("best-of-n", "org/model_v2")
+    assert not is_agent_model("agentica/model")
+    with pytest.raises(ValueError):
+        parse_agent_model("agent-unknown_model")
+
+
+def test_parse_budget():
+    assert parse_budget("calls=6,tokens=20000,executor_seconds=1.5") == AgentBudget(6, 20000, 1.5)
+    assert AgentBudget(calls=7).overridden(parse_budget("tokens=5")) == AgentBudget(7, 5, None)
+    with pytest.raises(ValueError):
+        parse_budget("dollars=3")
+
+
+def test_budget_calls_left():
+    budget = AgentBudget(calls=7, tokens=100)
+    assert budget.calls_left(AgentCost(calls=3)) == 4
+    assert budget.calls_left(AgentCost(calls=3, tokens=100)) == 0
+    assert AgentBudget().calls_left(AgentCost(calls=50)) is None
+
+
+def test_scheduler_shares_what_is_left():
+    scheduler = BudgetScheduler(AgentBudget(calls=10), problems=3)
+    granted = scheduler.grant(6)
+    assert granted == 4
+    scheduler.settle(granted, AgentCost(calls=granted))
+    scheduler.finish()
+    # 6 calls left between 2 problems, reserved calls count as spent
+    assert scheduler.grant(6) == 3
+    assert scheduler.grant(6) == 2
+    assert scheduler.grant(6) == 1
+    assert scheduler.grant(6) == 0
+    assert scheduler.denied == 1
+
+
+def test_strategy_is_abstract():
+    with pytest.raises(TypeError):
+        AgentStrategy()
+
+
+def test_iterative_repair_keeps_the_original_call_count(fake_agent):
+    result = asyncio.run(agent_attempt_solution("agent_mock/model", "python", PROBLEM, "open-router"))
+    # 3 fresh samples, then 1 fresh sample and 3 repairs
+    assert sum(fake_agent) == 7
+    assert result.model == "agent_mock/model"
+    assert not result.problem_correct
+
+
+def test_problem_budget_trims_rounds(fake_agent):
+    configure_agent_budget(problem_budget=AgentBudget(calls=4))
+    asyncio.run(agent_attempt_solution("agent_mock/model", "python", PROBLEM, "open-router"))
+    assert sum(fake_agent) == 4
+
+
+def test_iterative_repair_counts_granted_calls(fake_agent):
+    # Half of the run budget is kept for a second problem, so the rounds are trimmed to 2, 1 and 1 calls;
+    # counting the requested calls instead would stop after the second round
+    scheduler = configure_agent_budget(run_budget=AgentBudget(calls=4), problems=2)
+    asyncio.run(agent_attempt_solution("agent_mock/model", "python", PROBLEM, "open-router"))
+    assert fake_agent == [2, 1, 1]
+    assert scheduler.spent.calls == 4
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from src.code_extractor import IncrementalFenceDetector, extract_code
+
+TEXT = "Here is my solution:\n```python\nprint(input())\n```\nand some words after it\n```python\nunused\n```"
+
+
+def _feed(detector, chunks):
+    for chunk in chunks:
+        if detector.feed(chunk):
+            return True
+    return False
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(TEXT)])
+def test_detector_matches_extract_code_for_any_chunking(size):
+    detector = IncrementalFenceDetector("python")
+    assert _feed(detector, [TEXT[i:i + size] for i in range(0, len(TEXT), size)])
+    assert detector.code == extract_code(TEXT, "python") == "print(input())"
+    assert detector.text == TEXT[:TEXT.index("```\n", 30) + 3]
+
+
+def test_detector_ignores_other_languages_and_unclosed_blocks():
+    detector = IncrementalFenceDetector("rust")
+    assert not _feed(detector, ["```python\nprint()\n```\n", "```rust\nfn main() {}"])
+    assert not detector.complete
+    assert detector.code is None
+    assert not detector.feed("\n``")
+    assert detector.feed("`")
+    assert detector.code == "fn main() {}"
+
+
+def test_detector_ignores_chunks_after_completion():
+    detector = IncrementalFenceDetector("python")
+    assert detector.feed("```python\nx\n```")
+    assert detector.feed("more text")
+    assert detector.text == "```python\nx\n```"
+
+
+def test_detector_without_block():
+    detector = IncrementalFenceDetector("python")
+    assert not _feed(detector, ["no code ", "", "here"])
+    assert detector.text == "no code here"
+    assert detector.code is None
+
+
+def test_detector_matches_extract_code_on_random_texts():
+    rng = random.Random(0)
+    pieces = ["`", "``", "```", "```python\n", "```rust\n", "python", "\n", "x", " "]
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(0, 8)))) if len(text) > 1 else []
+        chunks = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+        detector = IncrementalFenceDetector("python")
+        _feed(detector, chunks)
+        assert detector.code == extract_code(text, "python")
+        if detector.complete:
+            assert extract_code(detector.text, "python") == detector.code
+        else:
+            assert detector.text == text
+
+
+def test_detector_long_stream_of_small_chunks():
+    prose = "word " * 200_000
+    detector = IncrementalFenceDetector("python")
+    assert not _feed(detector, [prose[i:i + 5] for i in range(0, len(prose), 5)])
+    assert _feed(detector, ["```py", "thon\nprint(1)\n`", "``", " ignored"])
+    assert detector.code == "print(1)"
+    assert len(detector.text) == len(prose) + len("```python\nprint(1)\n```")
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from src.compile_cache import CompileCache, CompileRecord
+
+
+def _run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_key_lock_serializes_duplicates_and_is_dropped_afterwards(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    holding = []
+    overlaps = []
+
+    def compile_once():
+        with cache.key_lock("key"):
+            overlaps.append(len(holding))
+            holding.append(1)
+            time.sleep(0.01)
+            holding.pop()
+
+    _run_threads(compile_once, 8)
+    assert overlaps == [0] * 8
+    assert cache._key_locks == {}
+
+
+def test_key_lock_is_released_on_errors(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    try:
+        with cache.key_lock("key"):
+            raise RuntimeError("compiler crashed")
+    except RuntimeError:
+        pass
+    assert cache._key_locks == {}
+    with cache.key_lock("key"):
+        pass
+
+
+def test_counters_are_exact_across_threads(tmp_path):
+    cache = CompileCache(str(tmp_path))
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    (workdir / "main").write_text("binary")
+    cache.store("hit", CompileRecord(0, "", 0.1, 1000), str(workdir), ["main"])
+
+    def look_up():
+        for _ in range(200):
+            cache.lookup("hit")
+            cache.lookup("miss")
+
+    _run_threads(look_up, 8)
+    assert (cache.hits, cache.misses) == (1600, 1600)
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+
+import src.model_api as model_api
+from src.completion_cache import CompletionCache, CompletionCacheMiss
+from src.model_api import make_completion_call, make_completion_calls
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """The model answers "completion <i>" for the i-th sample requested; returns the number of samples requested."""
+    requested = []
+
+    async def single_call(prompt, provider, model, code_language=None, **kwargs):
+        requested.append(prompt)
+        return f"completion {len(requested)}"
+
+    async def multi_call(prompt, provider, model, n, code_language=None, on_completion=None, **kwargs):
+        contents = [await single_call(prompt, provider, model) for _ in range(n)]
+        for content in contents:
+            on_completion(content)
+        return contents
+
+    monkeypatch.setattr(model_api, "_make_completion_call_with_retries", single_call)
+    monkeypatch.setattr(model_api, "_make_completion_calls_uncached", multi_call)
+    return requested
+
+
+def _use_cache(monkeypatch, path, mode):
+    cache = CompletionCache(str(path), mode)
+    monkeypatch.setattr(model_api, "_COMPLETION_CACHE", cache)
+    return cache
+
+
+def _calls():
+    async def scenario():
+        single = await make_completion_call("prompt", "open-router", "model", temperature=0.5)
+        multi = await make_completion_calls("prompt", "open-router", "model", 3, temperature=0.5)
+        return [single] + multi
+
+    return asyncio.run(scenario())
+
+
+def test_recorded_completions_are_replayed(completions, monkeypatch, tmp_path):
+    cache = _use_cache(monkeypatch, tmp_path / "completions.sqlite", "record")
+    recorded = _calls()
+    cache.close()
+    assert recorded == [f"completion {i}" for i in range(1, 5)]
+
+    cache = _use_cache(monkeypatch, tmp_path / "completions.sqlite", "replay")
+    assert _calls() == recorded
+    assert (cache.hits, cache.misses, len(completions)) == (4, 0, 4)
+    cache.close()
+
+
+def test_replay_miss(completions, monkeypatch, tmp_path):
+    cache = _use_cache(monkeypatch, tmp_path / "completions.sqlite", "replay")
+    with pytest.raises(CompletionCacheMiss):
+        asyncio.run(make_completion_call("prompt", "open-router", "model"))
+    cache.close()
+
+
+def test_queries_run_off_the_event_loop_thread(monkeypatch, tmp_path):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite"))
+    threads = []
+    for name in ("_lookup", "_store"):
+        method = getattr(cache, name)
+
+        def recording(*args, method=method):
+            threads.append(threading.current_thread())
+            return method(*args)
+
+        monkeypatch.setattr(cache, name, recording)
+
+    key = cache.next_key("open-router", "model", "prompt", {})
+
+    async def scenario():
+        await cache.store(key, {}, "completion")
+        return await cache.lookup(key)
+
+    assert asyncio.run(scenario()) == "completion"
+    assert len(threads) == 2 and threading.main_thread() not in threads
+    cache.close()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from src.correlation_bootstrap import ProblemRates, _with_averages, bootstrap_correlations, subset
+from src.correlation_plots import correlation_matrix
+
+
+def _rates(n_problems=30, n_models=4, languages=("cpp", "rust"), seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 11, size=(n_problems, n_models, 2 * len(languages))) * 10.0
+    return ProblemRates(values, [str(p) for p in range(n_problems)], [f"m{m}" for m in range(n_models)], list(languages))
+
+
+def test_point_estimate_matches_correlation_matrix():
+    rates = _rates()
+    intervals = bootstrap_correlations(rates, n_resamples=50, workers=1, seed=0)
+    table = pd.DataFrame(_with_averages(rates.values.mean(axis=0), len(rates.languages)), index=rates.models, columns=rates.columns)
+    pd.testing.assert_frame_equal(intervals.estimate, correlation_matrix(table))
+
+
+def test_degenerate_resamples_are_dropped_not_counted():
+    # With three models, some resamples draw a single model three times
+    rates = _rates(n_models=3)
+    intervals = bootstrap_correlations(rates, n_resamples=400, workers=1, seed=1)
+    assert (intervals.dropped.to_numpy() > 0).all()
+    diagonal_lower = np.diag(intervals.lower.to_numpy())
+    diagonal_upper = np.diag(intervals.upper.to_numpy())
+    np.testing.assert_allclose(diagonal_lower, 1.0)
+    np.testing.assert_allclose(diagonal_upper, 1.0)
+    assert ((intervals.lower.to_numpy() >= -1) & (intervals.upper.to_numpy() <= 1)).all()
+
+
+def test_reproducible_across_workers():
+    rates = _rates()
+    single = bootstrap_correlations(rates, method="spearman", n_resamples=120, chunk_size=40, workers=1, seed=3)
+    pooled = bootstrap_correlations(rates, method="spearman", n_resamples=120, chunk_size=40, workers=2, seed=3)
+    pd.testing.assert_frame_equal(single.lower, pooled.lower)
+    pd.testing.assert_frame_equal(single.dropped, pooled.dropped)
+
+
+def test_subset_keeps_dropped():
+    intervals = bootstrap_correlations(_rates(), n_resamples=20, workers=1, seed=0)
+    names = ["compiles cpp", "correct cpp"]
+    assert list(subset(intervals, names).dropped.columns) == names
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.correlation_plots import (
+    average_ranks,
+    compute_correlation,
+    compute_rank_correlation,
+    correlation_matrix,
+    pairwise_pearson,
+    pairwise_spearman,
+    print_correlation_table,
+)
+
+
+def _with_missing(seed=0, rows=12, columns=5, missing=0.2):
+    rng = np.random.default_rng(seed)
+    values = rng.random((rows, columns)) * 100
+    values[rng.random(values.shape) < missing] = np.nan
+    return values
+
+
+def _as_dicts(values):
+    return [{row: value for row, value in enumerate(column) if not np.isnan(value)} for column in values.T]
+
+
+@pytest.mark.parametrize("method, reference", [("pearson", compute_correlation), ("spearman", compute_rank_correlation)])
+def test_correlation_matrix_matches_pairwise_reference(method, reference):
+    values = _with_missing()
+    table = pd.DataFrame(values, columns=[f"v{i}" for i in range(values.shape[1])])
+    matrix = correlation_matrix(table, method).to_numpy()
+    dicts = _as_dicts(values)
+    expected = np.array([[reference(a, b)[0] for b in dicts] for a in dicts])
+    np.testing.assert_allclose(matrix, expected, atol=1e-12)
+
+
+@pytest.mark.parametrize("reference", [compute_correlation, compute_rank_correlation])
+def test_print_correlation_table_matches_pairwise_reference(reference, capsys):
+    dicts = _as_dicts(_with_missing(seed=1))
+    variables = {f"v{i}": values for i, values in enumerate(dicts)}
+    matrix = print_correlation_table(variables, reference)
+    expected = np.array([[reference(a, b)[0] for b in dicts] for a in dicts])
+    np.testing.assert_allclose(matrix.to_numpy(), expected, atol=1e-12)
+    assert list(matrix.index) == list(matrix.columns) == list(variables)
+    assert len(capsys.readouterr().out.splitlines()) == 2 + len(variables)
+
+
+def test_print_correlation_table_rejects_other_functions():
+    with pytest.raises(ValueError):
+        print_correlation_table({"a": {1: 1.0, 2: 2.0}}, lambda a, b: (0.0, []))
+
+
+@pytest.mark.parametrize("correlation", [pairwise_pearson, pairwise_spearman])
+@pytest.mark.parametrize("constant", [98.6, 91.3, 1e6 + 0.1])
+def test_constant_column_is_nan(correlation, constant):
+    values = _with_missing(missing=0.0)
+    values[:, 2] = constant
+    result = correlation(values)
+    assert np.isnan(result[2]).all()
+    assert np.isnan(result[:, 2]).all()
+    np.testing.assert_allclose(np.diag(result)[[0, 1, 3, 4]], 1.0)
+
+
+def test_near_constant_column_is_nan():
+    values = _with_missing(missing=0.0)
+    values[:, 1] = 91.3 + np.arange(len(values)) * 1e-13
+    assert np.isnan(pairwise_pearson(values)[1]).all()
+
+
+def test_column_constant_on_shared_rows_only():
+    values = np.array([
+        [1.0, 5.0],
+        [2.0, 5.0],
+        [3.0, np.nan],
+        [4.0, 7.0],
+    ])
+    values[3, 0] = np.nan
+    # Column 1 is constant on the rows it shares with column 0
+    assert np.isnan(pairwise_pearson(values)[0, 1])
+
+
+def test_fewer_than_two_shared_rows_is_nan():
+    values = np.array([[1.0, np.nan], [2.0, np.nan], [np.nan, 3.0], [np.nan, 4.0]])
+    assert np.isnan(pairwise_pearson(values)[0, 1])
+
+
+def test_batched_matches_single():
+    values = np.stack([_with_missing(seed) for seed in range(3)])
+    for correlation in (pairwise_pearson, pairwise_spearman):
+        batched = correlation(values)
+        for i in range(len(values)):
+            np.testing.assert_allclose(batched[i], correlation(values[i]), equal_nan=True)
+
+
+def test_average_ranks_ties_and_missing():
+    values = np.array([[3.0], [1.0], [3.0], [np.nan], [2.0]])
+    np.testing.assert_array_equal(average_ranks(values)[:, 0], [3.5, 1.0, 3.5, np.nan, 2.0])
+
+
+def test_average_ranks_matches_scipy():
+    from scipy.stats import rankdata
+
+    values = np.random.default_rng(1).integers(0, 5, size=(20, 4)).astype(float)
+    np.testing.assert_array_equal(average_ranks(values), rankdata(values, axis=0))
@@ -0,0 +1,63 @@
+import shutil
+import sys
+
+import pytest
+
+import src.local_executor as local_executor
+from src.local_executor import SandboxLimits, SandboxUnavailableError, run_sandboxed
+
+needs_namespaces = pytest.mark.skipif(not local_executor._probe_network_isolation()[0], reason="network namespaces unavailable")
+
+LIMITS = SandboxLimits(wall_time=10.0, cpu_time=1, memory=512 * 1024 ** 2, output=4096)
+
+
+@pytest.fixture(params=["prlimit", "wrapper"])
+def limits_mode(request, monkeypatch):
+    """Run the tests with prlimit(1) and with the Python wrapper used where it is missing."""
+    if request.param == "wrapper":
+        which = shutil.which
+        monkeypatch.setattr(local_executor.shutil, "which", lambda name: None if name == "prlimit" else which(name))
+    local_executor._limits_prefix.cache_clear()
+    yield request.param
+    local_executor._limits_prefix.cache_clear()
+
+
+def _run(tmp_path, source, input_data=""):
+    (tmp_path / "main.py").write_text(source)
+    return run_sandboxed((sys.executable, "main.py"), str(tmp_path), LIMITS, input_data)
+
+
+@needs_namespaces
+def test_runs_with_input(tmp_path, limits_mode):
+    outcome = _run(tmp_path, "print(int(input()) * 2)", "21\n")
+    assert outcome.success
+    assert outcome.output == "42\n"
+
+
+@needs_namespaces
+def test_cpu_limit(tmp_path, limits_mode):
+    outcome = _run(tmp_path, "while True: pass")
+    assert not outcome.success
+    assert not outcome.timed_out
+    assert outcome.returncode < 0
+
+
+@needs_namespaces
+def test_output_limit(tmp_path, limits_mode):
+    outcome = _run(tmp_path, "import sys\nwhile True: sys.stdout.write('x' * 1024)")
+    assert not outcome.success
+    assert len(outcome.output) <= LIMITS.output
+
+
+@needs_namespaces
+def test_no_network(tmp_path):
+    outcome = _run(tmp_path, "import socket\nsocket.create_connection(('1.1.1.1', 53), timeout=2)")
+    assert not outcome.success
+
+
+def test_refuses_host_network_unless_allowed(monkeypatch):
+    monkeypatch.setattr(local_executor, "_probe_network_isolation", lambda: ((), "unshare is not installed"))
+    with pytest.raises(SandboxUnavailableError):
+        local_executor.check_sandbox()
+    monkeypatch.setattr(local_executor, "_ALLOW_HOST_NETWORK", True)
+    local_executor.check_sandbox()
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import src.model_api as model_api
+import src.rate_limiter as rate_limiter
+from src.model_api import StreamStats, _call_with_retries, _make_completion_call_with_retries
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_ADAPTIVE_LIMITERS", {})
+    monkeypatch.setattr(model_api, "backoff_delay", lambda attempt: 0.0)
+    for counter in ("streams", "stopped_at_code_block", "characters"):
+        monkeypatch.setattr(StreamStats, counter, 0)
+
+
+def test_cancelled_model_acquire_releases_provider_slot():
+    async def scenario():
+        provider = rate_limiter.get_adaptive_limiter("open-router")
+        model = rate_limiter.get_adaptive_limiter("open-router:model")
+        model.limit = 1.0
+        await model.acquire()
+
+        async def request():
+            return "never sent"
+
+        task = asyncio.ensure_future(_call_with_retries("open-router", "model", request))
+        await asyncio.sleep(0.01)
+        assert provider.in_flight == 1  # holding the provider slot, waiting for the model one
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return provider, model
+
+    provider, model = asyncio.run(scenario())
+    assert provider.in_flight == 0
+    assert model.in_flight == 1
+    assert provider.limit == 8.0  # a cancelled request does not move the limit
+
+
+class _Stream:
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+        if self.error is not None:
+            raise self.error
+
+    async def close(self):
+        pass
+
+
+def test_retried_stream_counts_once(monkeypatch):
+    streams = [
+        _Stream(["```python\nprint("], error=httpx.ReadTimeout("timed out")),
+        _Stream(["```python\nprint(1)\n", "```", " trailing"]),
+    ]
+
+    async def create(**kwargs):
+        return streams.pop(0)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(model_api, "get_client", lambda provider: client)
+    monkeypatch.setattr(model_api, "_STREAMING", True)
+
+    text = asyncio.run(_make_completion_call_with_retries("prompt", "open-router", "model", "python"))
+    assert text == "```python\nprint(1)\n```"
+    assert (StreamStats.streams, StreamStats.stopped_at_code_block, StreamStats.characters) == (1, 1, len(text))
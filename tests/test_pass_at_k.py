@@ -0,0 +1,74 @@
+from math import comb
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.pass_at_k import bootstrap_pass_at_k, pass_at_k, pass_at_k_table, print_pass_at_k_table
+
+
+def _exact(n, c, k):
+    return 1 - comb(n - c, k) / comb(n, k)
+
+
+def test_pass_at_k_matches_the_combinatorial_formula():
+    cases = [(n, c) for n in range(1, 21) for c in range(n + 1)]
+    n, c = np.array(cases).T
+    ks = [1, 2, 5, 10]
+    estimates = pass_at_k(n, c, ks)
+    for row, (samples, passes) in enumerate(cases):
+        for column, k in enumerate(ks):
+            if samples < k:
+                assert np.isnan(estimates[row, column])
+            else:
+                assert estimates[row, column] == pytest.approx(_exact(samples, passes, k), abs=1e-12)
+
+
+def test_pass_at_1_is_the_pass_rate():
+    assert pass_at_k([10, 4], [3, 4], [1])[:, 0] == pytest.approx([0.3, 1.0])
+
+
+def test_pass_at_k_large_sample_counts():
+    estimates = pass_at_k([10_000, 10_000], [1, 0], [100])
+    assert estimates[0, 0] == pytest.approx(_exact(10_000, 1, 100))
+    assert estimates[1, 0] == 0.0
+
+
+def _counts():
+    index = pd.MultiIndex.from_tuples(
+        [("python", "a", "1"), ("python", "a", "2"), ("python", "b", "1"), ("python", "b", "2")],
+        names=["programming_language", "model", "problem_id"],
+    )
+    return pd.DataFrame(
+        {"attempts": [4, 4, 4, 1], "compiled": [4, 2, 4, 1], "correct": [2, 0, 1, 1], "compile_attempts": [4, 4, 4, 1]},
+        index=index,
+    )
+
+
+def test_table_averages_problems_and_skips_missing_estimates():
+    table = pass_at_k_table(_counts(), [1, 2])
+    assert table.loc[("python", "a"), "pass@1"] == pytest.approx((0.5 + 0.0) / 2)
+    assert table.loc[("python", "a"), "pass@2"] == pytest.approx((_exact(4, 2, 2) + 0.0) / 2)
+    # Problem 2 of model b has a single sample, so only problem 1 has a pass@2
+    assert table.loc[("python", "b"), "pass@2"] == pytest.approx(_exact(4, 1, 2))
+    assert list(pass_at_k_table(_counts(), [1], column="compiled").columns) == ["compile@1"]
+
+
+def test_bootstrap_intervals_contain_the_estimate():
+    intervals = bootstrap_pass_at_k(_counts(), [1, 2, 8], n_resamples=200, seed=0)
+    table = pass_at_k_table(_counts(), [1, 2])
+    for (lang, model), row in table.iterrows():
+        for k in (1, 2):
+            interval = intervals.loc[(lang, model, k)]
+            assert interval["estimate"] == pytest.approx(row[f"pass@{k}"])
+            assert interval["lower"] <= interval["estimate"] <= interval["upper"]
+    # No problem has 8 samples
+    assert intervals.xs(8, level="k")[["estimate", "lower", "upper"]].isna().all().all()
+    assert intervals.equals(bootstrap_pass_at_k(_counts(), [1, 2, 8], n_resamples=200, seed=0))
+
+
+@pytest.mark.parametrize("confidence, label", [(0.95, "95% CI"), (0.9, "90% CI"), (0.995, "99.5% CI")])
+def test_table_header_shows_the_confidence_used(confidence, label, capsys):
+    print_pass_at_k_table(bootstrap_pass_at_k(_counts(), [1], n_resamples=20, confidence=confidence, seed=0))
+    header = capsys.readouterr().out.splitlines()[3]
+    assert header.endswith(label)
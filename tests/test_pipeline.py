@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+import src.pipeline as pipeline
+from src.pipeline import BenchmarkJob, run_pipeline
+from src.problem_attempt_result import ProblemAttemptResult
+from src.problem_loader import Problem
+
+
+@pytest.fixture
+def stubbed_attempts(monkeypatch):
+    """Generation returns a python block, execution fails on problem "3" and succeeds otherwise."""
+    async def generate_zero_shot_completion(model, problem, programming_language, provider):
+        await asyncio.sleep(0)
+        return "```python\nprint()\n```"
+
+    async def evaluate_code(model, problem, programming_language, code):
+        if problem.problem_id == "3":
+            raise RuntimeError("executor crashed")
+        return ProblemAttemptResult(
+            problem_id=problem.problem_id, model=model, programming_language=programming_language,
+            compilation_success=True, runtime_success=True, problem_correct=True, success=True,
+            output="\n", code_errors=None, attempt_error=None, code=code,
+        )
+
+    monkeypatch.setattr(pipeline, "generate_zero_shot_completion", generate_zero_shot_completion)
+    monkeypatch.setattr(pipeline, "evaluate_code", evaluate_code)
+
+
+def _jobs(count):
+    return (BenchmarkJob("model", "python", Problem(str(i), "", "", "")) for i in range(count))
+
+
+def test_failed_stage_cancels_the_others(stubbed_attempts, tmp_path):
+    async def scenario():
+        with pytest.raises(RuntimeError, match="executor crashed"):
+            await run_pipeline(_jobs(1000), str(tmp_path / "out.jsonl"), "open-router", 4, 2)
+        return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(scenario()) == set()
+
+
+def test_pipeline_writes_successes(stubbed_attempts, tmp_path):
+    stats = asyncio.run(run_pipeline(_jobs(3), str(tmp_path / "out.jsonl"), "open-router", 4, 2))
+    assert (stats.jobs, stats.results, stats.rows_written) == (3, 3, 3)
@@ -0,0 +1,161 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import src.rate_limiter as rate_limiter
+from src.rate_limiter import AdaptiveLimiter, TokenBucket, backoff_delay, configure_rate_limit, pace
+
+
+class FakeClock:
+    """Stands in for time.monotonic and asyncio.sleep; sleeping advances the clock only if asked to."""
+
+    def __init__(self, advance: bool = True):
+        self.now = 1000.0
+        self.advance = advance
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 9))
+        if self.advance:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic))
+    monkeypatch.setattr(rate_limiter, "asyncio", SimpleNamespace(sleep=clock.sleep, get_running_loop=asyncio.get_running_loop))
+    return clock
+
+
+def test_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+
+    async def scenario():
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(scenario())
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_bucket_refills_while_idle(clock):
+    bucket = TokenBucket(rate=1.0, burst=2)
+
+    async def scenario():
+        await bucket.acquire()
+        await bucket.acquire()
+        clock.now += 10  # refills to the burst size, not beyond
+        for _ in range(3):
+            await bucket.acquire()
+
+    asyncio.run(scenario())
+    assert clock.sleeps == [1.0]
+
+
+def test_concurrent_callers_queue_in_arrival_order(clock):
+    clock.advance = False
+    bucket = TokenBucket(rate=4.0)
+
+    async def scenario():
+        await asyncio.gather(*(bucket.acquire() for _ in range(4)))
+
+    asyncio.run(scenario())
+    assert clock.sleeps == [0.25, 0.5, 0.75]
+
+
+def test_pace_uses_configured_buckets(clock, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_BUCKETS", {})
+    configure_rate_limit("provider", 10.0)
+
+    async def scenario():
+        for _ in range(3):
+            await pace("provider")
+            await pace("unlimited")
+
+    asyncio.run(scenario())
+    assert clock.sleeps == [0.1, 0.1]
+    configure_rate_limit("provider", None)
+    assert rate_limiter._BUCKETS == {}
+
+
+def test_bucket_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_limiter_grows_additively_and_halves_once_per_burst_of_rate_limits(clock):
+    limiter = AdaptiveLimiter("provider", initial_concurrency=4, max_concurrency=8)
+
+    async def requests(count, **outcome):
+        for _ in range(count):
+            await limiter.acquire()
+            limiter.release(**outcome)
+
+    asyncio.run(requests(4, success=True))
+    assert 4.9 < limiter.limit < 5.0
+    asyncio.run(requests(3, success=False, rate_limited=True))
+    assert 2.45 < limiter.limit < 2.5
+    clock.now += 2
+    asyncio.run(requests(1, success=False, rate_limited=True))
+    assert 1.2 < limiter.limit < 1.25
+    clock.now += 2
+    asyncio.run(requests(1, success=False, rate_limited=True))
+    assert limiter.limit == 1  # never below min_concurrency
+    asyncio.run(requests(100, success=True))
+    assert limiter.limit == 8
+    assert (limiter.requests, limiter.successes, limiter.rate_limited, limiter.errors) == (109, 104, 5, 0)
+
+
+def test_cancelled_and_failed_requests_keep_the_limit(clock):
+    limiter = AdaptiveLimiter("provider", initial_concurrency=4)
+
+    async def scenario():
+        await limiter.acquire()
+        limiter.release(success=False, cancelled=True)
+        await limiter.acquire()
+        limiter.release(success=False)
+
+    asyncio.run(scenario())
+    assert limiter.limit == 4
+    assert (limiter.successes, limiter.rate_limited, limiter.errors, limiter.in_flight) == (0, 0, 1, 0)
+
+
+def test_acquire_waits_for_a_free_slot():
+    limiter = AdaptiveLimiter("provider", initial_concurrency=2)
+
+    async def scenario():
+        await limiter.acquire()
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        cancelled = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiting.done() and limiter.in_flight == 2
+        cancelled.cancel()
+        limiter.release(success=True)
+        await waiting
+        assert limiter.in_flight == 2
+        assert limiter._waiters == []
+
+    asyncio.run(scenario())
+
+
+def test_retry_after_pauses_new_requests(clock):
+    limiter = AdaptiveLimiter("provider")
+
+    async def scenario():
+        await limiter.acquire()
+        limiter.release(success=False, rate_limited=True, retry_after=3.0)
+        await limiter.acquire()
+
+    asyncio.run(scenario())
+    assert clock.sleeps == [3.0]
+
+
+def test_backoff_delay_is_capped(monkeypatch):
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    assert [backoff_delay(attempt, maximum=10.0) for attempt in range(6)] == [1.0, 2.0, 4.0, 8.0, 10.0, 10.0]
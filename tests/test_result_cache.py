@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+import src.executor as executor
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.result_cache import ResultCache
+
+SUCCESS = ExecuteCodeResponse(status="success", output="42\n", cpuTime="0.01", isCompiled=True, isExecutionSuccess=True)
+KEY = ("local", "python", None, False, "print(42)", "input\n")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_lookup_returns_stored_response(cache):
+    async def scenario():
+        missed = await cache.lookup(*KEY)
+        await cache.store(*KEY, SUCCESS)
+        return missed, await cache.lookup(*KEY)
+
+    assert asyncio.run(scenario()) == (None, SUCCESS)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_nondeterministic_responses_are_not_stored(cache):
+    async def scenario():
+        await cache.store(*KEY, ExecuteCodeResponse.error("connection reset"))
+        return await cache.lookup(*KEY)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_sqlite_runs_off_the_event_loop_thread(cache, monkeypatch):
+    threads = []
+    key = ResultCache._key
+
+    def recording_key(*args):
+        threads.append(threading.current_thread())
+        return key(*args)
+
+    monkeypatch.setattr(ResultCache, "_key", staticmethod(recording_key))
+    asyncio.run(cache.store(*KEY, SUCCESS))
+    asyncio.run(cache.lookup(*KEY))
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+
+
+def test_execute_code_is_answered_from_the_cache(cache, monkeypatch):
+    async def execute_with_backend(*args):
+        raise AssertionError("cached programs are not executed")
+
+    monkeypatch.setattr(executor, "_RESULT_CACHE", cache)
+    monkeypatch.setattr(executor, "_BACKEND", "local")
+    monkeypatch.setattr(executor, "_execute_with_backend", execute_with_backend)
+    asyncio.run(cache.store(*KEY, SUCCESS))
+    assert asyncio.run(executor.execute_code("print(42)", "python", "input\n")) == SUCCESS
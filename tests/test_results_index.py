@@ -0,0 +1,69 @@
+import json
+
+from src.results_index import index_path, sync_index
+
+
+def _row(problem_id, model="model"):
+    return {"model": model, "problem_id": str(problem_id), "programming_language": "python", "code": "x" * 100}
+
+
+def _append(path, *lines):
+    with open(path, "a") as f:
+        f.write("".join(lines))
+
+
+def _lines(*rows):
+    return [json.dumps(row) + "\n" for row in rows]
+
+
+def _key(problem_id, model="model"):
+    return model, str(problem_id), "python"
+
+
+def test_missing_results_file_removes_stale_index(tmp_path):
+    results = str(tmp_path / "results.jsonl")
+    _append(index_path(results), "12\t[\"model\", \"1\", \"python\"]\n")
+    assert sync_index(results) == set()
+    assert not (tmp_path / "results.jsonl.keys").exists()
+
+
+def test_only_appended_rows_are_parsed(tmp_path):
+    results = str(tmp_path / "results.jsonl")
+    _append(results, *_lines(_row(1), _row(2)))
+    assert sync_index(results) == {_key(1), _key(2)}
+
+    # Rows already covered by the index are not read again, even if they no longer parse
+    with open(results, "r+") as f:
+        f.write("#")
+    _append(results, *_lines(_row(3)))
+    assert sync_index(results) == {_key(1), _key(2), _key(3)}
+    with open(index_path(results)) as f:
+        assert len(f.readlines()) == 3
+
+
+def test_partial_and_malformed_rows(tmp_path):
+    results = str(tmp_path / "results.jsonl")
+    _append(results, *_lines(_row(1)), "not json\n", json.dumps(_row(2)))
+    assert sync_index(results) == {_key(1)}
+    # The unterminated row is indexed once it is complete
+    _append(results, "\n")
+    assert sync_index(results) == {_key(1), _key(2)}
+
+
+def test_index_is_rebuilt_when_results_file_was_replaced(tmp_path):
+    results = str(tmp_path / "results.jsonl")
+    _append(results, *_lines(_row(1), _row(2), _row(3)))
+    sync_index(results)
+    with open(results, "w") as f:
+        f.write("".join(_lines(_row(4))))
+    assert sync_index(results) == {_key(4)}
+
+
+def test_corrupt_index_is_rebuilt(tmp_path):
+    results = str(tmp_path / "results.jsonl")
+    _append(results, *_lines(_row(1), _row(2, model="other")))
+    sync_index(results)
+    _append(index_path(results), "garbage")
+    assert sync_index(results) == {_key(1), _key(2, model="other")}
+    with open(index_path(results)) as f:
+        assert len(f.readlines()) == 2
@@ -0,0 +1,48 @@
+import asyncio
+import json
+
+import pytest
+
+from src.results_index import sync_index
+from src.results_writer import ResultWriter
+
+
+def _row(problem_id):
+    return {"model": "model", "problem_id": str(problem_id), "programming_language": "python"}
+
+
+def test_rows_and_index_are_written(tmp_path):
+    filename = str(tmp_path / "results" / "out.jsonl")
+
+    async def scenario():
+        async with ResultWriter(filename, batch_size=3) as writer:
+            for problem_id in range(10):
+                await writer.write(_row(problem_id))
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert writer.rows_written == 10
+    with open(filename) as f:
+        assert [json.loads(line) for line in f] == [_row(problem_id) for problem_id in range(10)]
+    assert sync_index(filename) == {("model", str(problem_id), "python") for problem_id in range(10)}
+
+
+def test_failed_write_is_raised_to_blocked_producers_and_close(tmp_path):
+    filename = str(tmp_path / "out.jsonl")
+
+    async def scenario():
+        writer = ResultWriter(filename, queue_size=1)
+        await writer.start()
+        await writer.write({"model": object()})  # not JSON serializable, stops the writer task
+
+        async def produce():
+            for problem_id in range(10):
+                await writer.write(_row(problem_id))
+
+        with pytest.raises(TypeError):
+            await asyncio.wait_for(produce(), 5)
+        with pytest.raises(TypeError):
+            await asyncio.wait_for(writer.close(), 5)
+        await writer.close()  # already closed
+
+    asyncio.run(scenario())
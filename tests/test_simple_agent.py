@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+import src.simple_agent as simple_agent
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.problem_loader import Problem
+from src.simple_agent import AgentCost, AgentStats, attempt_round, get_final_result
+
+PROBLEM = Problem("1", "Print the answer", "input\n", "A\n")
+
+
+@pytest.fixture
+def samples(monkeypatch):
+    """
+    Completions are "<output> <seconds> [<generation seconds>]" code blocks; executing
+    one prints output after sleeping that long, and a generation time delays the
+    delivery of that and the following samples. Returns the list the test fills
+    with the samples.
+    """
+    programs = []
+
+    async def make_completion_calls(prompt, provider, model, n, code_language=None, on_completion=None, **kwargs):
+        contents = []
+        for program in programs[:n]:
+            fields = program.split()
+            if len(fields) > 2:
+                await asyncio.sleep(float(fields[2]))
+            contents.append(f"```python\n{program}\n```")
+            on_completion(contents[-1])
+        return contents
+
+    async def execute_code(code, programming_language, input_data=""):
+        output, seconds = code.split()[:2]
+        await asyncio.sleep(float(seconds))
+        return ExecuteCodeResponse(status="success", output=output + "\n", isCompiled=True, isExecutionSuccess=True)
+
+    monkeypatch.setattr(simple_agent, "make_completion_calls", make_completion_calls)
+    monkeypatch.setattr(simple_agent, "execute_code", execute_code)
+    return programs
+
+
+def _round(n, needed, prior_successes=(), cost=None):
+    return asyncio.run(attempt_round("model", [("prompt", n)], "python", PROBLEM, "open-router", needed, cost=cost, prior_successes=prior_successes))
+
+
+def test_round_stops_once_the_vote_is_decided(samples):
+    samples += ["A 0.01", "A 0.02", "B 5"]
+    cancelled = AgentStats.executions_cancelled
+    results = _round(3, 1)
+    assert [code for _, code, _ in results] == ["A 0.01", "A 0.02"]
+    assert AgentStats.executions_cancelled == cancelled + 1
+
+
+def test_cancelled_generations_are_not_charged(samples):
+    samples += ["A 0", "A 0", "B 0 0.2"]
+    cancelled = AgentStats.generations_cancelled
+    cost = AgentCost()
+    assert len(_round(3, 1, cost=cost)) == 2
+    assert AgentStats.generations_cancelled == cancelled + 1
+    assert cost.calls == 2
+
+    cost = AgentCost()
+    _round(3, None, cost=cost)
+    assert cost.calls == 3
+
+
+def test_round_waits_while_the_vote_can_change(samples):
+    samples += ["A 0.01", "B 0.02", "A 0.05"]
+    results = _round(3, 1)
+    assert len(results) == 3
+    successful, errors = simple_agent.classify_attempts(results)
+    assert get_final_result(successful, errors, PROBLEM, "agent_model", "python").problem_correct
+
+
+def test_prior_successes_vote(samples):
+    samples += ["A 0.01", "B 5"]
+    prior = [("A 0", ExecuteCodeResponse(status="success", output="A\n", isCompiled=True, isExecutionSuccess=True))]
+    assert len(_round(2, 1, prior)) == 1
+
+
+def test_round_without_needed_runs_every_sample(samples):
+    samples += ["A 0.01", "A 0.01", "A 0.03"]
+    assert len(_round(3, None)) == 3
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+import src.problem_attempt as problem_attempt
+import src.staged_evaluation as staged_evaluation
+from src.attempt_stats import COUNT_COLUMNS, load_attempts, model_rates, per_problem_counts
+from src.incremental_stats import IncrementalStats
+from src.jdoodle_executor import ExecuteCodeResponse
+from src.pass_at_k import pass_at_k_table
+from src.problem_loader import Problem
+from src.simple_agent import get_final_result
+
+PROBLEM = Problem("1", "Print the answer", "full input\n", "42\n", example_input="example\n", example_output="7\n")
+
+
+@pytest.fixture
+def executions(monkeypatch):
+    """Programs print their code; returns the inputs they were run on."""
+    inputs = []
+
+    async def execute_code(code, programming_language, input_data=""):
+        inputs.append(input_data)
+        return ExecuteCodeResponse(status="success", output=code + "\n", isCompiled=True, isExecutionSuccess=True)
+
+    monkeypatch.setattr(staged_evaluation, "execute_code", execute_code)
+    monkeypatch.setattr(problem_attempt, "execute_code", execute_code)
+    monkeypatch.setattr(staged_evaluation, "_STAGED_EVALUATION", True)
+    return inputs
+
+
+def test_example_failure_keeps_only_the_compilation_verdict(executions):
+    result = asyncio.run(problem_attempt.evaluate_code("model", PROBLEM, "python", "8"))
+    assert executions == ["example\n"]
+    assert (result.compilation_success, result.runtime_success, result.problem_correct) == (True, None, False)
+    assert result.success and result.output is None
+
+
+def test_example_pass_is_graded_on_the_full_input(executions):
+    result = asyncio.run(problem_attempt.evaluate_code("model", PROBLEM, "python", "7"))
+    assert executions == ["example\n", "full input\n"]
+    assert (result.compilation_success, result.runtime_success, result.problem_correct) == (True, True, False)
+    assert result.output == "7"
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_agent_result_from_example_failure(compiled):
+    response = staged_evaluation.ExampleFailureResponse(
+        status="success", output="8\n", isCompiled=compiled, isExecutionSuccess=compiled, expected_output="7\n"
+    )
+    result = get_final_result([], [("print(8)", response)], PROBLEM, "agent", "python")
+    assert (result.compilation_success, result.runtime_success, result.problem_correct) == (compiled, None, False)
+    assert result.code == "print(8)"
+
+
+def test_rates_leave_out_missing_runtime_verdicts(executions, tmp_path):
+    results = [asyncio.run(problem_attempt.evaluate_code("model", PROBLEM, "python", code)) for code in ("8", "7")]
+    path = tmp_path / "results.jsonl"
+    path.write_text("".join(json.dumps(result.to_writable_dict()) + "\n" for result in results))
+
+    counts = per_problem_counts(load_attempts(str(path)))
+    assert counts[COUNT_COLUMNS].values.tolist() == [[2, 2, 1, 0, 2, 1]]
+    rates = model_rates(counts)
+    assert rates[["compile_pct", "runtime_pct", "correct_pct"]].values.tolist() == [[100.0, 100.0, 0.0]]
+    assert pass_at_k_table(counts, [1], column="runtime").values.tolist() == [[1.0]]
+
+    stats = IncrementalStats(str(tmp_path / "state.json"))
+    stats.update_from_file(str(path))
+    assert stats.counts_frame().equals(counts)